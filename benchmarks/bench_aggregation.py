@@ -0,0 +1,104 @@
+"""Benchmark memory use of incident aggregation versus incident count.
+
+Run: python benchmarks/bench_aggregation.py [--counts 1000 10000 50000] [--page-size N]
+
+Simulates Canvas pages as JSON text and compares peak traced memory
+(``tracemalloc``) of the old approach (download every incident with all
+fields, then aggregate the materialized list) against the streaming fold
+used by ``services.aggregation`` (one projected page at a time).
+"""
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+project_root = str(Path(__file__).resolve().parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from models.incident import Incident  # noqa: E402
+from services.aggregation import CountBy, SlaBreaches, fold, projection  # noqa: E402
+
+STATUSES = ["Assigned", "In Progress", "Pending", "Resolved"]
+PRIORITIES = ["Low", "Medium", "High", "Critical"]
+SEVERITIES = ["Severity A", "Severity B", "Severity C", "Severity D"]
+SLM = ["Within the Service Target", "Service Target Breached", "No Service Target"]
+GROUPS = [f"Group {i}" for i in range(20)]
+
+
+def _incident(i: int, rng: random.Random) -> dict:
+    incident = {name: f"value-{name}" for name in Incident.model_fields}
+    incident.update(
+        id=f"INC{i:09d}",
+        status=rng.choice(STATUSES),
+        priority=rng.choice(PRIORITIES),
+        severity=rng.choice(SEVERITIES),
+        slmStatus=rng.choice(SLM),
+        assignedGroup=rng.choice(GROUPS),
+        notes="Player Login: player123\nRound ID: 987654\n" * 20,
+    )
+    return incident
+
+
+def _pages(count: int, page_size: int, fields=None):
+    """Yield page bodies as Canvas would send them (optionally $select-projected)."""
+    rng = random.Random(42)
+    for start in range(0, count, page_size):
+        page = [_incident(i, rng) for i in range(start, min(count, start + page_size))]
+        if fields:
+            page = [{f: inc.get(f) for f in fields} for inc in page]
+        yield json.dumps({"value": page})
+
+
+def _aggregators():
+    return {"status": CountBy("status"), "priority": CountBy("priority"),
+            "severity": CountBy("severity"), "sla": SlaBreaches()}
+
+
+def materialized(count: int, page_size: int):
+    aggs = _aggregators()
+    incidents = []
+    for body in _pages(count, page_size):
+        incidents.extend(json.loads(body)["value"])
+    fold(incidents, aggs)
+    return aggs
+
+
+def streaming(count: int, page_size: int):
+    aggs = _aggregators()
+    fields = projection(aggs)
+    for body in _pages(count, page_size, fields):
+        fold(json.loads(body)["value"], aggs)
+    return aggs
+
+
+def _measure(fn, count: int, page_size: int):
+    tracemalloc.start()
+    start = time.perf_counter()
+    aggs = fn(count, page_size)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6, elapsed, {k: a.result() for k, a in aggs.items()}
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Aggregation memory benchmark")
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'incidents':>10}  {'materialized MB':>16}  {'streaming MB':>13}  {'time (m/s)':>14}")
+    for count in args.counts:
+        m_peak, m_time, m_result = _measure(materialized, count, args.page_size)
+        s_peak, s_time, s_result = _measure(streaming, count, args.page_size)
+        assert m_result == s_result
+        print(f"{count:>10}  {m_peak:>16.1f}  {s_peak:>13.1f}  {m_time:>6.2f}/{s_time:<6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark correlation queries: inverted index versus re-scanning results.
+
+Run: python benchmarks/bench_correlation.py [--counts 10000 100000] [--queries N]
+
+Indexes N synthetic extractions (Casino/Round/Player IDs with skewed
+frequencies) into `CorrelationIndex` and times `related()` and `top()`
+against the equivalent scan over a list of extracted field dicts.
+"""
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+project_root = str(Path(__file__).resolve().parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from services.correlation import CorrelationIndex, identifiers  # noqa: E402
+
+
+def _extractions(count: int):
+    rng = random.Random(42)
+    for i in range(count):
+        yield f"INC{i:09d}", {
+            # a few casinos account for most incidents
+            "casino_id": str(int(rng.paretovariate(1.2)) % 500),
+            "round_id": f"R{rng.randrange(count // 3 + 1)}",
+            "player_login": f"player{rng.randrange(count // 2 + 1)}",
+            "game_name": f"Game {rng.randrange(200)}",
+        }
+
+
+def _scan_related(rows, incident_id):
+    mine = identifiers(rows[incident_id])
+    keys = {(k, v) for k, vs in mine.items() for v in vs}
+    return [other for other, fields in rows.items() if other != incident_id
+            and keys & {(k, v) for k, vs in identifiers(fields).items() for v in vs}]
+
+
+def _scan_top(rows, n):
+    counts = Counter(v for fields in rows.values() for v in identifiers(fields).get("casino_id", ()))
+    return counts.most_common(n)
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Correlation index benchmark")
+    parser.add_argument("--counts", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'incidents':>10}  {'index build s':>13}  {'related ms (idx/scan)':>22}  {'top ms (idx/scan)':>18}")
+    for count in args.counts:
+        rows = dict(_extractions(count))
+        index = CorrelationIndex(max_incidents=count)
+        start = time.perf_counter()
+        for incident_id, fields in rows.items():
+            index.update(incident_id, identifiers(fields))
+        build = time.perf_counter() - start
+
+        rng = random.Random(7)
+        sample = rng.sample(list(rows), min(args.queries, count))
+        start = time.perf_counter()
+        for incident_id in sample:
+            index.related(incident_id)
+        related_idx = (time.perf_counter() - start) * 1000 / len(sample)
+        start = time.perf_counter()
+        for incident_id in sample[:3]:
+            _scan_related(rows, incident_id)
+        related_scan = (time.perf_counter() - start) * 1000 / 3
+
+        start = time.perf_counter()
+        for _ in range(args.queries):
+            index.top("casino_id", 10)
+        top_idx = (time.perf_counter() - start) * 1000 / args.queries
+        start = time.perf_counter()
+        _scan_top(rows, 10)
+        top_scan = (time.perf_counter() - start) * 1000
+        print(f"{count:>10}  {build:>13.2f}  {related_idx:>10.3f}/{related_scan:<11.1f}  {top_idx:>8.3f}/{top_scan:<9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark near-duplicate detection: accuracy and throughput of the LSH index.
+
+Run: python benchmarks/bench_dedup.py [--incidents 5000] [--dup-rate 0.3]
+
+Generates incidents from templated notes, refiles a fraction of them with
+small edits (reworded line, extra sentence, changed timestamp), indexes all
+of them with `DuplicateIndex` and reports recall on the refiled copies,
+false merges between distinct originals, and incidents indexed per second.
+Estimated similarities are checked against exact Jaccard on a sample.
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+project_root = str(Path(__file__).resolve().parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from services.dedup import DuplicateIndex, shingles, signature, similarity  # noqa: E402
+
+GAMES = ["Mega Moolah", "Book of Dead", "Starburst", "Gonzo's Quest", "Lightning Roulette"]
+PROBLEMS = ["round stuck open", "game fails to launch", "balance not updated", "bonus not credited",
+            "wrong payout", "disconnect during free spins"]
+
+
+def _notes(rng: random.Random) -> str:
+    return "\n".join([
+        f"Your Reference: REF-{rng.randrange(10**6)}",
+        f"Player Login: player{rng.randrange(10**6)}",
+        f"Casino ID: {rng.randrange(3000)}",
+        f"Round ID: {rng.randrange(10**9)}",
+        f"Game Name + Variant: {rng.choice(GAMES)} v{rng.randrange(5)}",
+        f"Round date (UTC): 2026-0{rng.randrange(1, 10)}-1{rng.randrange(10)} 1{rng.randrange(10)}:00",
+        f"Description: Player reports {rng.choice(PROBLEMS)} after {rng.randrange(2, 60)} spins. "
+        + " ".join(rng.choice(["please", "check", "urgent", "logs", "attached", "again", "customer", "waiting"])
+                   for _ in range(rng.randrange(10, 40))),
+    ])
+
+
+def _refile(notes: str, rng: random.Random) -> str:
+    lines = notes.split("\n")
+    edit = rng.randrange(3)
+    if edit == 0:
+        lines.append("Customer chased again, please advise.")
+    elif edit == 1:
+        lines[5] = lines[5][:-2] + f"{rng.randrange(10, 60)}"
+    else:
+        lines[0] = f"Your Reference: REF-{rng.randrange(10**6)}"
+    return "\n".join(lines)
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Near-duplicate detection benchmark")
+    parser.add_argument("--incidents", type=int, default=5000)
+    parser.add_argument("--dup-rate", type=float, default=0.3)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    originals = {f"INC{i:09d}": _notes(rng) for i in range(args.incidents)}
+    copies = {}
+    for n, (incident_id, notes) in enumerate(list(originals.items())[:int(args.incidents * args.dup_rate)]):
+        copies[f"DUP{n:09d}"] = (incident_id, _refile(notes, rng))
+
+    index = DuplicateIndex(threshold=args.threshold, max_incidents=len(originals) + len(copies))
+    start = time.perf_counter()
+    false_merges = sum(1 for incident_id, notes in originals.items() if index.add(incident_id, notes) is not None)
+    found = sum(1 for dup_id, (original, notes) in copies.items() if index.add(dup_id, notes) == original)
+    elapsed = time.perf_counter() - start
+    total = len(originals) + len(copies)
+
+    errors = []
+    for dup_id, (original, notes) in list(copies.items())[:200]:
+        a, b = shingles(originals[original]), shingles(notes)
+        exact = len(a & b) / len(a | b)
+        errors.append(abs(similarity(signature(a), signature(b)) - exact))
+
+    print(f"indexed {total} incidents in {elapsed:.2f}s ({total / elapsed:,.0f}/s)")
+    print(f"refiled copies detected: {found}/{len(copies)} ({found / max(1, len(copies)):.1%})")
+    print(f"distinct originals merged: {false_merges}")
+    if errors:
+        print(f"similarity estimate error vs exact Jaccard: mean {sum(errors) / len(errors):.3f}, max {max(errors):.3f}")
+    print(index.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark peak memory of parsing one large Canvas list response.
+
+Run: python benchmarks/bench_json_stream.py [--counts 1000 10000 50000] [--chunk-size N]
+
+A single ``{"value": [...]}`` body with N incidents is produced lazily in
+network-sized chunks. ``buffered`` collects the whole body and calls
+``json.loads`` (what ``response.json()`` does); ``ijson`` and ``fallback``
+feed the chunks to ``services.json_stream.iter_array_items`` and process
+incidents one at a time. Peak traced memory (``tracemalloc``) is reported.
+"""
+import asyncio
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+project_root = str(Path(__file__).resolve().parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from models.incident import Incident  # noqa: E402
+from services import json_stream  # noqa: E402
+
+STATUSES = ["Assigned", "In Progress", "Pending", "Resolved"]
+
+
+def _incident(i: int, rng: random.Random) -> dict:
+    incident = {name: f"value-{name}" for name in Incident.model_fields}
+    incident.update(
+        id=f"INC{i:09d}",
+        status=rng.choice(STATUSES),
+        notes="Player Login: player123\nRound ID: 987654\n" * 20,
+    )
+    return incident
+
+
+def _chunks(count: int, chunk_size: int):
+    """Yield the encoded response body in ``chunk_size`` pieces without building it whole."""
+    rng = random.Random(42)
+    pending = b'{"@odata.context": "$metadata#incidents", "value": ['
+    for i in range(count):
+        pending += (b"," if i else b"") + json.dumps(_incident(i, rng)).encode()
+        while len(pending) >= chunk_size:
+            yield pending[:chunk_size]
+            pending = pending[chunk_size:]
+    yield pending + b"]}"
+
+
+async def _achunks(count: int, chunk_size: int):
+    for chunk in _chunks(count, chunk_size):
+        yield chunk
+
+
+def buffered(count: int, chunk_size: int) -> int:
+    body = b"".join(_chunks(count, chunk_size))
+    seen = 0
+    for incident in json.loads(body)["value"]:
+        seen += incident["status"] in STATUSES
+    return seen
+
+
+def _streaming(count: int, chunk_size: int, use_ijson: bool) -> int:
+    async def run():
+        seen = 0
+        async for incident in json_stream.iter_array_items(_achunks(count, chunk_size), use_ijson=use_ijson):
+            seen += incident["status"] in STATUSES
+        return seen
+
+    return asyncio.run(run())
+
+
+def with_ijson(count: int, chunk_size: int) -> int:
+    return _streaming(count, chunk_size, True)
+
+
+def fallback(count: int, chunk_size: int) -> int:
+    return _streaming(count, chunk_size, False)
+
+
+def _measure(fn, count: int, chunk_size: int):
+    tracemalloc.start()
+    start = time.perf_counter()
+    seen = fn(count, chunk_size)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert seen == count, (fn.__name__, seen)
+    return peak / 1e6, elapsed
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Incremental JSON parsing memory benchmark")
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024)
+    args = parser.parse_args()
+
+    cases = [("buffered", buffered), ("fallback", fallback)]
+    if json_stream.ijson is not None:
+        cases.insert(1, ("ijson", with_ijson))
+    else:
+        print("ijson not installed; skipping the ijson case")
+
+    header = "".join(f"  {name + ' MB':>12}  {'s':>6}" for name, _ in cases)
+    print(f"{'incidents':>10}{header}")
+    for count in args.counts:
+        row = ""
+        for _, fn in cases:
+            peak, elapsed = _measure(fn, count, args.chunk_size)
+            row += f"  {peak:>12.1f}  {elapsed:>6.2f}"
+        print(f"{count:>10}{row}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark cost-aware LLM routing: route mix, escalations, cost and latency.
+
+Run: python benchmarks/bench_llm_routing.py [--incidents 2000] [--small-miss 0.08]
+
+Runs `extract_notes_with_llm` against a fake client over a mix of notes
+(40% filled-in support forms, 30% short free text, 30% long free text).
+The fake small model drops a labelled field on ``--small-miss`` of calls and
+returns no tool call on 2%; token counts follow the notes length and each
+model has a fixed modelled latency. Reports cost and modelled latency per
+extraction with routing off (everything on the deployment) and on, plus the
+route mix and escalation rate.
+"""
+import json
+import random
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+project_root = str(Path(__file__).resolve().parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from config.settings import settings  # noqa: E402
+from services import llm_routing, llm_service  # noqa: E402
+from utils import resilience  # noqa: E402
+
+# modelled seconds per call: fixed + per 1k prompt tokens
+LATENCY = {"small": (0.6, 0.15), "large": (1.8, 0.45)}
+WORDS = "player round stuck balance casino game launch error please check logs urgent again".split()
+
+
+def _notes(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.4:
+        labels = rng.sample(list(llm_routing.FORM_LABELS.values()), rng.randrange(4, 9))
+        return "\n".join(f"{label}: {rng.randrange(10**8)}" for label in labels) + \
+            "\n" + " ".join(rng.choice(WORDS) for _ in range(rng.randrange(20, 120)))
+    words = rng.randrange(20, 90) if kind < 0.7 else rng.randrange(300, 1500)
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+class _FakeClient:
+    def __init__(self, rng: random.Random, small_miss: float) -> None:
+        self.rng = rng
+        self.small_miss = small_miss
+        self.latency = 0.0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, **_):
+        notes = messages[-1]["content"]
+        prompt_tokens = 450 + len(notes) // 4
+        small = model == llm_routing.model_for("small") and model != llm_routing.model_for("large")
+        fixed, per_k = LATENCY["small" if small else "large"]
+        self.latency += fixed + per_k * prompt_tokens / 1000
+        fields = {label: "N/A" for label in llm_routing.FORM_LABELS.values()}
+        for name in llm_routing.labelled_fields(notes):
+            fields[llm_routing.FORM_LABELS[name]] = "value"
+        if small and fields and self.rng.random() < self.small_miss:
+            fields[self.rng.choice(list(fields))] = "N/A"
+        tool_calls = [] if small and self.rng.random() < 0.02 else [SimpleNamespace(
+            function=SimpleNamespace(name="extract_incident_details", arguments=json.dumps(fields)))]
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=180, total_tokens=prompt_tokens + 180)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(tool_calls=tool_calls))], usage=usage)
+
+
+def _run(notes, small_miss: float, routing: bool):
+    settings.LLM_ROUTING_ENABLED = routing
+    llm_routing.STATS = llm_routing.RoutingStats()
+    client = _FakeClient(random.Random(11), small_miss)
+    llm_service.get_client = lambda: client
+    for text in notes:
+        llm_service.extract_notes_with_llm(text)
+    snapshot = llm_routing.STATS.snapshot()["routes"]
+    cost = sum(route["cost_usd"] for route in snapshot.values())
+    return cost, client.latency, snapshot
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="LLM routing benchmark")
+    parser.add_argument("--incidents", type=int, default=2000)
+    parser.add_argument("--small-miss", type=float, default=0.08, help="fraction of small-model calls missing a field")
+    args = parser.parse_args()
+
+    settings.LLM_CACHE_TTL_SECONDS = 0
+    settings.LLM_SCHEDULER_ENABLED = False
+    # the fake client needs no rate limiting; latency is modelled, not slept
+    llm_service.AZURE_OPENAI = resilience._PassThrough("azure_openai")
+    llm_service.AZURE_OPENAI_SMALL = resilience._PassThrough("azure_openai_small")
+    rng = random.Random(5)
+    notes = [_notes(rng) for _ in range(args.incidents)]
+    n = len(notes)
+
+    base_cost, base_latency, _ = _run(notes, args.small_miss, routing=False)
+    cost, latency, routes = _run(notes, args.small_miss, routing=True)
+    small, large = routes["small"], routes["large"]
+    print(f"{n} extractions; small={small['model']} large={large['model']}")
+    print(f"{'routing':<8} {'cost/1k USD':>12} {'latency s':>10}")
+    print(f"{'off':<8} {base_cost / n * 1000:>12.3f} {base_latency / n:>10.2f}")
+    print(f"{'on':<8} {cost / n * 1000:>12.3f} {latency / n:>10.2f}")
+    print(f"routed small: {small['calls']} ({small['calls'] / n:.0%}) {small['reasons']}; "
+          f"escalated {small['escalated']} ({small['escalation_rate'] or 0:.1%}) {small['escalation_reasons']}")
+    print(f"routed large: {large['calls']} ({large['calls'] / n:.0%}) {large['reasons']}")
+    print(f"cost saving {1 - cost / base_cost:.0%}, latency saving {1 - latency / base_latency:.0%}")
+
+
+if __name__ == "__main__":
+    main()
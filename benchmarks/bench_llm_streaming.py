@@ -0,0 +1,106 @@
+"""Benchmark streamed extraction: time to each field vs the whole answer.
+
+Run: python benchmarks/bench_llm_streaming.py [--runs 10] [--ttft-ms 300] [--tokens-per-s 80]
+
+A fake streamed completion sends the tool-call arguments in ~4-character
+deltas after ``--ttft-ms``, at ``--tokens-per-s``. For each run
+`stream_notes_with_llm` is consumed and the arrival of `casino_id`,
+`round_id` and the final result is recorded, as a fraction of the time the
+non-streaming call would have taken. Also reports `ObjectMemberParser`
+cost per delta.
+"""
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+project_root = str(Path(__file__).resolve().parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from config.settings import settings  # noqa: E402
+from services import llm_service  # noqa: E402
+from services.json_stream import ObjectMemberParser  # noqa: E402
+from utils import resilience  # noqa: E402
+
+WORDS = "player round stuck balance casino game launch error please check logs urgent again".split()
+
+
+def _arguments(rng: random.Random) -> str:
+    # the tool schema's field order: header fields first, the long description last
+    return json.dumps({
+        "Your Reference": f"REF-{rng.randrange(10**6)}", "Urgency": "High", "Market": "UK",
+        "I need assistance with": "Stuck round", "Player Login": f"player{rng.randrange(10**5)}",
+        "Round ID": str(rng.randrange(10**12)), "Round date (UTC)": "2026-10-18 12:00",
+        "Game Name + Variant": "Roulette", "Casino ID": str(rng.randrange(10**4)),
+        "Description": " ".join(rng.choice(WORDS) for _ in range(rng.randrange(60, 200))),
+    })
+
+
+def _client(arguments: str, ttft_s: float, tokens_per_s: float):
+    def create(**_):
+        def chunks():
+            time.sleep(ttft_s)
+            for i in range(0, len(arguments), 4):
+                time.sleep(1 / tokens_per_s)
+                call = SimpleNamespace(index=0, function=SimpleNamespace(
+                    name="extract_incident_details" if i == 0 else None, arguments=arguments[i:i + 4]))
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(tool_calls=[call]),
+                                                               finish_reason=None)], usage=None)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(tool_calls=None),
+                                                           finish_reason="stop")], usage=None)
+        return chunks()
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Streamed LLM extraction benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="time to the first streamed token")
+    parser.add_argument("--tokens-per-s", type=float, default=80.0)
+    args = parser.parse_args()
+
+    settings.LLM_CACHE_TTL_SECONDS = 0
+    settings.LLM_SCHEDULER_ENABLED = False
+    settings.LLM_ROUTING_ENABLED = False
+    # the fake client needs no rate limiting
+    llm_service.AZURE_OPENAI = resilience._PassThrough("azure_openai")
+    llm_service.AZURE_OPENAI_SMALL = resilience._PassThrough("azure_openai_small")
+    rng = random.Random(4)
+    arrivals = {"casino_id": [], "round_id": [], "result": []}
+    for _ in range(args.runs):
+        client = _client(_arguments(rng), args.ttft_ms / 1000, args.tokens_per_s)
+        llm_service.get_client = lambda: client
+        start = time.perf_counter()
+        for event, data in llm_service.stream_notes_with_llm("Round ID: 1\nCasino ID: 2\nstuck round"):
+            name = data["name"] if event == "field" else event
+            if name in arrivals:
+                arrivals[name].append(time.perf_counter() - start)
+
+    total = statistics.median(arrivals["result"])
+    print(f"{args.runs} runs, ttft {args.ttft_ms:.0f} ms, {args.tokens_per_s:.0f} tokens/s")
+    print(f"{'arrival':<10} {'p50 ms':>8} {'of total':>9}")
+    for name, times in arrivals.items():
+        median = statistics.median(times)
+        print(f"{name:<10} {median * 1000:>8.0f} {median / total:>9.0%}")
+
+    text = _arguments(rng)
+    deltas = [text[i:i + 4] for i in range(0, len(text), 4)]
+    start = time.perf_counter()
+    for _ in range(200):
+        member_parser = ObjectMemberParser()
+        for delta in deltas:
+            for _member in member_parser.feed(delta):
+                pass
+        list(member_parser.close())
+    per_delta = (time.perf_counter() - start) / (200 * len(deltas))
+    print(f"ObjectMemberParser: {per_delta * 1e6:.1f} us per delta ({len(text)} chars in {len(deltas)} deltas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark key normalization on realistic ticket shapes.
+
+Run: python benchmarks/bench_normalizer.py [--iterations N]
+
+Compares the original uncached normalization against the memoized
+``normalize_dict`` (copying) and ``normalize_dict(view=True)`` for a small
+form-style ticket and a full Canvas incident carrying ~80 fields.
+"""
+import sys
+import time
+from pathlib import Path
+
+project_root = str(Path(__file__).resolve().parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from models.incident import Incident  # noqa: E402
+from services.normalizer import normalize_dict, key_cache_info, clear_key_cache  # noqa: E402
+
+
+def _uncached_normalize_dict(data):
+    out = {}
+    for k, v in data.items():
+        if not isinstance(k, str):
+            continue
+        out[" ".join(k.strip().lower().split())] = v
+    return out
+
+
+SMALL_TICKET = {
+    "channel": "Round Outcome",
+    "Player ID": "PID-123",
+    "Player Name": "Bob",
+    "Casino ID": "CAS-003",
+    "Round ID": "RND-2",
+    "Event Date & Time": "2025-11-11 14:30:00",
+    "Game Name": "Blackjack",
+    "Some Other Field": "ignored",
+}
+
+
+def _canvas_incident() -> dict:
+    incident = {name: f"value-{name}" for name in Incident.model_fields}
+    incident["notes"] = "Player Login: player123\nRound ID: 987654\n" * 40
+    incident.update(SMALL_TICKET)
+    return incident
+
+
+def _bench(fn, data, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        norm = fn(data)
+        # touch a few keys the way detector/payload_builder do
+        "channel" in norm
+        "round id" in norm and norm["round id"]
+        "casino id" in norm and norm["casino id"]
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark key normalization")
+    parser.add_argument("--iterations", "-n", type=int, default=20000)
+    args = parser.parse_args()
+
+    clear_key_cache()
+    shapes = [("small ticket", SMALL_TICKET), ("canvas incident", _canvas_incident())]
+    for label, data in shapes:
+        assert dict(normalize_dict(data, view=True)) == _uncached_normalize_dict(data)
+        uncached = _bench(_uncached_normalize_dict, data, args.iterations)
+        cached = _bench(normalize_dict, data, args.iterations)
+        view = _bench(lambda d: normalize_dict(d, view=True), data, args.iterations)
+        print(f"{label} ({len(data)} keys)")
+        print(f"  uncached copy : {uncached:8.2f} us")
+        print(f"  cached copy   : {cached:8.2f} us")
+        print(f"  cached view   : {view:8.2f} us")
+    print(key_cache_info())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark local full-text search latency versus index size.
+
+Run: python benchmarks/bench_search.py [--incidents 100000] [--path data/bench_search.sqlite3]
+
+Fills a `SearchIndex` with synthetic incidents (templated notes, random
+player/round/casino IDs, a vocabulary of problem words) unless ``--path``
+already holds that many, then reports p50/p95/max latency of typical
+queries: an exact Round ID, a rare word, two common words, a common word
+with support group and active filters, a prefix, newest first, and a
+count.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = str(Path(__file__).resolve().parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from services.search_index import SearchIndex  # noqa: E402
+
+GROUPS = [f"Group {i}" for i in range(50)]
+PRIORITIES = ["Low", "Medium", "High", "Critical"]
+WORDS = ("stuck open round balance refund bonus payout freeze crash launch timeout error spin jackpot "
+         "deposit withdrawal login session disconnect currency wager limit rollback duplicate missing "
+         "delay lobby mobile desktop safari chrome android ios audio graphics loading").split()
+GAMES = ["Mega Moolah", "Book of Dead", "Starburst", "Gonzo's Quest", "Lightning Roulette", "Immortal Romance"]
+
+
+def _incident(i: int) -> dict:
+    # seeded per incident so any one can be regenerated as a probe
+    rng = random.Random(i)
+    words = " ".join(rng.choice(WORDS) for _ in range(rng.randrange(20, 60)))
+    return {
+        "id": f"INC{i:012d}",
+        "summary": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} on {rng.choice(GAMES)}",
+        "notes": (f"Player Login: player{rng.randrange(10**7)}\nRound ID: {rng.randrange(10**10)}\n"
+                  f"Casino ID: {rng.randrange(5000)}\nGame Name: {rng.choice(GAMES)}\nDescription: {words}"),
+        "resolutionNotes": rng.choice(["", "Round closed manually", "Refund issued", "Escalated to provider"]),
+        "assignedGroup": rng.choice(GROUPS),
+        "isActive": rng.random() < 0.2,
+        "priority": rng.choice(PRIORITIES),
+        "status": rng.choice(["Assigned", "In Progress", "Resolved"]),
+        "createdInSeconds": 1_700_000_000 + i,
+        "lastModifiedInSeconds": 1_700_000_000 + i,
+    }
+
+
+def _fill(index: SearchIndex, count: int, batch: int = 5000) -> float:
+    have = index.stats()["incidents"]
+    start = time.perf_counter()
+    for offset in range(have, count, batch):
+        index.upsert([_incident(i) for i in range(offset, min(count, offset + batch))])
+    return time.perf_counter() - start
+
+
+def _time(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1], samples[-1]
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Full-text search benchmark")
+    parser.add_argument("--incidents", type=int, default=100000)
+    parser.add_argument("--path", help="index file to (re)use; default: a temporary file")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    path = args.path or os.path.join(tempfile.mkdtemp(), "search.sqlite3")
+    index = SearchIndex(path)
+    build = _fill(index, args.incidents)
+    if build > 1:
+        print(f"indexed up to {args.incidents} incidents in {build:.1f}s")
+
+    probe = _incident(args.incidents // 2)
+    round_id = probe["notes"].split("Round ID: ")[1].split("\n")[0]
+    stored_round = index.search(round_id, top=1)["value"]
+    queries = {
+        "exact round id": lambda: index.search(round_id, top=10),
+        "rare word": lambda: index.search("safari jackpot rollback", top=10),
+        "two common words": lambda: index.search("stuck round", top=10),
+        "two common, window 5000": lambda: index.search("stuck round", top=10, window=5000),
+        "common word + filters": lambda: index.search("refund", support_group="Group 7", is_active=True, top=10),
+        "prefix": lambda: index.search("withdr*", top=10),
+        "newest first": lambda: index.search("crash", orderby="created desc", top=10),
+        "count": lambda: index.search("crash timeout", count=True, top=1),
+    }
+    print(f"{index.stats()['incidents']} incidents indexed ({os.path.getsize(path) / 1e6:.0f} MB); "
+          f"round id probe {'found' if stored_round else 'not in index'}")
+    print(f"{'query':<24} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for name, fn in queries.items():
+        p50, p95, worst = _time(fn, args.repeat)
+        print(f"{name:<24} {p50:>8.2f} {p95:>8.2f} {worst:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Report process boot time and the slowest imports of the app.
+
+Run: python benchmarks/bench_startup.py [--runs N] [--top N] [--module main]
+
+Boots a fresh interpreter ``--runs`` times with ``-X importtime`` and
+reports the median wall time of ``import main`` plus the modules with the
+largest cumulative import time (the same data as ``python -X importtime``,
+aggregated and sorted). Use it to check that heavy dependencies such as
+``openai`` stay out of the import path.
+"""
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+project_root = str(Path(__file__).resolve().parent.parent)
+
+
+def _boot(module: str):
+    cmd = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=project_root, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+    imports = {}
+    for line in proc.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            imports[parts[2].strip()] = int(parts[1])
+        except ValueError:
+            continue  # header line
+    return elapsed, imports
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Startup time report")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--module", default="main")
+    args = parser.parse_args()
+
+    walls = []
+    cumulative = defaultdict(list)
+    for _ in range(args.runs):
+        wall, imports = _boot(args.module)
+        walls.append(wall)
+        for name, us in imports.items():
+            cumulative[name].append(us)
+
+    print(f"import {args.module}: median {statistics.median(walls) * 1000:.1f} ms over {args.runs} runs "
+          f"(min {min(walls) * 1000:.1f} ms, interpreter start included)")
+    ranked = sorted(((statistics.median(v), k) for k, v in cumulative.items()), reverse=True)
+    print(f"\n{'cumulative ms':>14}  module")
+    for us, name in ranked[:args.top]:
+        print(f"{us / 1000:14.1f}  {name}")
+    heavy = [m for m in ("openai", "pyarrow", "redis") if m in cumulative]
+    if heavy:
+        print(f"\nnote: optional/heavy packages imported at boot: {', '.join(heavy)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark per-ticket cost of `extract_via_model` with and without the compiled fast path.
+
+Run: python benchmarks/bench_validator.py [--iterations N]
+
+Both paths are checked to produce identical results for every sample before
+timing, including a ticket with a non-string value that must fall back to
+Pydantic and report the same validation errors.
+"""
+import sys
+import time
+from pathlib import Path
+
+project_root = str(Path(__file__).resolve().parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from services.config import TICKET_TYPE_MAP  # noqa: E402
+from services.validator import extract_via_model  # noqa: E402
+
+
+SAMPLES = [
+    ("game launch issue", {
+        "channel": "Game Launch Issue",
+        "Test Login ID": "test_user",
+        "Test Login Password": "p@ssw0rd",
+        "Casino ID": "CAS-001",
+        "MID": "MID-55",
+        "Game Launch URL": "https://casino.example/launch",
+        "VPN": "vpn-prod",
+        "Brand / Casino Company Name": "Example Casino Ltd",
+        "Some Other Field": "ignored",
+    }),
+    ("eti games", {
+        "channel": "ETI",
+        "Player Name": "Alice Smith",
+        "casino_id": "CAS-002",
+        "Round ID": "RND-1",
+        "Game Name": "Roulette VIP",
+        "Brand Name": "VIP Brand",
+        "MID": "MID-9",
+    }),
+    ("round outcome", {
+        "Player ID": "PID-123",
+        "Player Name": "Bob",
+        "Casino ID": "CAS-003",
+        "Round ID": "RND-2",
+        "Event Date & Time": "2025-11-11 14:30:00",
+        "Game Name": "Blackjack",
+    }),
+    ("stuck open round", {
+        "Player ID": "PID-9",
+        "Player Name": "Carol",
+        "Casino ID": 12345,  # non-string -> falls back to Pydantic errors
+        "Round ID": "RND-3",
+        "Event Date & Time": "2025-11-12",
+        "Game Name": "Baccarat",
+    }),
+]
+
+
+def _time_path(compiled: bool, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for ttype, raw in SAMPLES:
+            extract_via_model(TICKET_TYPE_MAP[ttype], raw, compiled=compiled)
+    elapsed = time.perf_counter() - start
+    return elapsed / (iterations * len(SAMPLES)) * 1e6
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark extract_via_model fast path")
+    parser.add_argument("--iterations", "-n", type=int, default=20000)
+    args = parser.parse_args()
+
+    for ttype, raw in SAMPLES:
+        model_cls = TICKET_TYPE_MAP[ttype]
+        slow = extract_via_model(model_cls, raw, compiled=False)
+        fast = extract_via_model(model_cls, raw, compiled=True)
+        if slow != fast:
+            raise SystemExit(f"Mismatch for {ttype}:\n  pydantic={slow}\n  compiled={fast}")
+
+    pydantic_us = _time_path(False, args.iterations)
+    compiled_us = _time_path(True, args.iterations)
+    print(f"pydantic path : {pydantic_us:8.2f} us/ticket")
+    print(f"compiled path : {compiled_us:8.2f} us/ticket")
+    print(f"speedup       : {pydantic_us / compiled_us:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
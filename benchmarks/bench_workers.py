@@ -0,0 +1,133 @@
+"""Benchmark request throughput with 1, 2 and 4 server worker processes.
+
+Run: python benchmarks/bench_workers.py [--workers 1 2 4] [--duration S] [--concurrency C]
+
+Starts ``uvicorn main:app --workers N`` for each N, drives the CPU-bound
+rule-based extraction endpoint (``POST /api/incidents/verify_fields``)
+from several client processes so the load generator is not the bottleneck,
+and reports requests/second and latency percentiles. No Canvas/Okta/LLM
+credentials are needed.
+"""
+import asyncio
+import multiprocessing
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+project_root = str(Path(__file__).resolve().parent.parent)
+
+PAYLOAD = {
+    "channel": "Round Outcome",
+    "Player ID": "PID-123",
+    "Player Name": "Bob",
+    "Casino ID": "CAS-003",
+    "Round ID": "RND-2",
+    "Event Date & Time": "2025-11-11 14:30:00",
+    "Game Name": "Blackjack",
+    "Some Other Field": "ignored",
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(workers: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ, WORKER_ENABLED="false")
+    cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(cmd, cwd=project_root, env=env)
+
+
+def _wait_ready(port: int, timeout: float = 30.0) -> None:
+    import httpx
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not become ready")
+
+
+async def _drive(url: str, duration: float, concurrency: int):
+    import httpx
+
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def _client(client):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                r = await client.post(url, json=PAYLOAD)
+                if r.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        await asyncio.gather(*(_client(client) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def _client_process(args):
+    url, duration, concurrency = args
+    return asyncio.run(_drive(url, duration, concurrency))
+
+
+def run(workers: int, duration: float, concurrency: int, clients: int) -> None:
+    port = _free_port()
+    server = _start_server(workers, port)
+    try:
+        _wait_ready(port)
+        url = f"http://127.0.0.1:{port}/api/incidents/verify_fields"
+        # warm up every worker's caches before measuring
+        _client_process((url, 1.0, concurrency))
+        with multiprocessing.Pool(clients) as pool:
+            results = pool.map(_client_process, [(url, duration, concurrency)] * clients)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    latencies = sorted(l for lat, _ in results for l in lat)
+    errors = sum(e for _, e in results)
+    if not latencies:
+        print(f"workers={workers}: no requests completed")
+        return
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"workers={workers}: {len(latencies) / duration:8.1f} req/s  p50 {p50:6.2f} ms  "
+          f"p99 {p99:6.2f} ms  errors {errors}")
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark throughput by server worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per run")
+    parser.add_argument("--concurrency", type=int, default=16, help="connections per client process")
+    parser.add_argument("--clients", type=int, default=min(4, os.cpu_count() or 1), help="client processes")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.clients} client processes x {args.concurrency} connections")
+    for workers in args.workers:
+        run(workers, args.duration, args.concurrency, args.clients)
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,7 @@ class Settings(BaseSettings):
     AZURE_OPENAI_ENDPOINT: str = ""
     AZURE_OPENAI_DEPLOYMENT_NAME: str = "gpt-4o"
     AZURE_OPENAI_API_VERSION: str = "2024-05-01-preview"
+    LLM_WARM_UP: bool = True  # build the LLM client in the background after startup instead of on first call
     
     # Okta / Canvas auth (for getting Bearer tokens when CANVAS_BEARER_TOKEN is not set)
     OKTA_TOKEN_URL: str = ""
@@ -29,9 +30,127 @@ class Settings(BaseSettings):
     OKTA_PASSWORD: str = ""
     OKTA_SCOPE: str = "openid roles"
     
+    # Parse Canvas list pages incrementally (ijson when installed) instead of buffering whole responses
+    CANVAS_STREAM_PARSE: bool = True
+    
+    # Triage pipeline (fetch -> detect/extract -> LLM)
+    PIPELINE_PAGE_SIZE: int = 100
+    PIPELINE_WORKERS: int = 4
+    PIPELINE_QUEUE_SIZE: int = 50
+    AGGREGATION_PAGE_SIZE: int = 1000  # aggregations $select a few fields, so pages can be larger
+    
+    # Incident export (CSV / Parquet / Arrow IPC; the latter two need pyarrow)
+    EXPORT_DIR: str = "data/exports"
+    EXPORT_PAGE_SIZE: int = 500
+    EXPORT_BATCH_ROWS: int = 5000  # rows buffered per written batch / Parquet row group
+    
+    # Extraction results store (sqlite | parquet | none); parquet uses RESULTS_SINK_PATH as a directory
+    RESULTS_SINK: str = "sqlite"
+    RESULTS_SINK_PATH: str = "data/results.sqlite3"
+    RESULTS_SINK_BATCH_SIZE: int = 200
+    RESULTS_SINK_FLUSH_SECONDS: float = 5.0
+    RESULTS_SINK_MAX_BUFFER: int = 50000  # rows kept for retry while the store is failing
+    
+    # Correlation index over extracted identifiers (in-process; refilled from the results store at startup)
+    CORRELATION_MAX_INCIDENTS: int = 100000
+    CORRELATION_WARM_START: bool = True
+    
+    # Near-duplicate detection (MinHash/LSH over summary + notes)
+    DEDUP_ENABLED: bool = True
+    DEDUP_THRESHOLD: float = 0.8
+    DEDUP_MAX_INCIDENTS: int = 50000
+    # duplicates whose notes carry the same identifiers reuse the canonical LLM extraction
+    DEDUP_REUSE_RESULTS: bool = False
+    
+    # Local full-text search (SQLite FTS5) over incident text, fed by worker polls, pipeline runs and sync
+    SEARCH_INDEX_ENABLED: bool = True
+    SEARCH_INDEX_PATH: str = "data/search.sqlite3"
+    SEARCH_SYNC_PAGE_SIZE: int = 500
+    SEARCH_RANK_WINDOW: int = 0  # >0: score only this many newest matches per query (bounds latency on common terms)
+    
+    # Learned ticket-type fallback for the detector (train with python -m services.ticket_classifier train)
+    TICKET_CLASSIFIER_ENABLED: bool = True
+    TICKET_CLASSIFIER_PATH: str = "data/ticket_classifier.bin"
+    TICKET_CLASSIFIER_MIN_CONFIDENCE: float = 0.9
+    
+    # Background triage worker (polls Canvas into a durable SQLite queue)
+    WORKER_ENABLED: bool = False
+    WORKER_SUPPORT_GROUPS: str = ""  # comma-separated support group names
+    WORKER_POLL_INTERVAL_SECONDS: float = 60.0
+    WORKER_CONCURRENCY: int = 4
+    WORKER_MAX_ATTEMPTS: int = 5
+    WORKER_RETRY_BACKOFF_SECONDS: float = 30.0
+    WORKER_LEASE_SECONDS: float = 1800.0  # a job processing this long is presumed abandoned and retried
+    WORKER_QUEUE_PATH: str = "data/triage_queue.sqlite3"
+    
+    # Tracing: "none" (no-op), "local" (in-process span trees) or "otel"
+    TRACING_BACKEND: str = "none"
+    TRACING_SLOW_REQUEST_MS: float = 5000.0
+    TRACING_SLOW_TRACE_BUFFER: int = 50
+    
+    # Per-request profiling (X-Profile header / __profile query flag / sampling)
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str = ""  # required value of the header/flag; on-demand profiling is off while empty
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_MODE: str = "auto"  # auto | cprofile | sample
+    PROFILING_SAMPLE_INTERVAL_MS: float = 5.0
+    PROFILING_PATH_PREFIXES: str = "/api/"
+    PROFILING_DIR: str = "data/profiles"
+    PROFILING_MAX_FILES: int = 200
+    
+    # Upstream resilience (rate limit, adaptive concurrency, circuit breaker, retries)
+    RESILIENCE_ENABLED: bool = True
+    RESILIENCE_MAX_RETRIES: int = 3
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    BREAKER_RECOVERY_SECONDS: float = 30.0
+    CANVAS_RATE_LIMIT: float = 20.0  # requests per second
+    CANVAS_MAX_CONCURRENCY: int = 16
+    CANVAS_LATENCY_TARGET_S: float = 5.0
+    OKTA_RATE_LIMIT: float = 2.0
+    OKTA_MAX_CONCURRENCY: int = 2
+    OKTA_LATENCY_TARGET_S: float = 5.0
+    LLM_RATE_LIMIT: float = 5.0
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_LATENCY_TARGET_S: float = 20.0
+    
+    # LLM model routing: short / form-structured notes go to OPENAI_MODEL (an Azure deployment name),
+    # escalated to the deployment on bad output or a failed call
+    LLM_ROUTING_ENABLED: bool = False
+    LLM_ROUTING_SHORT_NOTES_CHARS: int = 600
+    LLM_ROUTING_MAX_SMALL_NOTES_CHARS: int = 8000
+    LLM_ROUTING_MIN_FORM_LABELS: int = 3  # "Round ID:", "Casino ID:", ... lines that make notes structured
+    LLM_PRICES: str = "gpt-4o=2.50/10.00,gpt-4o-mini=0.15/0.60"  # deployment=USD per 1M input/output tokens
+    
+    # Packed LLM extraction for batches: several short incidents' notes in one request
+    LLM_PACK_ENABLED: bool = True
+    LLM_PACK_MAX_INCIDENTS: int = 8
+    LLM_PACK_MAX_TOKENS: int = 3000  # estimated notes tokens per packed request
+    LLM_PACK_MAX_NOTES_CHARS: int = 2000  # longer notes are extracted on their own
+    LLM_PACK_CONCURRENCY: int = 4  # packed/single calls in flight per batch (the scheduler still applies)
+    
+    # Streamed extraction: token usage (and so cost) of streamed calls needs AZURE_OPENAI_API_VERSION >= 2024-09-01-preview
+    LLM_STREAM_INCLUDE_USAGE: bool = False
+    
+    # LLM scheduler: priority class (priority/severity/slmStatus) + weighted fair queuing across support groups
+    LLM_SCHEDULER_ENABLED: bool = True
+    LLM_SCHEDULER_MAX_CONCURRENCY: int = 8  # also capped by the upstream's current adaptive limit
+    LLM_SCHEDULER_AGING_SECONDS: float = 60.0  # waiting this long promotes a call one priority class
+    LLM_SCHEDULER_GROUP_WEIGHTS: str = ""  # e.g. "Gaming Services=3,Payments=1"; unlisted groups weigh 1
+    
+    # Shared cache (memory | sqlite | shm | redis) for tokens, Canvas responses and LLM results
+    CACHE_BACKEND: str = "memory"
+    CACHE_SQLITE_PATH: str = "data/shared_cache.sqlite3"
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_MEMORY_MAX_ENTRIES: int = 10000  # memory backend: least recently used entries are evicted beyond this
+    CACHE_MEMORY_MAX_BYTES: int = 64 * 1024 * 1024  # memory backend: total size of cached values
+    CANVAS_CACHE_TTL_SECONDS: float = 15.0  # only with a shared CACHE_BACKEND; 0 disables Canvas response caching
+    LLM_CACHE_TTL_SECONDS: float = 86400.0  # 0 disables LLM result caching
+    
     # Server Configuration
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    SERVER_MODE: str = "dev"  # dev (single process, reload) | prod (multi-worker)
+    WEB_CONCURRENCY: int = 1  # worker processes in prod mode
     
     class Config:
         env_file = ".env"
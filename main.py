@@ -1,16 +1,46 @@
 """
 FastAPI Server for Canvas Queue API Integration
 """
+import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from config.settings import settings
-from routes import incidents, extraction
+from routes import incidents, extraction, pipeline, worker, profiling, aggregations, exports, results, correlation, search
+from services import triage_worker, extractor_registry, llm_service, results_sink, search_index, ticket_classifier
+from services.correlation import warm_from_results
+from utils.metrics import REGISTRY, MetricsMiddleware
+from utils.tracing import SLOW_TRACES, CorrelationIdMiddleware
+from utils.profiling import ProfilingMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background services"""
+    # heavy clients are built here or on first use, never at import time
+    extractor_registry.warm_up()
+    ticket_classifier.warm_up()
+    if settings.LLM_WARM_UP and settings.AZURE_OPENAI_API_KEY:
+        # importing openai is slow; do it off the event loop so startup isn't delayed
+        threading.Thread(target=llm_service.get_client, name="llm-warm-up", daemon=True).start()
+    if settings.CORRELATION_WARM_START:
+        threading.Thread(target=warm_from_results, name="correlation-warm-up", daemon=True).start()
+    if settings.WORKER_ENABLED:
+        triage_worker.start_worker()
+    yield
+    await triage_worker.stop_worker()
+    # write out buffered extraction results
+    results_sink.close_sink()
+    search_index.close_index()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Canvas Queue API Integration",
     description="FastAPI server to interact with Canvas Queue API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -22,9 +52,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Track in-flight requests and per-route latency for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Profile selected requests (PROFILING_ENABLED + X-Profile header / sampling)
+app.add_middleware(ProfilingMiddleware, router=app.router)
+
+# Assign a correlation ID (and a root span when tracing is enabled) to each request
+app.add_middleware(CorrelationIdMiddleware)
+
 # Include routers
 app.include_router(incidents.router, prefix="/api", tags=["incidents"])
 app.include_router(extraction.router, prefix="/api", tags=["extraction"])
+app.include_router(pipeline.router, prefix="/api", tags=["pipeline"])
+app.include_router(worker.router, prefix="/api", tags=["worker"])
+app.include_router(aggregations.router, prefix="/api", tags=["aggregations"])
+app.include_router(exports.router, prefix="/api", tags=["exports"])
+app.include_router(results.router, prefix="/api", tags=["results"])
+app.include_router(correlation.router, prefix="/api", tags=["correlation"])
+app.include_router(search.router, prefix="/api", tags=["search"])
+if settings.PROFILING_ENABLED:
+    app.include_router(profiling.router, tags=["debug"])
 # app.include_router(extraction.router)
 
 
@@ -42,11 +90,40 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of in-process metrics"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/debug/traces/slow")
+async def slow_traces():
+    """Span trees of recent slow requests (TRACING_BACKEND=local)"""
+    return {"traces": list(SLOW_TRACES)}
+
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    uvicorn.run(
-        "main:app",
-        host=settings.HOST,
-        port=settings.PORT,
-        reload=True
-    )
+
+    parser = argparse.ArgumentParser(description="Run the Canvas Queue API server")
+    parser.add_argument("--prod", action="store_true", default=settings.SERVER_MODE == "prod",
+                        help="multi-worker production mode (no reload)")
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY,
+                        help="worker processes in production mode")
+    args = parser.parse_args()
+
+    if args.prod:
+        # each worker is a separate process; set CACHE_BACKEND=sqlite/shm/redis to share caches
+        uvicorn.run(
+            "main:app",
+            host=settings.HOST,
+            port=settings.PORT,
+            workers=max(1, args.workers),
+            reload=False
+        )
+    else:
+        uvicorn.run(
+            "main:app",
+            host=settings.HOST,
+            port=settings.PORT,
+            reload=True
+        )
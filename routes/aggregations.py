@@ -0,0 +1,52 @@
+"""
+Incident aggregation routes (counts and SLA breaches computed server-side)
+"""
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from services.aggregation import GROUPABLE_FIELDS, CountBy, SlaBreaches, aggregate
+
+router = APIRouter()
+
+_SOURCE_PATTERN = "^(auto|canvas|local)$"
+
+
+@router.get("/aggregations/incidents")
+async def get_incident_counts(
+    support_group: Optional[str] = Query(None, description="Filter by support group name"),
+    active_only: bool = Query(False, description="Only count active incidents"),
+    group_by: str = Query("status,priority,severity", description=f"Comma-separated fields: {', '.join(GROUPABLE_FIELDS)}"),
+    top: Optional[int] = Query(None, description="Stop after this many incidents", ge=1),
+    source: str = Query("auto", pattern=_SOURCE_PATTERN, description="auto, canvas or local (worker store)")
+):
+    """
+    Incident counts per value of each `group_by` field.
+
+    Canvas pages are streamed with a `$select` of just the grouped fields and
+    folded into counters, so memory does not grow with the number of incidents.
+    """
+    fields = [f.strip() for f in group_by.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in GROUPABLE_FIELDS]
+    if not fields or unknown:
+        raise HTTPException(status_code=400, detail=f"Unsupported group_by fields: {unknown or group_by!r}")
+    try:
+        return await aggregate({f: CountBy(f) for f in fields}, support_group=support_group,
+                               active_only=active_only, limit=top, source=source)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/aggregations/sla-breaches")
+async def get_sla_breaches(
+    support_group: Optional[str] = Query(None, description="Filter by support group name"),
+    active_only: bool = Query(True, description="Only count active incidents"),
+    top: Optional[int] = Query(None, description="Stop after this many incidents", ge=1),
+    source: str = Query("auto", pattern=_SOURCE_PATTERN, description="auto, canvas or local (worker store)")
+):
+    """Per support group: incidents, SLA breaches (`slmStatus`) and breach rate"""
+    try:
+        return await aggregate({"sla": SlaBreaches()}, support_group=support_group,
+                               active_only=active_only, limit=top, source=source)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
@@ -0,0 +1,52 @@
+"""
+Correlation routes: incidents sharing extracted identifiers (Round ID, Casino ID, Player ID, MID, game)
+"""
+from fastapi import APIRouter, HTTPException, Query
+
+from services.correlation import KINDS, get_index
+
+router = APIRouter()
+
+_KIND_PATTERN = f"^({'|'.join(KINDS)})$"
+
+
+@router.get("/correlation/incidents/{incident_id}/related")
+def get_related_incidents(
+    incident_id: str,
+    top: int = Query(100, description="Number of related incidents to return", ge=1, le=10000),
+):
+    """
+    Incidents sharing at least one extracted identifier with `incident_id`,
+    those sharing the most identifiers first.
+    """
+    related = get_index().related(incident_id, limit=top)
+    if related is None:
+        raise HTTPException(status_code=404, detail=f"Incident {incident_id} has no indexed identifiers")
+    return related
+
+
+@router.get("/correlation/lookup")
+def lookup_identifier(
+    kind: str = Query(..., pattern=_KIND_PATTERN, description=f"Identifier kind: {', '.join(KINDS)}"),
+    value: str = Query(..., description="Identifier value, e.g. a Round ID"),
+    top: int = Query(100, description="Number of incidents to return", ge=1, le=10000),
+):
+    """Incidents whose extracted `kind` identifier equals `value`, newest first"""
+    total, incidents = get_index().lookup(kind, value, limit=top)
+    return {"kind": kind, "value": value, "count": total, "incidents": incidents}
+
+
+@router.get("/correlation/top")
+def top_offenders(
+    kind: str = Query("casino_id", pattern=_KIND_PATTERN, description=f"Identifier kind: {', '.join(KINDS)}"),
+    top: int = Query(10, description="Number of values to return", ge=1, le=1000),
+    min_count: int = Query(2, description="Only values shared by at least this many incidents", ge=1),
+):
+    """Identifier values shared by the most incidents (e.g. casinos with many stuck rounds)"""
+    return {"kind": kind, "value": get_index().top(kind, top, min_count)}
+
+
+@router.get("/correlation/stats")
+def correlation_stats():
+    """Indexed incidents and distinct identifiers per kind"""
+    return get_index().stats()
@@ -0,0 +1,70 @@
+"""
+Incident export routes: background export jobs with a download handle
+"""
+import os
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse
+
+from services.export import FORMATS, get_export, list_exports, start_export
+
+router = APIRouter()
+
+_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+
+@router.post("/exports", status_code=202)
+async def start_incident_export(
+    format: str = Query("csv", description=f"Output format: {', '.join(FORMATS)}"),
+    support_group: Optional[str] = Query(None, description="Filter by support group name"),
+    active_only: bool = Query(False, description="Only export active incidents"),
+    select: Optional[str] = Query(None, description="Comma-separated incident fields (default: all)"),
+    limit: Optional[int] = Query(None, description="Maximum number of incidents to export", ge=1),
+):
+    """
+    Start a streaming export of incidents in the background.
+
+    Poll `GET /exports/{job_id}`; once `status` is `completed` the file is
+    available from the `download` URL.
+    """
+    fields = [s.strip() for s in select.split(",") if s.strip()] if select else None
+    try:
+        job = start_export(format, support_group=support_group, active_only=active_only, select=fields, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        # optional dependency (pyarrow) missing
+        raise HTTPException(status_code=501, detail=str(e))
+    return job.summary()
+
+
+@router.get("/exports")
+async def list_incident_exports():
+    """List known export jobs"""
+    return {"jobs": [job.summary() for job in list_exports()]}
+
+
+@router.get("/exports/{job_id}")
+async def get_incident_export(job_id: str):
+    """Status, progress and download handle of an export job"""
+    job = get_export(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Export job {job_id} not found")
+    return job.summary()
+
+
+@router.get("/exports/{job_id}/download")
+async def download_incident_export(job_id: str):
+    """Download the file of a completed export job"""
+    job = get_export(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Export job {job_id} not found")
+    if job.status != "completed" or not os.path.isfile(job.path):
+        raise HTTPException(status_code=409, detail=f"Export job {job_id} is {job.status}")
+    filename = f"incidents-{job.support_group or 'all'}{FORMATS[job.format]}".replace(" ", "_")
+    return FileResponse(job.path, media_type=_MEDIA_TYPES[job.format], filename=filename)
@@ -7,10 +7,16 @@ JSON into typed ticket payloads.
 """
 LLM extraction routes
 """
+import json
 import logging
-from services.llm_service import process_incident, is_llm_available
+from config.settings import settings
+from services.llm_service import (
+    flatten_extraction, is_llm_available, process_incident, process_incidents, stream_notes_with_llm,
+)
+from services import correlation, llm_routing, llm_scheduler, results_sink
 from fastapi import APIRouter, HTTPException, Body
-from typing import Any, Dict
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, List
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +38,18 @@ def extraction_health_check():
     }
 
 
+@router.get("/llm/scheduler")
+def llm_scheduler_stats():
+    """LLM scheduler queue depth, capacity and recent queue waits per priority class"""
+    return {"enabled": settings.LLM_SCHEDULER_ENABLED, **llm_scheduler.get_scheduler().stats()}
+
+
+@router.get("/llm/routing")
+def llm_routing_stats():
+    """Extractions per model route with latency, cost and escalation rate"""
+    return llm_routing.STATS.snapshot()
+
+
 # Extract structured data from incident JSON
 @router.post("/extract_Structured_Data_LLM")
 def extract_from_json(incident_data: Dict[str, Any]):
@@ -46,6 +64,9 @@ def extract_from_json(incident_data: Dict[str, Any]):
     try:
         logger.info(f"Processing incident: {incident_data.get('id', 'Unknown')}")
         extracted_data = process_incident(incident_data)
+        results_sink.record(results_sink.make_row(
+            incident_data.get("id"), incident_data.get("assignedGroup"), "api", llm_fields=extracted_data))
+        correlation.observe(incident_data.get("id"), incident_data.get("assignedGroup"), llm_fields=extracted_data)
         
         return {
             "success": True,
@@ -64,6 +85,81 @@ def extract_from_json(incident_data: Dict[str, Any]):
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
 
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/extract_Structured_Data_LLM/stream")
+def stream_extract_from_json(incident_data: Dict[str, Any]):
+    """
+    Extract structured data from incident JSON as Server-Sent Events.
+
+    `field` events (`{"name", "value"}`) arrive as soon as the streamed LLM
+    answer completes each extracted field; `escalated` means the fields that
+    follow come from the larger model and replace earlier ones. The last
+    event is `result` (the same data as `/extract_Structured_Data_LLM`) or
+    `error` (`{"status_code", "detail"}`).
+    """
+    if not is_llm_available():
+        raise HTTPException(
+            status_code=503,
+            detail="LLM service not available. Configure OPENAI_API_KEY in .env"
+        )
+    notes_content = incident_data.get("notes", "")
+    if not notes_content:
+        raise HTTPException(status_code=400, detail="Invalid input: Incident data is missing the 'notes' field.")
+
+    def _events():
+        try:
+            for event, data in stream_notes_with_llm(notes_content, incident_data):
+                if event == "result":
+                    data = flatten_extraction(incident_data, data)
+                    results_sink.record(results_sink.make_row(
+                        incident_data.get("id"), incident_data.get("assignedGroup"), "api", llm_fields=data))
+                    correlation.observe(incident_data.get("id"), incident_data.get("assignedGroup"), llm_fields=data)
+                yield _sse(event, data)
+        except ConnectionError as e:
+            yield _sse("error", {"status_code": 503, "detail": f"LLM service error: {str(e)}"})
+        except RuntimeError as e:
+            yield _sse("error", {"status_code": 500, "detail": f"LLM processing error: {str(e)}"})
+        except Exception as e:
+            logger.error(f"Unexpected error: {str(e)}")
+            yield _sse("error", {"status_code": 500, "detail": f"Unexpected error: {str(e)}"})
+
+    # no-cache / no proxy buffering so each event reaches the browser when it is written
+    return StreamingResponse(_events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.post("/extract_Structured_Data_LLM/batch")
+def extract_batch_from_json(incidents: List[Dict[str, Any]] = Body(..., max_length=500)):
+    """Extract structured data from many incidents, packing short notes several to an LLM request"""
+
+    if not is_llm_available():
+        raise HTTPException(
+            status_code=503,
+            detail="LLM service not available. Configure OPENAI_API_KEY in .env"
+        )
+
+    try:
+        logger.info(f"Processing batch of {len(incidents)} incidents")
+        results = process_incidents(incidents)
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=f"LLM service error: {str(e)}")
+    for incident_data, result in zip(incidents, results):
+        if result["success"]:
+            results_sink.record(results_sink.make_row(
+                incident_data.get("id"), incident_data.get("assignedGroup"), "api", llm_fields=result["data"]))
+            correlation.observe(incident_data.get("id"), incident_data.get("assignedGroup"), llm_fields=result["data"])
+
+    failed = sum(1 for result in results if not result["success"])
+    return {
+        "success": failed == 0,
+        "message": f"Extracted {len(results) - failed} of {len(results)} incidents",
+        "data": results
+    }
+
+
 
 @router.post("/incidents/verify_fields")
 async def extract_incident_fields(payload: Dict[str, Any] = Body(..., description="Raw incident data as a JSON object")):
@@ -76,7 +172,11 @@ async def extract_incident_fields(payload: Dict[str, Any] = Body(..., descriptio
         from services.extraction_service import ExtractionService
 
         svc = ExtractionService()
-        return svc.extract(payload)
+        result = svc.extract(payload)
+        results_sink.record(results_sink.make_row(
+            payload.get("id"), payload.get("assignedGroup"), "api", rules=result))
+        correlation.observe(payload.get("id"), payload.get("assignedGroup"), rules=result)
+        return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Extraction failed: {str(e)}")
 
@@ -1,37 +1,61 @@
 """
 API routes for incident management
 """
+import asyncio
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional, List
-import httpx
 from config.settings import settings
-from utils.auth import get_auth_headers
 from models.incident import IncidentListResponse, Incident, SupportGroupListResponse
+from services.canvas_client import make_canvas_request as _make_canvas_request
+from services.odata import and_, build_query, eq, in_, or_
+from services.aggregation import DistinctValues, aggregate
+from services import dedup
 
 router = APIRouter()
 
+_GROUP_DUPLICATES_HELP = "Mark near-duplicate incidents (similar summary/notes) with `duplicate_of`"
+
+# text the duplicate detector compares
+_DEDUP_FIELDS = ("summary", "notes")
+
+
+async def _fetch_incidents(url: str, query_params: dict, group_duplicates: bool = False):
+    """Fetch an incident list; with `group_duplicates`, annotate near-duplicates with `duplicate_of`."""
+    if not group_duplicates:
+        return await _make_canvas_request(url, query_params)
+    # the detector needs summary and notes; fetch them if $select left them out and drop them again
+    added = []
+    if query_params.get("$select"):
+        selected = query_params["$select"].split(",")
+        added = [f for f in _DEDUP_FIELDS if f not in selected]
+        query_params = {**query_params, "$select": ",".join(selected + added)}
+    data = await _make_canvas_request(url, query_params)
+    # hashing a page of notes is CPU work; keep it off the event loop
+    loop = asyncio.get_running_loop()
+    incidents = await loop.run_in_executor(None, _mark_duplicates, data.get("value", []), added)
+    return {**data, "value": incidents}
 
-# Helper function to make Canvas API requests
-async def _make_canvas_request(url: str, params: dict = None):
-    """Helper function to make requests to Canvas API with error handling"""
-    headers = get_auth_headers()
-    
-    try:
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.get(url, headers=headers, params=params, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(status_code=e.response.status_code, detail=f"Canvas API error: {e.response.text}")
-    except httpx.RequestError as e:
-        raise HTTPException(status_code=503, detail=f"Failed to connect to Canvas API: {str(e)}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+def _mark_duplicates(incidents: List[dict], drop_fields: List[str]) -> List[dict]:
+    marked = []
+    for incident in incidents:
+        incident = dict(incident)
+        # incidents without text can still belong to a group indexed earlier
+        canonical = dedup.observe(incident) if dedup.incident_text(incident) else None
+        if canonical is None and incident.get("id") is not None:
+            group = dedup.get_index().canonical(str(incident["id"]))
+            canonical = group if group != str(incident["id"]) else None
+        incident["duplicate_of"] = canonical
+        for field in drop_fields:
+            incident.pop(field, None)
+        marked.append(incident)
+    return marked
 
 
 @router.get("/incidents/all-by-support-group", response_model=IncidentListResponse)
 async def get_all_incidents_by_support_group_basic(
-    support_group_name: str = Query(..., description="Name of the support group to filter by")
+    support_group_name: str = Query(..., description="Name of the support group to filter by"),
+    group_duplicates: bool = Query(False, description=_GROUP_DUPLICATES_HELP)
 ):
     """
     1. Get All Incidents by Support Group (Basic)
@@ -41,12 +65,10 @@ async def get_all_incidents_by_support_group_basic(
     
     - **support_group_name**: The name of the support group (e.g., 'Gaming Services')
     """
-    query_params = {
-        "$filter": f"assignedGroup eq '{support_group_name}'"
-    }
+    query_params = build_query(filter=eq("assignedGroup", support_group_name))
     
     url = f"{settings.CANVAS_API_BASE_URL}/incidents"
-    return await _make_canvas_request(url, query_params)
+    return await _fetch_incidents(url, query_params, group_duplicates)
 
 
 # @router.get("/incidents/key-fields", response_model=IncidentListResponse)
@@ -94,7 +116,8 @@ async def get_all_incidents_by_support_group_basic(
 
 @router.get("/incidents/active-only", response_model=IncidentListResponse)
 async def get_active_incidents_only(
-    support_group_name: str = Query(..., description="Name of the support group to filter by")
+    support_group_name: str = Query(..., description="Name of the support group to filter by"),
+    group_duplicates: bool = Query(False, description=_GROUP_DUPLICATES_HELP)
 ):
     """
     4. Get Active Incidents Only
@@ -103,13 +126,13 @@ async def get_active_incidents_only(
     
     - **support_group_name**: The name of the support group
     """
-    query_params = {
-        "$filter": f"assignedGroup eq '{support_group_name}' and isActive eq true",
-        "$select": "id,summary,status,severity,assignedGroup,assignee,isActive,created"
-    }
+    query_params = build_query(
+        filter=and_(eq("assignedGroup", support_group_name), eq("isActive", True)),
+        select="id,summary,status,severity,assignedGroup,assignee,isActive,created"
+    )
     
     url = f"{settings.CANVAS_API_BASE_URL}/incidents"
-    return await _make_canvas_request(url, query_params)
+    return await _fetch_incidents(url, query_params, group_duplicates)
 
 
 # @router.get("/incidents/paginated", response_model=IncidentListResponse)
@@ -161,7 +184,8 @@ async def get_active_incidents_only(
 
 @router.get("/incidents/high-priority", response_model=IncidentListResponse)
 async def get_high_priority_incidents(
-    support_group_name: str = Query(..., description="Name of the support group to filter by")
+    support_group_name: str = Query(..., description="Name of the support group to filter by"),
+    group_duplicates: bool = Query(False, description=_GROUP_DUPLICATES_HELP)
 ):
     """
     7. Get High Priority Incidents
@@ -171,13 +195,16 @@ async def get_high_priority_incidents(
     
     - **support_group_name**: The name of the support group
     """
-    query_params = {
-        "$filter": f"assignedGroup eq '{support_group_name}' and (priority eq 'High' or priority eq 'Critical' or severity eq 'Severity A' or severity eq 'Severity B')",
-        "$select": "id,summary,status,priority,severity,assignedGroup,created"
-    }
+    query_params = build_query(
+        filter=and_(
+            eq("assignedGroup", support_group_name),
+            or_(in_("priority", ["High", "Critical"]), in_("severity", ["Severity A", "Severity B"])),
+        ),
+        select="id,summary,status,priority,severity,assignedGroup,created"
+    )
     
     url = f"{settings.CANVAS_API_BASE_URL}/incidents"
-    return await _make_canvas_request(url, query_params)
+    return await _fetch_incidents(url, query_params, group_duplicates)
 
 
 # @router.get("/incidents/{incident_id}", response_model=Incident)
@@ -199,6 +226,19 @@ async def get_high_priority_incidents(
 #         raise
 
 
+@router.get("/incidents/{incident_id}/duplicates")
+async def get_incident_duplicates(incident_id: str):
+    """
+    Near-duplicate group of an incident seen by the duplicate detector
+    (listings with `group_duplicates`, pipeline and worker extractions).
+    """
+    members = dedup.get_index().group(incident_id)
+    if not members:
+        raise HTTPException(status_code=404, detail=f"Incident {incident_id} has not been seen by the duplicate detector")
+    return {"incident_id": incident_id, "canonical": members[0], "group": members,
+            "stats": dedup.get_index().stats()}
+
+
 @router.get("/support-groups/all", response_model=SupportGroupListResponse)
 async def get_all_available_support_groups():
     """
@@ -224,21 +264,14 @@ async def get_unique_support_groups_from_incidents(
     
     - **top**: Number of incidents to retrieve for analysis (default: 1000)
     """
-    query_params = {
-        "$select": "assignedGroup",
-        "$top": top
-    }
-    
-    url = f"{settings.CANVAS_API_BASE_URL}/incidents"
-    data = await _make_canvas_request(url, query_params)
-    
-    # Extract unique support groups
-    unique_groups = list(set([incident.get("assignedGroup") for incident in data.get("value", []) if incident.get("assignedGroup")]))
+    # Stream pages and fold them into a set instead of materializing every incident
+    result = await aggregate({"groups": DistinctValues("assignedGroup")}, limit=top, source="canvas")
+    unique_groups = result["aggregations"]["groups"]
     
     return {
-        "unique_support_groups": sorted(unique_groups),
+        "unique_support_groups": unique_groups,
         "count": len(unique_groups),
-        "total_incidents_checked": len(data.get("value", []))
+        "total_incidents_checked": result["incidents"]
     }
 
 
@@ -254,7 +287,8 @@ async def get_incidents_custom(
     skip: Optional[int] = Query(None, description="Skip number of results", ge=0),
     orderby: Optional[str] = Query(None, description="Order by field (e.g., 'created desc')"),
     count: Optional[bool] = Query(None, description="Include count in response"),
-    select: Optional[str] = Query(None, description="Comma-separated list of fields to select")
+    select: Optional[str] = Query(None, description="Comma-separated list of fields to select"),
+    group_duplicates: bool = Query(False, description=_GROUP_DUPLICATES_HELP)
 ):
     """
     Custom Flexible Query Endpoint
@@ -272,44 +306,23 @@ async def get_incidents_custom(
     - **orderby**: Sort results (e.g., 'created desc', 'priority asc')
     - **count**: Include total count in response
     - **select**: Specific fields to return (e.g., 'id,summary,status')
+    - **group_duplicates**: Mark near-duplicate incidents with `duplicate_of`
     """
-    query_params = {}
-    filter_parts = []
-    
-    # Build filter expression
-    if support_group:
-        filter_parts.append(f"assignedGroup eq '{support_group}'")
-    
-    if is_active is not None:
-        filter_parts.append(f"isActive eq {str(is_active).lower()}")
-    
-    if priority:
-        filter_parts.append(f"priority eq '{priority}'")
-    
-    if severity:
-        filter_parts.append(f"severity eq '{severity}'")
+    # Build filter expression (values are escaped; equal queries render identically)
+    filter_expr = and_(
+        eq("assignedGroup", support_group) if support_group else None,
+        eq("isActive", is_active) if is_active is not None else None,
+        eq("priority", priority) if priority else None,
+        eq("severity", severity) if severity else None,
+        eq("status", status) if status else None,
+    )
     
-    if status:
-        filter_parts.append(f"status eq '{status}'")
-    
-    if filter_parts:
-        query_params["$filter"] = " and ".join(filter_parts)
-    
-    # Add other OData parameters
-    if top is not None:
-        query_params["$top"] = top
-    
-    if skip is not None:
-        query_params["$skip"] = skip
-    
-    if orderby:
-        query_params["$orderby"] = orderby
-    
-    if count:
-        query_params["$count"] = "true"
-    
-    if select:
-        query_params["$select"] = select
+    try:
+        query_params = build_query(
+            filter=filter_expr, select=select, orderby=orderby, top=top, skip=skip, count=count
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     url = f"{settings.CANVAS_API_BASE_URL}/incidents"
-    return await _make_canvas_request(url, query_params)
+    return await _fetch_incidents(url, query_params, group_duplicates)
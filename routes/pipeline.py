@@ -0,0 +1,82 @@
+"""
+Triage pipeline routes: fetch -> detect -> extract -> validate in one call
+"""
+import json
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from services.triage_pipeline import TriagePipeline, get_job, list_jobs, start_job
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/pipeline/triage/stream")
+async def stream_triage(
+    support_group_name: str = Query(..., description="Name of the support group to triage"),
+    active_only: bool = Query(True, description="Only triage active incidents"),
+    limit: Optional[int] = Query(None, description="Maximum number of incidents to process", ge=1),
+    use_llm: bool = Query(True, description="Run LLM extraction alongside the rule-based extractor"),
+):
+    """
+    Stream enriched triage results for a support group as NDJSON.
+
+    Each line is `{"event": "result", "data": {...}}`; the last line is
+    `{"event": "summary", "data": <pipeline metrics>}` (or `"error"`).
+    """
+    pipeline = TriagePipeline(support_group_name, active_only=active_only, limit=limit, use_llm=use_llm)
+
+    async def _lines():
+        try:
+            async for result in pipeline.run():
+                yield json.dumps({"event": "result", "data": result}, default=str) + "\n"
+        except HTTPException as e:
+            yield json.dumps({"event": "error", "data": {"status_code": e.status_code, "detail": e.detail}}) + "\n"
+        except Exception as e:
+            logger.error(f"Triage stream failed: {e}")
+            yield json.dumps({"event": "error", "data": {"status_code": 500, "detail": str(e)}}) + "\n"
+        yield json.dumps({"event": "summary", "data": pipeline.metrics()}) + "\n"
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+
+@router.post("/pipeline/triage/jobs")
+async def start_triage_job(
+    support_group_name: str = Query(..., description="Name of the support group to triage"),
+    active_only: bool = Query(True, description="Only triage active incidents"),
+    limit: Optional[int] = Query(None, description="Maximum number of incidents to process", ge=1),
+    use_llm: bool = Query(True, description="Run LLM extraction alongside the rule-based extractor"),
+):
+    """Start a triage pipeline in the background and return its job id."""
+    pipeline = TriagePipeline(support_group_name, active_only=active_only, limit=limit, use_llm=use_llm)
+    job = start_job(pipeline)
+    return job.summary()
+
+
+@router.get("/pipeline/triage/jobs")
+async def list_triage_jobs():
+    """List known triage jobs with their status and metrics."""
+    return {"jobs": [job.summary() for job in list_jobs()]}
+
+
+@router.get("/pipeline/triage/jobs/{job_id}")
+async def get_triage_job(
+    job_id: str,
+    include_results: bool = Query(True, description="Include collected results"),
+    skip: int = Query(0, description="Skip number of results", ge=0),
+    top: Optional[int] = Query(None, description="Limit number of results", ge=1),
+):
+    """Return status, metrics and (optionally) results of a triage job."""
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Triage job {job_id} not found")
+
+    body = job.summary()
+    if include_results:
+        end = None if top is None else skip + top
+        body["results"] = job.results[skip:end]
+    return body
@@ -0,0 +1,46 @@
+"""
+Retrieval routes for stored request profiles
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from utils.profiling import get_profile, list_profiles, render_text, token_matches
+
+router = APIRouter()
+
+
+def _check_token(x_profile: Optional[str]) -> None:
+    if not token_matches(x_profile):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Profile token")
+
+
+@router.get("/debug/profiles")
+async def get_profiles(x_profile: Optional[str] = Header(None)):
+    """List stored profiles, newest first"""
+    _check_token(x_profile)
+    return {"profiles": list_profiles()}
+
+
+@router.get("/debug/profiles/{profile_id}")
+async def get_profile_data(
+    profile_id: str,
+    format: str = Query("raw", description="'raw' (.prof / folded stacks) or 'text' summary"),
+    limit: int = Query(50, description="Rows in the text summary", ge=1, le=1000),
+    x_profile: Optional[str] = Header(None)
+):
+    """
+    Download a stored profile.
+
+    - **raw**: the pstats `.prof` file (open with `snakeviz` / `pstats`) or
+      the folded stacks file (feed to `flamegraph.pl` / speedscope)
+    - **text**: top functions by cumulative time, or the hottest stacks
+    """
+    _check_token(x_profile)
+    meta = get_profile(profile_id)
+    if not meta:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    if format == "text":
+        return PlainTextResponse(render_text(meta, limit))
+    return FileResponse(meta["path"], filename=meta["file"], media_type="application/octet-stream")
@@ -0,0 +1,59 @@
+"""
+Stored extraction results: query past rule/LLM extractions without re-running them
+"""
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from services.results_sink import get_sink
+
+router = APIRouter()
+
+_DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
+
+
+def _require_sink():
+    try:
+        sink = get_sink()
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    if sink is None:
+        raise HTTPException(status_code=503, detail="Results sink disabled. Set RESULTS_SINK in .env")
+    return sink
+
+
+@router.get("/results")
+def query_results(
+    incident_id: Optional[str] = Query(None, description="Filter by incident ID"),
+    support_group: Optional[str] = Query(None, description="Filter by support group name"),
+    ticket_type: Optional[str] = Query(None, description="Filter by detected ticket type"),
+    source: Optional[str] = Query(None, description="Filter by source (api, pipeline, worker)"),
+    since: Optional[str] = Query(None, pattern=_DATE_PATTERN, description="First date (UTC, YYYY-MM-DD)"),
+    until: Optional[str] = Query(None, pattern=_DATE_PATTERN, description="Last date (UTC, YYYY-MM-DD)"),
+    top: int = Query(100, description="Number of results to return", ge=1, le=10000),
+    skip: int = Query(0, description="Number of results to skip", ge=0),
+):
+    """Stored extraction results, newest first"""
+    sink = _require_sink()
+    # include rows still waiting in the write buffer
+    sink.flush()
+    filters = {k: v for k, v in (("incident_id", incident_id), ("support_group", support_group),
+                                 ("ticket_type", ticket_type), ("source", source)) if v is not None}
+    return {"value": sink.store.query(filters, since, until, top, skip)}
+
+
+@router.get("/results/summary")
+def results_summary(
+    since: Optional[str] = Query(None, pattern=_DATE_PATTERN, description="First date (UTC, YYYY-MM-DD)"),
+    until: Optional[str] = Query(None, pattern=_DATE_PATTERN, description="Last date (UTC, YYYY-MM-DD)"),
+):
+    """Result counts per support group and ticket type, with rule successes and LLM outcomes"""
+    sink = _require_sink()
+    sink.flush()
+    return {
+        "value": sink.store.summary(since, until),
+        "written": sink.written,
+        "pending": sink.pending(),
+        "write_errors": sink.write_errors,
+        "dropped": sink.dropped,
+    }
@@ -0,0 +1,70 @@
+"""
+Full-text search over locally indexed incidents (summary, notes, resolution notes, extracted fields)
+"""
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from services import search_index
+
+router = APIRouter()
+
+
+def _require_index():
+    index = search_index.get_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Search index disabled. Set SEARCH_INDEX_ENABLED in .env")
+    return index
+
+
+@router.get("/search")
+def search_incidents(
+    q: str = Query(..., min_length=1, description="Words to search for (all must match; `word*` for a prefix)"),
+    support_group: Optional[str] = Query(None, description="Filter by support group name"),
+    is_active: Optional[bool] = Query(None, description="Filter by active status"),
+    priority: Optional[str] = Query(None, description="Filter by priority (High, Critical, etc.)"),
+    severity: Optional[str] = Query(None, description="Filter by severity (Severity A, Severity B, etc.)"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    top: int = Query(50, description="Limit number of results", ge=1, le=1000),
+    skip: int = Query(0, description="Skip number of results", ge=0),
+    orderby: Optional[str] = Query(None, description="rank (default) or e.g. 'created desc'"),
+    count: bool = Query(False, description="Include the total number of matches"),
+    raw: bool = Query(False, description="Treat `q` as an FTS5 query (AND/OR/NOT, \"phrases\", NEAR)"),
+    window: Optional[int] = Query(None, ge=0, description="Rank only this many most recently indexed matches "
+                                                          "(default SEARCH_RANK_WINDOW; 0 ranks every match)"),
+):
+    """
+    Search locally indexed incidents, best matches first (BM25).
+
+    Filters mirror `/incidents/custom`. Only incidents seen by the worker,
+    a pipeline run or `/search/sync` are searchable. With a ranking window,
+    only the newest matches are ranked and `ranked_window` in the response
+    gives its size; it is null when every match was ranked.
+    """
+    index = _require_index()
+    try:
+        return index.search(q, support_group=support_group, is_active=is_active, priority=priority,
+                            severity=severity, status=status, top=top, skip=skip, orderby=orderby,
+                            count=count, raw=raw, window=window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/search/sync")
+async def sync_search_index(
+    support_group: Optional[str] = Query(None, description="Support group to index (default: all)"),
+    active_only: bool = Query(False, description="Only index active incidents"),
+    top: Optional[int] = Query(None, description="Stop after this many incidents", ge=1),
+):
+    """
+    Fetch incidents from Canvas and index them now. Unchanged incidents are
+    skipped; for large backfills prefer `python -m services.search_index sync`.
+    """
+    _require_index()
+    return await search_index.sync(support_group, active_only, top)
+
+
+@router.get("/search/stats")
+def search_index_stats():
+    """Number of indexed incidents and when the index was last written"""
+    return _require_index().stats()
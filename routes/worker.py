@@ -0,0 +1,57 @@
+"""
+Background triage worker status and dead-letter routes
+"""
+from fastapi import APIRouter, HTTPException, Query
+
+from services.job_queue import DEAD, DONE
+from services.triage_worker import get_worker
+
+router = APIRouter()
+
+
+def _require_worker():
+    worker = get_worker()
+    if worker is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Triage worker not running. Set WORKER_ENABLED and WORKER_SUPPORT_GROUPS in .env"
+        )
+    return worker
+
+
+@router.get("/worker/status")
+async def get_worker_status():
+    """Queue depth, lag of the oldest pending job, processing rate and last poll per group"""
+    worker = get_worker()
+    if worker is None:
+        return {"running": False}
+    return worker.status()
+
+
+@router.get("/worker/results")
+async def get_worker_results(
+    top: int = Query(100, description="Number of results to return", ge=1, le=1000),
+    skip: int = Query(0, description="Number of results to skip", ge=0)
+):
+    """Most recently completed triage results"""
+    worker = _require_worker()
+    return {"value": worker.queue.list_jobs(DONE, limit=top, offset=skip)}
+
+
+@router.get("/worker/dead-letter")
+async def get_dead_letter_jobs(
+    top: int = Query(100, description="Number of jobs to return", ge=1, le=1000),
+    skip: int = Query(0, description="Number of jobs to skip", ge=0)
+):
+    """Jobs that exhausted their retry budget"""
+    worker = _require_worker()
+    return {"value": worker.queue.list_jobs(DEAD, limit=top, offset=skip)}
+
+
+@router.post("/worker/dead-letter/{job_id}/retry")
+async def retry_dead_letter_job(job_id: int):
+    """Move a dead-lettered job back to the pending queue"""
+    worker = _require_worker()
+    if not worker.queue.retry_dead(job_id):
+        raise HTTPException(status_code=404, detail=f"Dead-letter job {job_id} not found")
+    return {"job_id": job_id, "status": "pending"}
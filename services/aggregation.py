@@ -0,0 +1,192 @@
+"""
+Incremental incident aggregations.
+
+Aggregations are folds: each aggregator sees one incident at a time via
+`add()` and keeps only its running state (a counter per distinct value), so
+memory grows with the number of distinct values, not with the number of
+incidents. Incidents come either from Canvas, streamed page by page with a
+`$select` projection of just the fields the aggregators read, or from the
+triage worker's local SQLite store when it already polls the group. The
+local store only answers with the incidents returned by the group's last
+complete poll, so closed or reassigned incidents are not counted.
+"""
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from config.settings import settings
+from services.canvas_client import iter_incidents
+from services.odata import and_, build_query, eq
+
+# slmStatus values (lower-cased substrings) that count as an SLA breach
+SLA_BREACH_MARKERS = ("breach", "missed")
+
+GROUPABLE_FIELDS = ("status", "priority", "severity", "urgency", "slmStatus", "assignedGroup",
+                    "assignee", "channel", "market", "product", "isActive", "isEscalated")
+
+MISSING = "(none)"
+
+
+class Aggregator:
+    """Base class; subclasses declare the fields they read in `fields`."""
+
+    fields: Sequence[str] = ()
+
+    def add(self, incident: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def result(self) -> Any:
+        raise NotImplementedError
+
+
+class CountBy(Aggregator):
+    """Count incidents per value of one field."""
+
+    def __init__(self, field: str) -> None:
+        self.field = field
+        self.fields = (field,)
+        self.counts: Counter = Counter()
+
+    def add(self, incident: Dict[str, Any]) -> None:
+        value = incident.get(self.field)
+        self.counts[MISSING if value in (None, "") else str(value)] += 1
+
+    def result(self) -> Dict[str, int]:
+        return dict(self.counts.most_common())
+
+
+class DistinctValues(Aggregator):
+    """Sorted distinct non-empty values of one field."""
+
+    def __init__(self, field: str) -> None:
+        self.field = field
+        self.fields = (field,)
+        self.values = set()
+
+    def add(self, incident: Dict[str, Any]) -> None:
+        value = incident.get(self.field)
+        if value:
+            self.values.add(value)
+
+    def result(self) -> List[Any]:
+        return sorted(self.values)
+
+
+def is_sla_breached(incident: Dict[str, Any]) -> bool:
+    status = (incident.get("slmStatus") or "").lower()
+    return any(marker in status for marker in SLA_BREACH_MARKERS)
+
+
+class SlaBreaches(Aggregator):
+    """Per support group: incident count and SLA breaches (by `slmStatus`)."""
+
+    fields = ("assignedGroup", "slmStatus")
+
+    def __init__(self) -> None:
+        self.total: Counter = Counter()
+        self.breached: Counter = Counter()
+
+    def add(self, incident: Dict[str, Any]) -> None:
+        group = incident.get("assignedGroup") or MISSING
+        self.total[group] += 1
+        if is_sla_breached(incident):
+            self.breached[group] += 1
+
+    def result(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            group: {
+                "incidents": n,
+                "breached": self.breached[group],
+                "breach_rate": round(self.breached[group] / n, 4) if n else 0.0,
+            }
+            for group, n in sorted(self.total.items(), key=lambda kv: (-self.breached[kv[0]], kv[0]))
+        }
+
+
+def fold(incidents: Iterable[Dict[str, Any]], aggregators: Dict[str, Aggregator]) -> int:
+    """Feed every incident to every aggregator; return the number seen."""
+    seen = 0
+    for incident in incidents:
+        seen += 1
+        for agg in aggregators.values():
+            agg.add(incident)
+    return seen
+
+
+async def fold_async(incidents, aggregators: Dict[str, Aggregator]) -> int:
+    seen = 0
+    async for incident in incidents:
+        seen += 1
+        for agg in aggregators.values():
+            agg.add(incident)
+    return seen
+
+
+def projection(aggregators: Dict[str, Aggregator]) -> List[str]:
+    """Fields to `$select` so Canvas only sends what the aggregators read."""
+    return sorted({f for agg in aggregators.values() for f in agg.fields})
+
+
+def _local_store(support_group: Optional[str], active_only: bool):
+    """Return (queue, as_of) when the worker's local store can answer, else None.
+
+    ``as_of`` is the start of the group's last complete poll; only incidents
+    that poll saw are folded.
+    """
+    # imported lazily: the worker module pulls in the extraction stack
+    from services.triage_worker import get_worker
+
+    worker = get_worker()
+    # the worker only polls active incidents of its configured groups
+    if worker is None or not active_only or support_group not in worker.support_groups:
+        return None
+    poll = worker.last_poll.get(support_group)
+    if not poll or poll.get("error") or time.time() - poll["at"] > 2 * worker.poll_interval + 60:
+        return None
+    return worker.queue, poll["at"]
+
+
+async def aggregate(
+    aggregators: Dict[str, Aggregator],
+    support_group: Optional[str] = None,
+    active_only: bool = False,
+    limit: Optional[int] = None,
+    source: str = "auto",
+) -> Dict[str, Any]:
+    """Run ``aggregators`` over the matching incidents.
+
+    ``source`` is ``canvas`` (stream Canvas pages), ``local`` (the worker's
+    store; raises ValueError when it can't answer) or ``auto`` (local when
+    fresh, otherwise Canvas).
+    """
+    started = time.perf_counter()
+    local = _local_store(support_group, active_only) if source in ("auto", "local") and limit is None else None
+    if source == "local" and local is None:
+        raise ValueError("Local incident store unavailable for this query "
+                         "(needs a running worker polling the group, active_only=true and no limit)")
+
+    meta: Dict[str, Any] = {}
+    if local is not None:
+        queue, as_of = local
+        loop = asyncio.get_running_loop()
+        payloads = queue.iter_latest_payloads(support_group, seen_since=as_of)
+        seen = await loop.run_in_executor(None, fold, payloads, aggregators)
+        meta.update(source="local", as_of=as_of)
+    else:
+        flt = and_(
+            eq("assignedGroup", support_group) if support_group else None,
+            eq("isActive", True) if active_only else None,
+        )
+        params = build_query(filter=flt, select=projection(aggregators))
+        seen = await fold_async(iter_incidents(params, page_size=settings.AGGREGATION_PAGE_SIZE, limit=limit), aggregators)
+        meta.update(source="canvas")
+
+    return {
+        "support_group": support_group,
+        "active_only": active_only,
+        "incidents": seen,
+        **meta,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        "aggregations": {name: agg.result() for name, agg in aggregators.items()},
+    }
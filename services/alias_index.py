@@ -0,0 +1,120 @@
+"""Fuzzy resolution of incoming keys to alias names.
+
+Incoming tickets use many spellings for the same label ("Casino-ID",
+"CasinoID:", "Casino Id #", "Player Nm"). Keys are first squashed to their
+lowercase alphanumeric characters, which catches punctuation and spacing
+variants exactly. Remaining keys are scored against a character trigram
+index built once over every candidate in ALIAS_CANDIDATES; the best
+candidate above the similarity threshold wins. A key that is a candidate
+with words cut off or appended ("Casino" vs "Casino ID", "Event Date Time
+Zone" vs "Event Date Time") names a different field and never matches
+fuzzily, however similar its trigrams are.
+
+Results are memoized per key, so resolution is a dict lookup once the
+(small, repetitive) universe of incoming keys has been seen.
+"""
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+from .config import ALIAS_CANDIDATES, FUZZY_MATCH_THRESHOLD
+
+
+# keys shorter than this (after squashing) are too ambiguous to match fuzzily
+MIN_FUZZY_LENGTH = 4
+
+# a key and a candidate where one extends the other by this many characters are different fields
+MAX_PREFIX_EXTENSION = 1
+
+
+def squash_key(key: str) -> str:
+    """Lowercase a key and drop everything that is not a letter or digit."""
+    return "".join(ch for ch in key.lower() if ch.isalnum())
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Return the padded character trigrams of ``text``."""
+    padded = f"$${text}$"
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class AliasIndex:
+    """Trigram index over alias candidates.
+
+    ``resolve`` returns the tuple of alias names a key maps to (a candidate
+    such as "mid" legitimately belongs to more than one alias), or an empty
+    tuple when nothing is similar enough. ``resolve_scored`` also returns the
+    match score: 1.0 for an exact (squashed) match, the trigram Dice
+    coefficient otherwise.
+    """
+
+    def __init__(self, alias_candidates: Dict[str, List[str]], threshold: float = FUZZY_MATCH_THRESHOLD) -> None:
+        self.threshold = threshold
+
+        # squashed candidate -> aliases, in ALIAS_CANDIDATES order
+        exact: Dict[str, List[str]] = {}
+        for alias, candidates in alias_candidates.items():
+            for cand in candidates:
+                aliases = exact.setdefault(squash_key(cand), [])
+                if alias not in aliases:
+                    aliases.append(alias)
+        self._exact: Dict[str, Tuple[str, ...]] = {k: tuple(v) for k, v in exact.items()}
+
+        # trigram -> ids of squashed candidates containing it
+        self._terms: List[str] = list(self._exact.keys())
+        self._sizes: List[int] = []
+        postings: Dict[str, Set[int]] = defaultdict(set)
+        for idx, term in enumerate(self._terms):
+            grams = trigrams(term)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                postings[gram].add(idx)
+        self._postings: Dict[str, FrozenSet[int]] = {g: frozenset(ids) for g, ids in postings.items()}
+
+        self.resolve_scored = lru_cache(maxsize=4096)(self._resolve_scored)
+
+    def resolve(self, key: str) -> Tuple[str, ...]:
+        return self.resolve_scored(key)[0]
+
+    def _resolve_scored(self, key: str) -> Tuple[Tuple[str, ...], float]:
+        squashed = squash_key(key)
+        if squashed in self._exact:
+            return self._exact[squashed], 1.0
+        if len(squashed) < MIN_FUZZY_LENGTH:
+            return (), 0.0
+
+        grams = trigrams(squashed)
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for idx in self._postings.get(gram, ()):
+                shared[idx] += 1
+
+        best_idx, best_score = -1, 0.0
+        for idx, count in shared.items():
+            # Dice coefficient over trigram sets
+            score = 2.0 * count / (len(grams) + self._sizes[idx])
+            if score > best_score and not _extends(squashed, self._terms[idx]):
+                best_idx, best_score = idx, score
+
+        if best_idx < 0 or best_score < self.threshold:
+            return (), 0.0
+        return self._exact[self._terms[best_idx]], best_score
+
+
+def _extends(a: str, b: str) -> bool:
+    """True when one of ``a``/``b`` is the other with more than a typo's worth appended."""
+    short, long = (a, b) if len(a) <= len(b) else (b, a)
+    return long.startswith(short) and len(long) - len(short) > MAX_PREFIX_EXTENSION
+
+
+_INDEX = AliasIndex(ALIAS_CANDIDATES)
+
+
+def resolve_key(key: str) -> Tuple[str, ...]:
+    """Resolve a normalized key to alias names using the shared index."""
+    return _INDEX.resolve(key)
+
+
+def resolve_key_scored(key: str) -> Tuple[Tuple[str, ...], float]:
+    """`resolve_key` plus the match score (1.0 for an exact squashed match)."""
+    return _INDEX.resolve_scored(key)
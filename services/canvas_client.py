@@ -0,0 +1,183 @@
+"""
+Canvas Queue API client helpers shared by routes and background services.
+"""
+import hashlib
+import json
+import re
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from fastapi import HTTPException
+
+from config.settings import settings
+from utils.auth import get_auth_headers_async
+from utils.metrics import CANVAS_IN_FLIGHT, CANVAS_REQUEST_DURATION
+from utils.resilience import CANVAS, CircuitOpenError
+from utils import cache
+from utils.tracing import current_span, traced
+from services.json_stream import iter_array_items
+
+# entity keys such as incidents('INC123') collapse to one metrics label
+_ENTITY_KEY = re.compile(r"\('[^']*'\)|\([^)]*\)")
+
+
+def canvas_route(url: str) -> str:
+    """Return the Canvas route of ``url`` with entity keys collapsed, e.g. ``/incidents({id})``."""
+    return _ENTITY_KEY.sub("({id})", urlsplit(url).path) or "/"
+
+
+def request_key(url: str, params: Optional[dict] = None) -> str:
+    """Stable cache key for a Canvas GET (params are order-independent)."""
+    canonical = json.dumps([url, sorted((params or {}).items())], default=str, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def incidents_url() -> str:
+    """Return the Canvas incidents collection URL."""
+    return f"{settings.CANVAS_API_BASE_URL}/incidents"
+
+
+@traced("canvas.request")
+async def make_canvas_request(url: str, params: dict = None):
+    """Make a request to Canvas API with error handling"""
+    current_span().set_attribute("canvas.route", canvas_route(url))
+    # the per-process memory backend would only serve this worker stale data
+    ttl = settings.CANVAS_CACHE_TTL_SECONDS if cache.is_shared() else 0
+    if ttl > 0:
+        key = request_key(url, params)
+        cached = cache.get_json("canvas", key)
+        if cached is not None:
+            current_span().set_attribute("cache", "hit")
+            return cached
+    headers = await get_auth_headers_async()
+    status = "error"
+    start = time.perf_counter()
+    CANVAS_IN_FLIGHT.inc()
+
+    async def _get():
+        nonlocal status
+        async with httpx.AsyncClient(verify=False) as client:
+            response = await client.get(url, headers=headers, params=params, timeout=30.0)
+            status = str(response.status_code)
+            current_span().set_attribute("http.status_code", response.status_code)
+            response.raise_for_status()
+            return response.json()
+
+    try:
+        data = await CANVAS.call_async(_get)
+        if ttl > 0:
+            cache.set_json("canvas", key, data, ex=ttl)
+        return data
+    except CircuitOpenError as e:
+        status = "circuit_open"
+        raise _http_exception(e)
+    except Exception as e:
+        raise _http_exception(e)
+    finally:
+        CANVAS_IN_FLIGHT.dec()
+        CANVAS_REQUEST_DURATION.observe(time.perf_counter() - start, route=canvas_route(url), status=status)
+
+
+def _http_exception(e: Exception) -> HTTPException:
+    """Map a Canvas call failure to the HTTPException routes surface."""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, CircuitOpenError):
+        return HTTPException(status_code=503, detail=f"Canvas API unavailable: {e}",
+                             headers={"Retry-After": str(int(e.retry_after) + 1)})
+    if isinstance(e, httpx.HTTPStatusError):
+        return HTTPException(status_code=e.response.status_code, detail=f"Canvas API error: {e.response.text}")
+    if isinstance(e, httpx.RequestError):
+        return HTTPException(status_code=503, detail=f"Failed to connect to Canvas API: {str(e)}")
+    return HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+async def stream_canvas_items(url: str, params: Optional[dict] = None, key: str = "value") -> AsyncIterator[Any]:
+    """Yield the items of a Canvas list response as the body arrives.
+
+    Unlike `make_canvas_request`, the body is never held in memory whole:
+    it is parsed incrementally (see `services.json_stream`). Opening the
+    request (connect, status) goes through the resilience policy; a failure
+    while the body is being read is mapped the same way but not retried.
+    Streamed responses bypass the Canvas response cache.
+    """
+    headers = await get_auth_headers_async()
+    status = "error"
+    start = time.perf_counter()
+    CANVAS_IN_FLIGHT.inc()
+    client = httpx.AsyncClient(verify=False)
+    response = None
+
+    async def _open():
+        nonlocal status
+        request = client.build_request("GET", url, headers=headers, params=params, timeout=30.0)
+        resp = await client.send(request, stream=True)
+        status = str(resp.status_code)
+        if resp.is_error:
+            await resp.aread()
+            await resp.aclose()
+            resp.raise_for_status()
+        return resp
+
+    try:
+        response = await CANVAS.call_async(_open)
+        async for item in iter_array_items(response.aiter_bytes(), key):
+            yield item
+    except CircuitOpenError as e:
+        status = "circuit_open"
+        raise _http_exception(e)
+    except Exception as e:
+        raise _http_exception(e)
+    finally:
+        if response is not None:
+            await response.aclose()
+        await client.aclose()
+        CANVAS_IN_FLIGHT.dec()
+        CANVAS_REQUEST_DURATION.observe(time.perf_counter() - start, route=canvas_route(url), status=status)
+
+
+async def iter_incidents(
+    params: Optional[Dict[str, Any]] = None,
+    page_size: int = 100,
+    limit: Optional[int] = None,
+    stream: Optional[bool] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield incidents one at a time, fetching Canvas pages with $top/$skip.
+
+    ``params`` carries the remaining OData options ($filter, $select, ...).
+    Iteration stops at the first short page or once ``limit`` incidents
+    have been yielded. With ``stream`` (default `CANVAS_STREAM_PARSE`) each
+    page is parsed incrementally instead of being buffered and decoded whole.
+    """
+    if stream is None:
+        stream = settings.CANVAS_STREAM_PARSE
+    url = incidents_url()
+    skip = 0
+    yielded = 0
+    while True:
+        top = page_size if limit is None else min(page_size, limit - yielded)
+        if top <= 0:
+            return
+        page_params = dict(params or {})
+        page_params["$top"] = top
+        page_params["$skip"] = skip
+        count = 0
+        if stream:
+            items = stream_canvas_items(url, page_params)
+            try:
+                async for incident in items:
+                    count += 1
+                    yield incident
+            finally:
+                await items.aclose()
+        else:
+            data = await make_canvas_request(url, page_params)
+            for incident in data.get("value", []):
+                count += 1
+                yield incident
+        yielded += count
+        if count < top:
+            return
+        skip += count
@@ -79,4 +79,6 @@ REQUIRED_ALIASES: Dict[str, List[str]] = {
 }
 
 
-
+# minimum trigram Dice similarity for a key to fuzzily resolve to an alias
+# candidate (see services/alias_index.py); exact matches always win
+FUZZY_MATCH_THRESHOLD: float = 0.7
@@ -0,0 +1,284 @@
+"""
+Cross-incident correlation on extracted identifiers.
+
+Rule-based extraction (`ExtractionService`) and the LLM (`llm_service`)
+both pull identifiers such as Round ID, Casino ID and Player ID out of
+incident notes. Incidents sharing one of them frequently share a root cause
+(many stuck rounds on one casino, one player filing repeatedly), so every
+extraction is folded into an inverted index:
+
+    (kind, value) -> {incident_id, ...}
+
+maintained incrementally: re-extracting an incident replaces its previous
+identifiers, and the least recently updated incidents are evicted beyond
+`CORRELATION_MAX_INCIDENTS`. Per kind, values are also kept in frequency
+buckets (count -> values), so "top offenders" is answered by walking the
+few distinct counts from the highest down instead of scanning every posting.
+
+The index is process-local; at startup it is refilled from LLM fields in the
+results store (see `warm_from_results`).
+"""
+import heapq
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# identifier kind -> field names it is read from (rule model fields and LLM fields)
+KINDS: Dict[str, Tuple[str, ...]] = {
+    "round_id": ("round_id",),
+    "casino_id": ("casino_id",),
+    "player": ("player_id", "player_login"),
+    "mid": ("mid", "module_id"),
+    "game": ("game_name",),
+}
+
+# placeholders the LLM schema and extractors use for "not found"
+_EMPTY_VALUES = {"", "n/a", "na", "none", "null", "unknown", "-"}
+
+Key = Tuple[str, str]
+
+
+def normalize_value(kind: str, value: Any) -> Optional[str]:
+    """Canonical form of an identifier, or None for empty/placeholder values."""
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    text = " ".join(str(value).split())
+    if text.lower() in _EMPTY_VALUES:
+        return None
+    # game names vary in case between operators; IDs are compared as written
+    return text.casefold() if kind == "game" else text
+
+
+def identifiers(*sources: Optional[Dict[str, Any]]) -> Dict[str, Set[str]]:
+    """Collect identifiers from rule-model and/or LLM field dicts."""
+    found: Dict[str, Set[str]] = defaultdict(set)
+    for source in sources:
+        if not source:
+            continue
+        for kind, fields in KINDS.items():
+            for field in fields:
+                value = normalize_value(kind, source.get(field))
+                if value is not None:
+                    found[kind].add(value)
+    return dict(found)
+
+
+class _FrequencyBuckets:
+    """Counts per value with count -> values buckets for cheap top-N."""
+
+    def __init__(self) -> None:
+        self.counts: Dict[str, int] = {}
+        self.buckets: Dict[int, Set[str]] = defaultdict(set)
+
+    def _move(self, value: str, old: int, new: int) -> None:
+        if old:
+            bucket = self.buckets[old]
+            bucket.discard(value)
+            if not bucket:
+                del self.buckets[old]
+        if new:
+            self.buckets[new].add(value)
+            self.counts[value] = new
+        else:
+            self.counts.pop(value, None)
+
+    def incr(self, value: str) -> None:
+        old = self.counts.get(value, 0)
+        self._move(value, old, old + 1)
+
+    def decr(self, value: str) -> None:
+        old = self.counts.get(value, 0)
+        if old:
+            self._move(value, old, old - 1)
+
+    def top(self, n: int, min_count: int = 1) -> List[Tuple[str, int]]:
+        out: List[Tuple[str, int]] = []
+        for count in sorted(self.buckets, reverse=True):
+            if count < min_count:
+                break
+            for value in sorted(self.buckets[count]):
+                out.append((value, count))
+                if len(out) >= n:
+                    return out
+        return out
+
+
+class CorrelationIndex:
+    """Inverted index from extracted identifiers to incident IDs."""
+
+    def __init__(self, max_incidents: int = 100000) -> None:
+        self.max_incidents = max_incidents
+        self._postings: Dict[Key, Set[str]] = {}
+        self._incidents: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._frequencies: Dict[str, _FrequencyBuckets] = defaultdict(_FrequencyBuckets)
+        self._lock = threading.Lock()
+
+    def _remove_locked(self, incident_id: str) -> None:
+        entry = self._incidents.pop(incident_id, None)
+        if entry is None:
+            return
+        for key in entry["keys"]:
+            posting = self._postings.get(key)
+            if posting is None:
+                continue
+            posting.discard(incident_id)
+            self._frequencies[key[0]].decr(key[1])
+            if not posting:
+                del self._postings[key]
+
+    def update(self, incident_id: str, found: Dict[str, Iterable[str]],
+               support_group: Optional[str] = None, ticket_type: Optional[str] = None,
+               updated_at: Optional[float] = None) -> int:
+        """Replace ``incident_id``'s identifiers; returns how many it now has.
+
+        An update older than the indexed one (``updated_at``) is ignored, so a
+        replayed stored result never overwrites a newer live extraction.
+        """
+        if not incident_id or incident_id == "N/A" or self.max_incidents <= 0:
+            return 0
+        keys = {(kind, value) for kind, values in found.items() for value in values}
+        updated_at = updated_at or time.time()
+        with self._lock:
+            previous = self._incidents.get(incident_id)
+            if previous is not None and updated_at < previous["updated_at"]:
+                return len(previous["keys"])
+            if not keys and previous is None:
+                return 0
+            self._remove_locked(incident_id)
+            if not keys:
+                return 0
+            for key in keys:
+                self._postings.setdefault(key, set()).add(incident_id)
+                self._frequencies[key[0]].incr(key[1])
+            self._incidents[incident_id] = {
+                "keys": keys,
+                "support_group": support_group or (previous or {}).get("support_group"),
+                "ticket_type": ticket_type or (previous or {}).get("ticket_type"),
+                "updated_at": updated_at,
+            }
+            # keep eviction order by age when older results are replayed after newer ones
+            oldest = next(iter(self._incidents))
+            if updated_at < self._incidents[oldest]["updated_at"]:
+                self._incidents.move_to_end(incident_id, last=False)
+            while len(self._incidents) > self.max_incidents:
+                self._remove_locked(next(iter(self._incidents)))
+        return len(keys)
+
+    def remove(self, incident_id: str) -> None:
+        with self._lock:
+            self._remove_locked(incident_id)
+
+    def _describe(self, incident_id: str) -> Dict[str, Any]:
+        entry = self._incidents.get(incident_id, {})
+        return {"incident_id": incident_id, "support_group": entry.get("support_group"),
+                "ticket_type": entry.get("ticket_type"), "updated_at": entry.get("updated_at")}
+
+    def lookup(self, kind: str, value: str, limit: int = 100) -> Tuple[int, List[Dict[str, Any]]]:
+        """(total, newest ``limit`` incidents) with identifier ``kind`` == ``value``."""
+        norm = normalize_value(kind, value)
+        with self._lock:
+            posting = self._postings.get((kind, norm), ()) if norm is not None else ()
+            newest = heapq.nlargest(limit, posting, key=lambda i: self._incidents[i]["updated_at"])
+            return len(posting), [self._describe(i) for i in newest]
+
+    def related(self, incident_id: str, limit: int = 100,
+                broad_threshold: int = 1000) -> Optional[Dict[str, Any]]:
+        """Incidents sharing at least one identifier with ``incident_id`` (None if not indexed).
+
+        Identifiers shared by more than ``broad_threshold`` incidents (a
+        busy casino, a popular game) say little about a common cause; they
+        are listed with ``broad: true`` but not expanded, which keeps the
+        cost proportional to the specific identifiers only.
+        """
+        with self._lock:
+            entry = self._incidents.get(incident_id)
+            if entry is None:
+                return None
+            shared: Dict[str, List[Key]] = defaultdict(list)
+            identifiers_ = []
+            for key in sorted(entry["keys"]):
+                posting = self._postings.get(key, ())
+                broad = len(posting) > broad_threshold
+                identifiers_.append({"kind": key[0], "value": key[1], "incidents": len(posting), "broad": broad})
+                if broad:
+                    continue
+                for other in posting:
+                    if other != incident_id:
+                        shared[other].append(key)
+            ranked = heapq.nsmallest(
+                limit, shared, key=lambda o: (-len(shared[o]), -self._incidents[o]["updated_at"]))
+            related = [{**self._describe(other), "shared": [{"kind": k, "value": v} for k, v in shared[other]]}
+                       for other in ranked]
+        return {"incident_id": incident_id, "identifiers": identifiers_, "related": related,
+                "related_total": len(shared)}
+
+    def top(self, kind: str, n: int = 10, min_count: int = 2) -> List[Dict[str, Any]]:
+        """Values of ``kind`` shared by the most incidents."""
+        with self._lock:
+            return [{"value": value, "incidents": count}
+                    for value, count in self._frequencies[kind].top(n, min_count)]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "incidents": len(self._incidents),
+                "max_incidents": self.max_incidents,
+                "identifiers": {kind: len(self._frequencies[kind].counts) for kind in KINDS},
+            }
+
+
+_INDEX: Optional[CorrelationIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_index() -> CorrelationIndex:
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                _INDEX = CorrelationIndex(settings.CORRELATION_MAX_INCIDENTS)
+    return _INDEX
+
+
+def observe(incident_id: Optional[str], support_group: Optional[str] = None,
+            rules: Optional[Dict[str, Any]] = None, llm_fields: Optional[Dict[str, Any]] = None,
+            updated_at: Optional[float] = None) -> None:
+    """Index the identifiers of one extraction; never raises so extraction is unaffected."""
+    try:
+        rules = rules or {}
+        found = identifiers(rules.get("model"), llm_fields)
+        get_index().update(None if incident_id is None else str(incident_id), found,
+                           support_group, rules.get("ticket_type"), updated_at)
+    except Exception as e:
+        logger.error(f"Indexing identifiers of incident {incident_id} failed: {e}")
+
+
+WARM_PAGE_SIZE = 1000
+
+
+def warm_from_results(limit: Optional[int] = None) -> int:
+    """Refill the index from LLM fields of the newest stored results; returns rows read."""
+    from services.results_sink import get_sink
+
+    sink = get_sink()
+    if sink is None:
+        return 0
+    limit = limit or settings.CORRELATION_MAX_INCIDENTS
+    # newest first, one page at a time; `update` ignores results older than the indexed one
+    read = 0
+    while read < limit:
+        rows = sink.store.query({}, None, None, min(WARM_PAGE_SIZE, limit - read), read)
+        for row in rows:
+            if row.get("llm_fields"):
+                observe(row.get("incident_id"), row.get("support_group"),
+                        {"ticket_type": row.get("ticket_type")}, row["llm_fields"], row.get("recorded_at"))
+        read += len(rows)
+        if len(rows) < WARM_PAGE_SIZE:
+            break
+    return read
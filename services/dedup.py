@@ -0,0 +1,275 @@
+"""
+Near-duplicate incident detection with MinHash signatures and LSH banding.
+
+Players and operators often file the same problem several times. Each
+incident's ``summary`` and ``notes`` are reduced to word 3-gram shingles
+and a MinHash signature that estimates Jaccard similarity; LSH banding over
+the signature finds candidate duplicates without comparing against every
+incident. An incident whose best candidate reaches `DEDUP_THRESHOLD` joins
+that candidate's group, whose first member is the canonical incident.
+
+Signatures use one-permutation hashing: every shingle is hashed once and
+the hash both picks one of `NUM_BINS` bins and competes for that bin's
+minimum, with empty bins filled from their right neighbour (densification).
+That gives the same estimator as classic k-permutation MinHash at the cost
+of a single hash per shingle, which keeps it cheap enough for the listing
+routes.
+
+The index is maintained incrementally as incidents are polled, listed or
+extracted, is bounded by `DEDUP_MAX_INCIDENTS` (least recently seen
+evicted), and can remember the last LLM extraction per group so a duplicate
+reuses it instead of paying for another call (`DEDUP_REUSE_RESULTS`). Near
+duplicates routinely differ in exactly the fields extracted (another round,
+player or casino), so a stored result is only handed to an incident with the
+same `identifier_fingerprint`.
+"""
+import hashlib
+import logging
+import operator
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple
+
+from config.settings import settings
+from services.alias_index import resolve_key
+
+logger = logging.getLogger(__name__)
+
+NUM_BINS = 128
+BANDS = 16  # 16 bands x 8 rows: candidate probability ~50% at Jaccard 0.7, ~94% at 0.8
+ROWS = NUM_BINS // BANDS
+SHINGLE_SIZE = 3
+# buckets this full hold bands made of boilerplate shared by most incidents
+# (field labels of the notes template); they are skipped when collecting
+# candidates, real duplicates still collide in their other bands
+MAX_BUCKET_CANDIDATES = 100
+MAX_SHINGLES = 5000
+
+_MASK = (1 << 32) - 1
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# note labels whose values the LLM copies into its result
+IDENTIFIER_ALIASES = frozenset({"Round ID", "Casino ID", "MID", "Module ID", "Player ID", "Player Name",
+                                "Test Login ID", "Game Name", "Brand Name", "Brand / Casino Company Name",
+                                "Event Date & Time"})
+_LABELLED_LINE = re.compile(r"^[ \t]*([^:=\n]{2,60}?)[ \t]*[:=][ \t]*(.*?)[ \t]*$", re.MULTILINE)
+_DIGIT_TOKEN = re.compile(r"\w*\d\w*", re.UNICODE)
+
+Fingerprint = Tuple[FrozenSet[Tuple[str, str]], FrozenSet[str]]
+
+
+def incident_text(incident: Dict[str, Any]) -> str:
+    return "\n".join(str(incident.get(f) or "") for f in ("summary", "notes")).strip()
+
+
+def identifier_fingerprint(text: str) -> Fingerprint:
+    """Identifier values in ``text``: labelled identifier lines and every token containing a digit.
+
+    Two incidents with equal fingerprints agree on every round, player,
+    casino and module ID and on every number or timestamp in their notes,
+    so an extraction of one is valid for the other.
+    """
+    labelled = set()
+    for label, value in _LABELLED_LINE.findall(text):
+        for alias in resolve_key(label):
+            if alias in IDENTIFIER_ALIASES:
+                labelled.add((alias, " ".join(value.split()).casefold()))
+    return frozenset(labelled), frozenset(_DIGIT_TOKEN.findall(text.lower()))
+
+
+def shingles(text: str) -> Set[str]:
+    """Word ``SHINGLE_SIZE``-grams of the lower-cased text (the tokens themselves for short texts)."""
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) < SHINGLE_SIZE:
+        return set(tokens)
+    grams = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    if len(grams) > MAX_SHINGLES:
+        grams = set(sorted(grams)[:MAX_SHINGLES])
+    return grams
+
+
+def _hash64(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def signature(items: Iterable[str]) -> Optional[array]:
+    """One-permutation MinHash signature (``NUM_BINS`` 32-bit values), or None for no shingles."""
+    mins = [None] * NUM_BINS
+    for item in items:
+        h = _hash64(item)
+        b = h % NUM_BINS
+        v = h // NUM_BINS
+        if mins[b] is None or v < mins[b]:
+            mins[b] = v
+    if all(v is None for v in mins):
+        return None
+    # densify: an empty bin takes the next non-empty bin to its right, offset by the distance
+    sig = array("I", [0] * NUM_BINS)
+    for i in range(NUM_BINS):
+        if mins[i] is not None:
+            sig[i] = mins[i] & _MASK
+            continue
+        t = 1
+        while mins[(i + t) % NUM_BINS] is None:
+            t += 1
+        sig[i] = (mins[(i + t) % NUM_BINS] + t * 0x9E3779B1) & _MASK
+    return sig
+
+
+def similarity(a: array, b: array) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(map(operator.eq, a, b)) / NUM_BINS
+
+
+def _band_keys(sig: array) -> List[Tuple[int, int]]:
+    return [(band, hash(tuple(sig[band * ROWS:(band + 1) * ROWS]))) for band in range(BANDS)]
+
+
+class DuplicateIndex:
+    """Incrementally maintained LSH index grouping near-duplicate incidents."""
+
+    def __init__(self, threshold: float = 0.8, max_incidents: int = 50000) -> None:
+        self.threshold = threshold
+        self.max_incidents = max_incidents
+        self._signatures: "OrderedDict[str, array]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, int], Set[str]] = {}
+        self._group_of: Dict[str, str] = {}
+        self._members: Dict[str, Set[str]] = {}
+        self._results: "OrderedDict[str, Tuple[Hashable, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.duplicates_found = 0
+        self.results_reused = 0
+
+    def _remove_locked(self, incident_id: str) -> None:
+        sig = self._signatures.pop(incident_id, None)
+        if sig is None:
+            return
+        for key in _band_keys(sig):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(incident_id)
+                if not bucket:
+                    del self._buckets[key]
+        group = self._group_of.pop(incident_id, None)
+        members = self._members.get(group)
+        if members is not None:
+            members.discard(incident_id)
+            if not members:
+                del self._members[group]
+                self._results.pop(group, None)
+
+    def add(self, incident_id: str, text: str) -> Optional[str]:
+        """Index an incident; returns the canonical incident ID when it is a near-duplicate."""
+        sig = signature(shingles(text))
+        if sig is None or not incident_id:
+            return None
+        with self._lock:
+            previous = self._signatures.get(incident_id)
+            if previous is not None and previous == sig:
+                self._signatures.move_to_end(incident_id)
+                group = self._group_of[incident_id]
+                return group if group != incident_id else None
+            self._remove_locked(incident_id)
+
+            best, best_score = None, 0.0
+            keys = _band_keys(sig)
+            candidates = set()
+            for key in keys:
+                bucket = self._buckets.get(key, ())
+                if len(bucket) <= MAX_BUCKET_CANDIDATES:
+                    candidates.update(bucket)
+            # sorted so ties resolve the same way every run
+            for candidate in sorted(candidates):
+                score = similarity(sig, self._signatures[candidate])
+                if score > best_score:
+                    best, best_score = candidate, score
+            group = self._group_of[best] if best is not None and best_score >= self.threshold else incident_id
+
+            self._signatures[incident_id] = sig
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(incident_id)
+            self._group_of[incident_id] = group
+            self._members.setdefault(group, set()).add(incident_id)
+            if group != incident_id:
+                self.duplicates_found += 1
+            while len(self._signatures) > self.max_incidents:
+                self._remove_locked(next(iter(self._signatures)))
+        return group if group != incident_id else None
+
+    def canonical(self, incident_id: str) -> Optional[str]:
+        return self._group_of.get(incident_id)
+
+    def group(self, incident_id: str) -> List[str]:
+        """All indexed incidents in ``incident_id``'s group, canonical first."""
+        with self._lock:
+            group = self._group_of.get(incident_id)
+            if group is None:
+                return []
+            members = sorted(self._members.get(group, ()))
+        return sorted(members, key=lambda m: m != group)
+
+    def store_result(self, incident_id: str, data: Dict[str, Any], key: Hashable) -> None:
+        """Remember a successful LLM extraction for ``incident_id``'s group.
+
+        ``key`` (usually an `identifier_fingerprint`) must match for the result
+        to be reused.
+        """
+        with self._lock:
+            group = self._group_of.get(incident_id)
+            if group is None:
+                return
+            self._results[group] = (key, data)
+            self._results.move_to_end(group)
+            while len(self._results) > self.max_incidents:
+                self._results.popitem(last=False)
+
+    def reusable_result(self, incident_id: str, key: Hashable) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """(canonical id, stored extraction) when a near-duplicate with the same ``key`` was already extracted."""
+        with self._lock:
+            group = self._group_of.get(incident_id)
+            # the canonical incident itself is always extracted
+            if group is None or group == incident_id:
+                return None
+            stored = self._results.get(group)
+            if stored is None or stored[0] != key:
+                return None
+            self.results_reused += 1
+            return group, stored[1]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "incidents": len(self._signatures),
+                "groups_with_duplicates": sum(1 for m in self._members.values() if len(m) > 1),
+                "duplicates_found": self.duplicates_found,
+                "results_stored": len(self._results),
+                "results_reused": self.results_reused,
+                "threshold": self.threshold,
+            }
+
+
+_INDEX: Optional[DuplicateIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_index() -> DuplicateIndex:
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                _INDEX = DuplicateIndex(settings.DEDUP_THRESHOLD, settings.DEDUP_MAX_INCIDENTS)
+    return _INDEX
+
+
+def observe(incident: Dict[str, Any]) -> Optional[str]:
+    """Index an incident if dedup is enabled; returns its canonical ID when it is a duplicate."""
+    if not settings.DEDUP_ENABLED:
+        return None
+    try:
+        incident_id = incident.get("id")
+        return get_index().add(str(incident_id), incident_text(incident)) if incident_id else None
+    except Exception as e:
+        logger.error(f"Duplicate detection failed for incident {incident.get('id')}: {e}")
+        return None
@@ -7,10 +7,13 @@ from typing import Any, Dict, Optional
 
 from .config import CHANNEL_MAP
 from .normalizer import normalize_dict
+from .ticket_classifier import classify_fallback
+from utils.tracing import traced
 
 
+@traced("extraction.detect_ticket_type")
 def detect_ticket_type(data: Dict[str, Any]) -> Optional[str]:
-    norm = normalize_dict(data)
+    norm = normalize_dict(data, view=True)
 
     # 1) channel takes precedence
     if "channel" in norm:
@@ -44,4 +47,5 @@ def detect_ticket_type(data: Dict[str, Any]) -> Optional[str]:
     if "round id" in norm and "player id" in norm:
         return "stuck open round"
 
-    return None
+    # 4) learned fallback; None without a trained model or when it is unsure
+    return classify_fallback(data)
@@ -32,6 +32,8 @@ except Exception:
     from services.detector import detect_ticket_type
     from services.validator import extract_via_model
 
+from utils.metrics import EXTRACTIONS
+
 
 # Extractors are discovered at runtime via the extractor registry so that
 # adding new ticket types doesn't require editing this module. The registry
@@ -66,6 +68,11 @@ class ExtractionService:
             self.registered_types = []
 
     def extract(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        result = self._extract(data)
+        EXTRACTIONS.inc(ticket_type=result.get("ticket_type") or "unknown", outcome=_outcome(result))
+        return result
+
+    def _extract(self, data: Dict[str, Any]) -> Dict[str, Any]:
         if not isinstance(data, dict):
             return {"success": False, "ticket_type": None, "missing_fields": None, "errors": ["data must be a dict"], "model": None}
 
@@ -93,6 +100,17 @@ class ExtractionService:
         return {"success": True, "ticket_type": canon, "missing_fields": None, "errors": None, "model": extracted}
 
 
+def _outcome(result: Dict[str, Any]) -> str:
+    """Classify an extraction result for metrics."""
+    if result.get("success"):
+        return "success"
+    if result.get("missing_fields"):
+        return "missing_fields"
+    if result.get("ticket_type") is None:
+        return "undetected"
+    return "invalid"
+
+
 def extract_ticket(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """Backward-compatible simple function that returns the model dict or None.
 
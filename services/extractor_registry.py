@@ -4,12 +4,15 @@ This module discovers classes inheriting `BaseExtractor` under
 `services.extractors` and registers them by their canonical `ticket_type`.
 
 New extractor modules are picked up automatically (no registry edit needed).
+Discovery runs on first lookup (or from the app lifespan via `warm_up`),
+not at import time.
 """
 import importlib
 import inspect
 import pkgutil
 import os
-from typing import Dict
+import threading
+from typing import Dict, Optional
 
 from services.extractors.base import BaseExtractor
 
@@ -37,14 +40,29 @@ def discover_extractors() -> Dict[str, BaseExtractor]:
     return registry
 
 
-_REGISTRY = discover_extractors()
+_REGISTRY: Optional[Dict[str, BaseExtractor]] = None
+_LOCK = threading.Lock()
+
+
+def _registry() -> Dict[str, BaseExtractor]:
+    global _REGISTRY
+    if _REGISTRY is None:
+        with _LOCK:
+            if _REGISTRY is None:
+                _REGISTRY = discover_extractors()
+    return _REGISTRY
+
+
+def warm_up() -> int:
+    """Discover extractors now; returns the number registered."""
+    return len(_registry())
 
 
 def get_extractor_for(ticket_type: str):
     if not ticket_type:
         return None
-    return _REGISTRY.get(ticket_type.lower())
+    return _registry().get(ticket_type.lower())
 
 
 def list_registered_types():
-    return list(_REGISTRY.keys())
+    return list(_registry().keys())
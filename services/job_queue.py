@@ -0,0 +1,282 @@
+"""
+Durable local job queue backed by SQLite.
+
+Each row is one (incident, lastModified) version, so re-polling an
+unchanged incident is a no-op while a changed incident is enqueued again.
+Jobs move pending -> processing -> done, or back to pending with an
+exponential backoff on failure until `max_attempts` is reached, at which
+point they are parked as dead letters.
+
+A claimed job records its owner (``host:pid:token``) so several processes
+can share the queue: a process hands back only its own jobs when it stops,
+and other processing jobs are reclaimed only once their owner is gone (a
+dead pid on this host) or their lease (`requeue_stale`) has expired.
+
+All methods are synchronous and guarded by a lock; async callers should
+run them in an executor.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional
+
+PENDING = "pending"
+PROCESSING = "processing"
+DONE = "done"
+DEAD = "dead"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    incident_id TEXT NOT NULL,
+    version TEXT NOT NULL,
+    support_group TEXT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    result TEXT,
+    enqueued_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    claimed_by TEXT,
+    last_seen_poll REAL,
+    UNIQUE (incident_id, version)
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_status_available ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS ix_jobs_finished ON jobs (status, finished_at);
+"""
+
+
+def incident_version(incident: Dict[str, Any]) -> str:
+    """Return the value that identifies a change to an incident."""
+    for key in ("lastModifiedInSeconds", "lastModified"):
+        if incident.get(key) not in (None, ""):
+            return str(incident[key])
+    return ""
+
+
+def _is_dead(owner: str, host: str) -> bool:
+    """True when ``owner`` (host:pid:token) is a process on ``host`` that has exited."""
+    owner_host, pid, _token = (owner.rsplit(":", 2) + ["", ""])[:3]
+    if owner_host != host or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False  # exists but belongs to another user
+    return False
+
+
+class SQLiteJobQueue:
+    """Persistent incident work queue with retry and dead-letter semantics."""
+
+    def __init__(self, path: str, max_attempts: int = 5, backoff_seconds: float = 30.0,
+                 owner: Optional[str] = None) -> None:
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "claimed_by" not in columns:
+            # queues created before claims had owners
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN claimed_by TEXT")
+        if "last_seen_poll" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN last_seen_poll REAL")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def enqueue(self, incident: Dict[str, Any], support_group: Optional[str] = None,
+                seen_at: Optional[float] = None) -> bool:
+        """Enqueue an incident version; return False if it was already queued.
+
+        ``seen_at`` identifies the poll that returned the incident (its start
+        time) and is recorded on the version even when it was already queued,
+        so `iter_latest_payloads` can skip incidents a later poll no longer saw.
+        """
+        now = time.time()
+        incident_id, version = str(incident.get("id", "")), incident_version(incident)
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (incident_id, version, support_group, payload, enqueued_at, available_at, "
+                "last_seen_poll) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (incident_id, version, support_group, json.dumps(incident, default=str), now, now, seen_at),
+            )
+            if cur.rowcount > 0:
+                return True
+            if seen_at is not None:
+                self._conn.execute(
+                    "UPDATE jobs SET last_seen_poll = ?, support_group = ? WHERE incident_id = ? AND version = ?",
+                    (seen_at, support_group, incident_id, version),
+                )
+            return False
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest available pending job to processing."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? AND available_at <= ? ORDER BY available_at, id LIMIT 1",
+                    (PENDING, now),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?, claimed_by = ? WHERE id = ?",
+                    (PROCESSING, now, self.owner, row["id"]),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        job = dict(row)
+        job["attempts"] += 1
+        job["status"] = PROCESSING
+        job["claimed_by"] = self.owner
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+    def complete(self, job_id: int, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, last_error = NULL, finished_at = ? WHERE id = ?",
+                (DONE, json.dumps(result, default=str), time.time(), job_id),
+            )
+
+    def fail(self, job_id: int, error: str, result: Optional[Dict[str, Any]] = None) -> str:
+        """Record a failure; retry with backoff or dead-letter. Returns the new status."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            attempts = row["attempts"] if row else self.max_attempts
+            if attempts >= self.max_attempts:
+                status, available_at = DEAD, now
+            else:
+                status, available_at = PENDING, now + self.backoff_seconds * (2 ** (attempts - 1))
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, last_error = ?, result = ?, available_at = ?, finished_at = ? WHERE id = ?",
+                (status, error, json.dumps(result, default=str) if result is not None else None,
+                 available_at, now if status == DEAD else None, job_id),
+            )
+        return status
+
+    def requeue_stale(self, older_than_seconds: float) -> int:
+        """Return jobs processing for longer than ``older_than_seconds`` (an expired lease) to pending."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, claimed_by = NULL WHERE status = ? AND started_at <= ?",
+                (PENDING, now, PROCESSING, now - older_than_seconds),
+            )
+            return cur.rowcount
+
+    def release_claims(self) -> int:
+        """Return this queue's own processing jobs to pending (on shutdown), refunding the attempt."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, attempts = MAX(attempts - 1, 0), claimed_by = NULL "
+                "WHERE status = ? AND claimed_by = ?",
+                (PENDING, time.time(), PROCESSING, self.owner),
+            )
+            return cur.rowcount
+
+    def requeue_orphaned(self) -> int:
+        """Return processing jobs claimed by processes on this host that no longer exist to pending."""
+        host = socket.gethostname()
+        with self._lock:
+            owners = [row["claimed_by"] for row in self._conn.execute(
+                "SELECT DISTINCT claimed_by FROM jobs WHERE status = ?", (PROCESSING,))]
+        # unowned processing jobs predate claim owners and are only recovered by lease expiry
+        dead = [owner for owner in owners if owner and owner != self.owner and _is_dead(owner, host)]
+        requeued = 0
+        with self._lock:
+            for owner in dead:
+                requeued += self._conn.execute(
+                    "UPDATE jobs SET status = ?, available_at = ?, claimed_by = NULL WHERE status = ? AND claimed_by = ?",
+                    (PENDING, time.time(), PROCESSING, owner),
+                ).rowcount
+        return requeued
+
+    def retry_dead(self, job_id: int) -> bool:
+        """Move a dead-lettered job back to pending with a fresh attempt budget."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, finished_at = NULL WHERE id = ? AND status = ?",
+                (PENDING, time.time(), job_id, DEAD),
+            )
+            return cur.rowcount > 0
+
+    def list_jobs(self, status: str, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, incident_id, version, support_group, status, attempts, last_error, result, "
+                "enqueued_at, started_at, finished_at FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ? OFFSET ?",
+                (status, limit, offset),
+            ).fetchall()
+        jobs = []
+        for row in rows:
+            job = dict(row)
+            job["result"] = json.loads(job["result"]) if job["result"] else None
+            jobs.append(job)
+        return jobs
+
+    def iter_latest_payloads(self, support_group: Optional[str] = None, seen_since: Optional[float] = None,
+                             batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Yield the newest stored version of each incident, in batches so memory stays bounded.
+
+        With ``seen_since`` (the start of the last complete poll) only incidents
+        that poll returned are yielded; closed or reassigned ones drop out.
+        """
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT j.id, j.payload FROM jobs j WHERE j.id > ? AND (? IS NULL OR j.support_group = ?) "
+                    "AND (? IS NULL OR j.last_seen_poll >= ?) "
+                    "AND j.id = (SELECT MAX(id) FROM jobs WHERE incident_id = j.incident_id) "
+                    "ORDER BY j.id LIMIT ?",
+                    (last_id, support_group, support_group, seen_since, seen_since, batch_size),
+                ).fetchall()
+            for row in rows:
+                yield json.loads(row["payload"])
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1]["id"]
+
+    def stats(self, rate_window_seconds: float = 300.0) -> Dict[str, Any]:
+        """Return depth per status, lag of the oldest pending job and recent processing rate."""
+        now = time.time()
+        with self._lock:
+            counts = {row["status"]: row["n"] for row in self._conn.execute(
+                "SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")}
+            oldest = self._conn.execute(
+                "SELECT MIN(enqueued_at) AS t FROM jobs WHERE status IN (?, ?)", (PENDING, PROCESSING)).fetchone()["t"]
+            recent = self._conn.execute(
+                "SELECT COUNT(*) AS n FROM jobs WHERE status = ? AND finished_at >= ?",
+                (DONE, now - rate_window_seconds)).fetchone()["n"]
+        return {
+            "depth": {s: counts.get(s, 0) for s in (PENDING, PROCESSING, DONE, DEAD)},
+            "lag_seconds": round(now - oldest, 3) if oldest is not None else 0.0,
+            "processed_per_minute": round(recent / rate_window_seconds * 60, 3),
+            "rate_window_seconds": rate_window_seconds,
+        }
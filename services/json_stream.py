@@ -0,0 +1,287 @@
+"""
+Incremental parsing of large JSON responses.
+
+Canvas list responses look like ``{"@odata.context": ..., "value": [ ... ]}``.
+`iter_array_items` yields the elements of the top-level ``value`` array as
+the response bytes arrive, so a 10k-incident page never exists in memory as
+one bytes object plus one full object tree; only the current chunk and the
+incident being decoded do.
+
+The optional ``ijson`` package (C backend when available) is used when
+installed. Otherwise a small fallback scans the object prefix for the key and
+decodes one array element at a time with `json.JSONDecoder.raw_decode`.
+Keys of the top-level object other than ``key`` are skipped.
+
+`ObjectMemberParser` does the same for the members of one object streamed as
+text, e.g. LLM tool-call arguments: each ``(key, value)`` is yielded as soon
+as its value is complete.
+"""
+import codecs
+import json
+from typing import Any, AsyncIterator, Iterator, Optional, Tuple
+
+try:
+    import ijson
+except ImportError:  # optional dependency
+    ijson = None
+
+_WHITESPACE = " \t\n\r"
+
+
+class _AsyncChunkReader:
+    """Adapts an async iterator of byte chunks to the ``async read(n)`` ijson expects."""
+
+    def __init__(self, chunks: AsyncIterator[bytes]) -> None:
+        self._chunks = chunks.__aiter__()
+        self._buffer = b""
+
+    async def read(self, n: int = -1) -> bytes:
+        while not self._buffer:
+            try:
+                self._buffer = await self._chunks.__anext__()
+            except StopAsyncIteration:
+                return b""
+        if n < 0 or n >= len(self._buffer):
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:n], self._buffer[n:]
+        return data
+
+
+class ArrayItemParser:
+    """Push parser yielding the elements of ``obj[key]`` from text fed in pieces.
+
+    Usage:
+        parser = ArrayItemParser("value")
+        for chunk in chunks:
+            yield from parser.feed(chunk)
+        yield from parser.close()
+    """
+
+    def __init__(self, key: str = "value") -> None:
+        self.key = key
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        # prefix scanning state (_resume: where scanning continues in _buf)
+        self._resume = 0
+        self._state = "prefix"  # prefix -> array -> done
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._expect_colon = False
+        self._found_key = False
+
+    def feed(self, data: bytes) -> Iterator[Any]:
+        self._buf = self._buf[self._pos:] + self._text_decoder.decode(data)
+        self._pos = 0
+        if self._state == "prefix":
+            self._scan_prefix()
+        if self._state == "array":
+            yield from self._items(final=False)
+
+    def close(self) -> Iterator[Any]:
+        """Yield any element held back at the end of input and check the array was closed."""
+        self._buf = self._buf[self._pos:] + self._text_decoder.decode(b"", final=True)
+        self._pos = 0
+        if self._state == "array":
+            yield from self._items(final=True)
+        if self._state == "array" or (self._state == "prefix" and self._found_key):
+            raise ValueError(f"Truncated JSON: '{self.key}' array is incomplete")
+
+    def _scan_prefix(self) -> None:
+        """Walk the top-level object until ``"key": [``; nested values are skipped."""
+        buf = self._buf
+        i = self._resume
+        n = len(buf)
+        while i < n:
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = json.loads(buf[self._string_start:i + 1])
+                    # a string directly inside the top-level object followed by ':' is a key
+                    self._expect_colon = self._depth == 1
+                i += 1
+                continue
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":":
+                self._found_key = self._expect_colon and self._last_string == self.key
+                self._expect_colon = False
+            elif ch in "{[":
+                if ch == "[" and self._depth == 1 and self._found_key:
+                    self._state = "array"
+                    self._depth = 2
+                    self._pos = i + 1
+                    return
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._state = "done"
+                    self._pos = n
+                    return
+            elif ch not in _WHITESPACE and self._depth == 1:
+                self._expect_colon = False
+            i += 1
+        # keep an unfinished string so it can be decoded once complete
+        if self._in_string:
+            self._buf = buf[self._string_start:]
+            self._resume = n - self._string_start
+            self._string_start = 0
+        else:
+            self._buf = ""
+            self._resume = 0
+        self._pos = 0
+
+    def _items(self, final: bool) -> Iterator[Any]:
+        buf = self._buf
+        n = len(buf)
+        while True:
+            i = self._pos
+            while i < n and (buf[i] in _WHITESPACE or buf[i] == ","):
+                i += 1
+            self._pos = i
+            if i >= n:
+                return
+            if buf[i] == "]":
+                self._state = "done"
+                self._pos = n
+                return
+            try:
+                item, end = self._decoder.raw_decode(buf, i)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                return  # element incomplete: wait for more bytes
+            if not isinstance(item, (dict, list, str)):
+                # a number (or true/false/null) is only complete once its delimiter is in: "2500." + "0"
+                j = end
+                while j < n and buf[j] in _WHITESPACE:
+                    j += 1
+                if j >= n and not final:
+                    return
+                if j < n and buf[j] not in ",]":
+                    if final:
+                        raise ValueError(f"Unexpected {buf[j]!r} at position {j}")
+                    return
+            self._pos = end
+            yield item
+
+
+class ObjectMemberParser:
+    """Push parser yielding ``(key, value)`` for each member of a JSON object fed as text in pieces.
+
+    Usage:
+        parser = ObjectMemberParser()
+        for delta in deltas:
+            for key, value in parser.feed(delta):
+                ...
+        for key, value in parser.close():
+            ...
+    """
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._state = "start"  # start -> key <-> value -> done
+        self._key: Optional[str] = None
+
+    def feed(self, text: str) -> Iterator[Tuple[str, Any]]:
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+        yield from self._members(final=False)
+
+    def close(self) -> Iterator[Tuple[str, Any]]:
+        """Yield a member held back at the end of input and check the object was closed."""
+        yield from self._members(final=True)
+        if self._state != "done":
+            raise ValueError("Truncated JSON: object is incomplete")
+
+    def _members(self, final: bool) -> Iterator[Tuple[str, Any]]:
+        buf = self._buf
+        n = len(buf)
+        while self._state != "done":
+            i = self._pos
+            while i < n and buf[i] in _WHITESPACE:
+                i += 1
+            self._pos = i
+            if i >= n:
+                return
+            if self._state == "start":
+                if buf[i] != "{":
+                    raise ValueError("Expected a JSON object")
+                self._state = "key"
+                self._pos = i + 1
+                continue
+            if self._state == "key":
+                if buf[i] == ",":
+                    self._pos = i + 1
+                    continue
+                if buf[i] == "}":
+                    self._state = "done"
+                    self._pos = i + 1
+                    return
+                try:
+                    key, end = self._decoder.raw_decode(buf, i)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    return  # key incomplete: wait for more text
+                while end < n and buf[end] in _WHITESPACE:
+                    end += 1
+                if end >= n:
+                    return  # the ':' is still to come
+                if not isinstance(key, str) or buf[end] != ":":
+                    raise ValueError(f"Expected a key and ':' at position {i}")
+                self._key = key
+                self._state = "value"
+                self._pos = end + 1
+                continue
+            try:
+                value, end = self._decoder.raw_decode(buf, i)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                return  # value incomplete: wait for more text
+            if not isinstance(value, (dict, list, str)):
+                # a number (or true/false/null) is only complete once its delimiter is in: "-1500." + "0"
+                j = end
+                while j < n and buf[j] in _WHITESPACE:
+                    j += 1
+                if j >= n and not final:
+                    return
+                if j < n and buf[j] not in ",}":
+                    if final:
+                        raise ValueError(f"Unexpected {buf[j]!r} at position {j}")
+                    return
+            self._state = "key"
+            self._pos = end
+            yield self._key, value
+
+
+async def iter_array_items(chunks: AsyncIterator[bytes], key: str = "value",
+                           use_ijson: Optional[bool] = None) -> AsyncIterator[Any]:
+    """Yield the elements of the ``key`` array of a JSON object streamed as byte chunks."""
+    if use_ijson is None:
+        use_ijson = ijson is not None
+    if use_ijson:
+        async for item in ijson.items_async(_AsyncChunkReader(chunks), f"{key}.item", use_float=True):
+            yield item
+        return
+    parser = ArrayItemParser(key)
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+    for item in parser.close():
+        yield item
@@ -0,0 +1,174 @@
+"""
+Cost-aware routing of LLM extractions between two deployments.
+
+Every extraction used to go to the large deployment
+(`AZURE_OPENAI_DEPLOYMENT_NAME`). Most notes follow the support form
+("Round ID: ...", "Casino ID: ...") or are short, and the small deployment
+(`OPENAI_MODEL`) extracts those just as well for a fraction of the cost and
+latency. `choose_route` sends such notes to the small model; long free-form
+notes go straight to the large one. A small-model answer is escalated to the
+large model when it is unusable (no tool call, invalid JSON, fails
+`ExtractedNotes` validation) or comes back with "N/A" for a field whose label
+is present in the notes (see `escalation_reason`), and so is a small-model
+call that fails (API error such as a 404 for a missing deployment,
+connection error, or its circuit is open). The small deployment has its own
+circuit breaker (`utils.resilience.AZURE_OPENAI_SMALL`). Routing is off unless
+`LLM_ROUTING_ENABLED` is set.
+
+Latency, cost (token usage priced by `LLM_PRICES`) and escalation rate are
+tracked per route in `STATS` and exported as metrics.
+"""
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+from config.settings import settings
+from schemas.extraction import ExtractedNotes
+from utils.metrics import LLM_COST, LLM_ROUTES
+
+ROUTES = ("small", "large")
+
+# field name -> label it is written under in the support form ("Round ID", "Casino ID", ...)
+FORM_LABELS: Dict[str, str] = {
+    name: field.alias for name, field in ExtractedNotes.model_fields.items() if field.alias
+}
+_LABEL_PATTERNS = {
+    name: re.compile(rf"^[ \t]*{re.escape(label)}[ \t]*:[ \t]*\S", re.IGNORECASE | re.MULTILINE)
+    for name, label in FORM_LABELS.items()
+}
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or str(value).strip().upper() in ("", "N/A", "NA", "NONE", "UNKNOWN")
+
+
+def labelled_fields(notes: str) -> Tuple[str, ...]:
+    """Fields whose form label appears in ``notes`` with a value after it."""
+    return tuple(name for name, pattern in _LABEL_PATTERNS.items() if pattern.search(notes))
+
+
+def choose_route(notes: str) -> Tuple[str, str]:
+    """(route, reason) for ``notes``: ``small`` for short or form-structured notes."""
+    small, large = settings.OPENAI_MODEL, settings.AZURE_OPENAI_DEPLOYMENT_NAME
+    if not settings.LLM_ROUTING_ENABLED or not small or small == large:
+        return "large", "disabled"
+    if len(notes) <= settings.LLM_ROUTING_SHORT_NOTES_CHARS:
+        return "small", "short"
+    if len(notes) <= settings.LLM_ROUTING_MAX_SMALL_NOTES_CHARS and \
+            len(labelled_fields(notes)) >= settings.LLM_ROUTING_MIN_FORM_LABELS:
+        return "small", "structured"
+    return "large", "unstructured"
+
+
+def model_for(route: str) -> str:
+    return settings.OPENAI_MODEL if route == "small" else settings.AZURE_OPENAI_DEPLOYMENT_NAME
+
+
+def escalation_reason(extracted: ExtractedNotes, notes: str) -> Optional[str]:
+    """Why a small-model extraction should be redone by the large model, or None to accept it.
+
+    "N/A" is a legitimate answer for fields the notes don't mention; it only
+    counts as a miss when the field's form label is in the notes with a value.
+    """
+    if any(_is_empty(getattr(extracted, name, None)) for name in labelled_fields(notes)):
+        return "missed_fields"
+    return None
+
+
+# identifiers a packed answer could attach to the wrong incident
+PACK_IDENTIFIERS = ("round_id", "casino_id", "player_login")
+
+
+def _squash(text: str) -> str:
+    return re.sub(r"\s+", "", text).casefold()
+
+
+def foreign_identifiers(extracted: ExtractedNotes, notes: str) -> bool:
+    """True if an identifier in ``extracted`` does not occur in ``notes`` (e.g. taken from another incident of a pack)."""
+    text = _squash(notes)
+    return any(not _is_empty(value) and _squash(str(value)) not in text
+               for value in (getattr(extracted, name, None) for name in PACK_IDENTIFIERS))
+
+
+def parse_prices(value: str) -> Dict[str, Tuple[float, float]]:
+    """``"gpt-4o=2.5/10,gpt-4o-mini=0.15/0.6"`` -> model -> (input, output) USD per 1M tokens."""
+    prices: Dict[str, Tuple[float, float]] = {}
+    for item in value.split(","):
+        name, sep, pair = item.rpartition("=")
+        prompt, slash, completion = pair.partition("/")
+        try:
+            if sep and slash and name.strip():
+                prices[name.strip()] = (float(prompt), float(completion))
+        except ValueError:
+            continue
+    return prices
+
+
+_PRICES: Optional[Dict[str, Tuple[float, float]]] = None
+
+
+def cost(model: str, completion: Any) -> float:
+    """USD cost of one completion from its reported usage (0 for unpriced models)."""
+    global _PRICES
+    if _PRICES is None:
+        _PRICES = parse_prices(settings.LLM_PRICES)
+    usage = getattr(completion, "usage", None)
+    price = _PRICES.get(model)
+    if usage is None or price is None:
+        return 0.0
+    value = ((getattr(usage, "prompt_tokens", 0) or 0) * price[0]
+             + (getattr(usage, "completion_tokens", 0) or 0) * price[1]) / 1_000_000
+    if value:
+        LLM_COST.inc(value, model=model)
+    return value
+
+
+class RoutingStats:
+    """Per-route counts, latency, cost and escalations of routed extractions."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes = {route: {"calls": 0, "escalated": 0, "latency_s": 0.0, "cost_usd": 0.0,
+                                "reasons": Counter(), "escalation_reasons": Counter()} for route in ROUTES}
+
+    def record(self, route: str, reason: str, latency: float, cost_usd: float,
+               escalated: Optional[str] = None) -> None:
+        with self._lock:
+            entry = self._routes[route]
+            entry["calls"] += 1
+            entry["latency_s"] += latency
+            entry["cost_usd"] += cost_usd
+            entry["reasons"][reason] += 1
+            if escalated:
+                entry["escalated"] += 1
+                entry["escalation_reasons"][escalated] += 1
+        LLM_ROUTES.inc(route=route, outcome="escalated" if escalated else "accepted")
+
+    def spend(self, route: str, latency: float, cost_usd: float) -> None:
+        """Add time and cost that belong to no single extraction (a packed answer that was discarded)."""
+        with self._lock:
+            entry = self._routes[route]
+            entry["latency_s"] += latency
+            entry["cost_usd"] += cost_usd
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {}
+            for route, entry in self._routes.items():
+                calls = entry["calls"]
+                routes[route] = {
+                    "model": model_for(route),
+                    "calls": calls,
+                    "escalated": entry["escalated"],
+                    "escalation_rate": round(entry["escalated"] / calls, 4) if calls else None,
+                    "avg_latency_ms": round(entry["latency_s"] / calls * 1000, 1) if calls else None,
+                    "cost_usd": round(entry["cost_usd"], 6),
+                    "avg_cost_usd": round(entry["cost_usd"] / calls, 6) if calls else None,
+                    "reasons": dict(entry["reasons"]),
+                    "escalation_reasons": dict(entry["escalation_reasons"]),
+                }
+        return {"enabled": settings.LLM_ROUTING_ENABLED, "routes": routes}
+
+
+STATS = RoutingStats()
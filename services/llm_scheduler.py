@@ -0,0 +1,253 @@
+"""
+Priority-aware admission of LLM extraction calls.
+
+Extraction calls used to reach the Azure OpenAI upstream in arrival order,
+so under load a Severity A incident queued behind a backlog of low-priority
+ones. `LLMScheduler` sits in front of the upstream and decides which waiting
+call goes next whenever a slot frees up:
+
+1. priority class first (``critical`` > ``high`` > ``medium`` > ``low``,
+   from the incident's priority, severity and `slmStatus`); a call moves up
+   one class for every `LLM_SCHEDULER_AGING_SECONDS` it has waited, so low
+   priority work is delayed but never starved;
+2. within a class, weighted fair queuing across support groups: each call
+   gets a virtual finish tag advanced by ``1 / weight`` of its group
+   (`LLM_SCHEDULER_GROUP_WEIGHTS`), so one group's burst cannot monopolise
+   the LLM;
+3. FIFO among equal tags.
+
+At most `LLM_SCHEDULER_MAX_CONCURRENCY` calls are admitted, and never more
+than the upstream's current adaptive concurrency limit, so when the LLM is
+saturated calls wait here (in priority order) rather than in the upstream's
+first-come limiter. Only cache misses are scheduled; cached extractions
+return immediately. Queue wait per priority class is exported as the
+``llm_queue_wait_seconds`` histogram and in `stats()`.
+"""
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config.settings import settings
+from utils.metrics import REGISTRY
+
+PRIORITY_CLASSES = ("critical", "high", "medium", "low")
+
+# waiters re-check on this interval as well, since the upstream's limit can grow without a notify
+_POLL_SECONDS = 0.25
+
+LLM_QUEUE_WAIT = REGISTRY.histogram(
+    "llm_queue_wait_seconds", "Time LLM extractions waited for a scheduler slot", ["priority_class"])
+
+
+def priority_class(incident: Optional[Dict[str, Any]]) -> str:
+    """Scheduling class of an incident from its priority, severity and SLA status."""
+    incident = incident or {}
+    priority = str(incident.get("priority") or "").strip().lower()
+    severity = str(incident.get("severity") or "").strip().lower()
+    slm = str(incident.get("slmStatus") or "").lower()
+    if priority == "critical" or severity == "severity a" or "breach" in slm or "missed" in slm:
+        return "critical"
+    if priority == "high" or severity == "severity b" or "warning" in slm or "risk" in slm:
+        return "high"
+    if priority == "medium" or severity == "severity c":
+        return "medium"
+    return "low"
+
+
+def parse_group_weights(value: str) -> Dict[str, float]:
+    """``"Group A=3,Group B=0.5"`` -> weights; malformed entries are ignored."""
+    weights: Dict[str, float] = {}
+    for item in value.split(","):
+        name, sep, weight = item.rpartition("=")
+        try:
+            if sep and name.strip() and float(weight) > 0:
+                weights[name.strip()] = float(weight)
+        except ValueError:
+            continue
+    return weights
+
+
+class _Waiter:
+    __slots__ = ("rank", "group", "finish", "seq", "enqueued", "granted", "cond")
+
+    def __init__(self, rank: int, group: str, finish: float, seq: int, enqueued: float,
+                 lock: threading.Lock) -> None:
+        self.rank = rank
+        self.group = group
+        self.finish = finish
+        self.seq = seq
+        self.enqueued = enqueued
+        self.granted = False
+        # one condition per waiter on the shared lock: a release wakes only the waiter it admits
+        self.cond = threading.Condition(lock)
+
+
+class LLMScheduler:
+    """Thread-safe priority + weighted-fair-queuing admission gate."""
+
+    def __init__(self, max_concurrency: int = 8, aging_seconds: float = 60.0,
+                 group_weights: Optional[Dict[str, float]] = None,
+                 capacity: Optional[Callable[[], int]] = None, history: int = 1000) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.aging_seconds = aging_seconds
+        self.group_weights = group_weights or {}
+        self._capacity = capacity
+        self._lock = threading.Lock()
+        self._waiting: List[_Waiter] = []
+        self._last_finish: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._seq = 0
+        self.in_flight = 0
+        self._waits: Dict[str, deque] = {c: deque(maxlen=history) for c in PRIORITY_CLASSES}
+        self._admitted: Dict[str, int] = {c: 0 for c in PRIORITY_CLASSES}
+
+    def capacity(self) -> int:
+        """Calls admitted at once: the configured cap, or the upstream's lower current limit."""
+        if self._capacity is None:
+            return self.max_concurrency
+        try:
+            return max(1, min(self.max_concurrency, int(self._capacity())))
+        except Exception:
+            return self.max_concurrency
+
+    def _effective_rank(self, waiter: _Waiter, now: float) -> int:
+        if self.aging_seconds <= 0:
+            return waiter.rank
+        return max(0, waiter.rank - int((now - waiter.enqueued) // self.aging_seconds))
+
+    def _dispatch_locked(self) -> None:
+        """Admit the best waiters while there is capacity."""
+        capacity = self.capacity()
+        while self._waiting and self.in_flight < capacity:
+            now = time.monotonic()
+            waiter = min(self._waiting, key=lambda w: (self._effective_rank(w, now), w.finish, w.seq))
+            self._waiting.remove(waiter)
+            self._admit_locked(waiter, now)
+            waiter.cond.notify()
+
+    def _admit_locked(self, waiter: _Waiter, now: float) -> None:
+        waiter.granted = True
+        # start tag of the call entering service
+        self._virtual_time = max(self._virtual_time, waiter.finish - 1.0 / self.group_weights.get(waiter.group, 1.0))
+        self.in_flight += 1
+        klass = PRIORITY_CLASSES[waiter.rank]
+        self._waits[klass].append(now - waiter.enqueued)
+        self._admitted[klass] += 1
+
+    def acquire(self, klass: str = "low", group: Optional[str] = None, timeout: Optional[float] = None) -> float:
+        """Block until this call may run; returns seconds waited. Raises TimeoutError after ``timeout``."""
+        rank = PRIORITY_CLASSES.index(klass) if klass in PRIORITY_CLASSES else len(PRIORITY_CLASSES) - 1
+        group = group or "unknown"
+        enqueued = time.monotonic()
+        with self._lock:
+            start = max(self._virtual_time, self._last_finish.get(group, 0.0))
+            finish = start + 1.0 / self.group_weights.get(group, 1.0)
+            self._last_finish[group] = finish
+            self._seq += 1
+            waiter = _Waiter(rank, group, finish, self._seq, enqueued, self._lock)
+            if not self._waiting and self.in_flight < self.capacity():
+                self._admit_locked(waiter, enqueued)
+            else:
+                self._waiting.append(waiter)
+                try:
+                    while not waiter.granted:
+                        remaining = None if timeout is None else timeout - (time.monotonic() - enqueued)
+                        if remaining is not None and remaining <= 0:
+                            raise TimeoutError(f"Waited {timeout}s for an LLM slot")
+                        waiter.cond.wait(_POLL_SECONDS if remaining is None else min(_POLL_SECONDS, remaining))
+                        if not waiter.granted:
+                            # the upstream's limit may have grown without a release
+                            self._dispatch_locked()
+                except BaseException:
+                    if waiter.granted:
+                        # admitted while being interrupted: hand the slot on
+                        self.in_flight -= 1
+                        self._dispatch_locked()
+                    else:
+                        self._waiting.remove(waiter)
+                    raise
+        waited = time.monotonic() - enqueued
+        LLM_QUEUE_WAIT.observe(waited, priority_class=PRIORITY_CLASSES[rank])
+        return waited
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._dispatch_locked()
+
+    @contextmanager
+    def slot(self, incident: Optional[Dict[str, Any]] = None) -> Iterator[float]:
+        """Hold a slot for the duration of one LLM call for ``incident``; yields seconds waited."""
+        waited = self.acquire(priority_class(incident), (incident or {}).get("assignedGroup"))
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and recent queue waits (seconds) per priority class."""
+        now = time.monotonic()
+        with self._lock:
+            depth = {c: 0 for c in PRIORITY_CLASSES}
+            for waiter in self._waiting:
+                depth[PRIORITY_CLASSES[waiter.rank]] += 1
+            waits = {c: sorted(w) for c, w in self._waits.items()}
+            oldest = max((now - w.enqueued for w in self._waiting), default=0.0)
+            admitted = dict(self._admitted)
+            in_flight = self.in_flight
+
+        def quantile(values: List[float], q: float) -> Optional[float]:
+            if not values:
+                return None
+            return round(values[min(len(values) - 1, math.ceil(q * len(values)) - 1)], 3)
+
+        return {
+            "in_flight": in_flight,
+            "capacity": self.capacity(),
+            "waiting": sum(depth.values()),
+            "oldest_wait_s": round(oldest, 3),
+            "classes": {
+                c: {"waiting": depth[c], "admitted": admitted[c],
+                    "wait_p50_s": quantile(waits[c], 0.5), "wait_p95_s": quantile(waits[c], 0.95),
+                    "wait_max_s": round(waits[c][-1], 3) if waits[c] else None}
+                for c in PRIORITY_CLASSES
+            },
+        }
+
+
+_SCHEDULER: Optional[LLMScheduler] = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def _upstream_capacity() -> int:
+    from utils.resilience import AZURE_OPENAI
+
+    limiter = getattr(AZURE_OPENAI, "limiter", None)
+    return int(limiter.limit) if limiter is not None else settings.LLM_SCHEDULER_MAX_CONCURRENCY
+
+
+def get_scheduler() -> LLMScheduler:
+    global _SCHEDULER
+    if _SCHEDULER is None:
+        with _SCHEDULER_LOCK:
+            if _SCHEDULER is None:
+                _SCHEDULER = LLMScheduler(
+                    settings.LLM_SCHEDULER_MAX_CONCURRENCY,
+                    settings.LLM_SCHEDULER_AGING_SECONDS,
+                    parse_group_weights(settings.LLM_SCHEDULER_GROUP_WEIGHTS),
+                    capacity=_upstream_capacity,
+                )
+    return _SCHEDULER
+
+
+@contextmanager
+def slot(incident: Optional[Dict[str, Any]] = None) -> Iterator[float]:
+    """`LLMScheduler.slot` on the shared scheduler; a no-op when scheduling is disabled."""
+    if not settings.LLM_SCHEDULER_ENABLED:
+        yield 0.0
+        return
+    with get_scheduler().slot(incident) as waited:
+        yield waited
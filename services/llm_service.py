@@ -1,42 +1,76 @@
 """
 LLM extraction service
+
+The `openai` package and the Azure OpenAI client are loaded on first use
+(`get_client()`) rather than at import: importing `openai` accounts for
+roughly a third of process boot time, which every autoscaled container
+would otherwise pay before serving its first request.
 """
 import os
 import json
 import re
-from typing import Dict, Any
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Dict, Any, Generator, Iterator, List, Optional, Tuple
 from pydantic import ValidationError
-from openai import AzureOpenAI, APIError, APIConnectionError, APITimeoutError
 import logging
+import time
 
 
 from config.settings import settings
 from schemas.extraction import ExtractedNotes, FlattenedIncidentResponse
+from utils.metrics import LLM_IN_FLIGHT, LLM_PACKED, LLM_REQUEST_DURATION, LLM_STREAM_FIRST_FIELD, LLM_TOKENS
+from utils.tracing import current_span, traced
+from utils.resilience import AZURE_OPENAI, AZURE_OPENAI_SMALL, CircuitOpenError
+from utils import cache
+from services import llm_routing, llm_scheduler
+from services.json_stream import ObjectMemberParser
  
 logger = logging.getLogger(__name__)
  
-# Initialize OpenAI client
-try:
-    client = AzureOpenAI(
-        azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
-        api_key=settings.AZURE_OPENAI_API_KEY,  
-        api_version=settings.AZURE_OPENAI_API_VERSION
-    )
-    
-    if not settings.AZURE_OPENAI_API_KEY:
-        logger.warning("AZURE_OPENAI_API_KEY not found. LLM functions will fail.")
-        print("WARNING: AZURE_OPENAI_API_KEY not found. LLM functions will fail.")
-except Exception as e:
-    logger.error(f"Error initializing Azure OpenAI client: {e}")
-    print(f"Error initializing Azure OpenAI client: {e}")
-    client = None
- 
+_client = None
+_client_initialized = False
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the Azure OpenAI client, creating it on first use (None if it can't be built)"""
+    global _client, _client_initialized
+    if _client_initialized:
+        return _client
+    with _client_lock:
+        if _client_initialized:
+            return _client
+        try:
+            from openai import AzureOpenAI
+
+            _client = AzureOpenAI(
+                azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+                api_key=settings.AZURE_OPENAI_API_KEY,  
+                api_version=settings.AZURE_OPENAI_API_VERSION,
+                # retries are handled by the shared resilience layer (honours Retry-After)
+                max_retries=0 if settings.RESILIENCE_ENABLED else 2
+            )
+            
+            if not settings.AZURE_OPENAI_API_KEY:
+                logger.warning("AZURE_OPENAI_API_KEY not found. LLM functions will fail.")
+        except Exception as e:
+            logger.error(f"Error initializing Azure OpenAI client: {e}")
+            _client = None
+        _client_initialized = True
+    return _client
+
+
 def is_llm_available() -> bool:
     """Check if LLM is properly configured"""
-    return client is not None and settings.AZURE_OPENAI_API_KEY != ""
+    # without a key the client can't work; don't pay for importing openai to find out
+    return settings.AZURE_OPENAI_API_KEY != "" and get_client() is not None
 
 def test_llm_connection() -> bool:
     """Test the connection to Azure OpenAI"""
+    client = get_client()
     if not client:
         logger.error("Azure OpenAI client not initialized")
         return False
@@ -54,10 +88,98 @@ def test_llm_connection() -> bool:
         logger.error(f"Azure OpenAI connection test failed: {e}")
         return False
  
-def extract_notes_with_llm(notes_content: str) -> ExtractedNotes:
-    """Extract structured data from notes using LLM"""
-   
-    tools = [{
+def _record_token_usage(model: str, completion: Any) -> None:
+    """Add the completion's reported token usage to the LLM token counters"""
+    usage = getattr(completion, "usage", None)
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        value = getattr(usage, kind, None)
+        if value:
+            LLM_TOKENS.inc(value, model=model, kind=kind.replace("_tokens", ""))
+
+
+class _InvalidOutput(Exception):
+    """The model answered, but not with a usable extraction (``cost_usd`` was still spent)."""
+
+    def __init__(self, message: str, cost_usd: float = 0.0) -> None:
+        super().__init__(message)
+        self.cost_usd = cost_usd
+
+
+_SYSTEM_PROMPT = "You are an expert parser. Extract all details from the user's notes using the provided tool."
+
+
+def _upstream(model: str):
+    """Resilience policy (rate limit, circuit) for calls to ``model``"""
+    small = llm_routing.model_for("small")
+    if model == small and small != llm_routing.model_for("large"):
+        return AZURE_OPENAI_SMALL
+    return AZURE_OPENAI
+
+
+def _escalates(e: Exception) -> bool:
+    """True when a small-model call failed in a way the deployment may not (API error, unreachable, circuit open)"""
+    from openai import APIConnectionError, APIStatusError
+
+    # includes 404 DeploymentNotFound for a misconfigured OPENAI_MODEL
+    return isinstance(e, (APIStatusError, APIConnectionError, CircuitOpenError))
+
+
+def _complete(client, model: str, messages: list, tools: list, incident: Optional[Dict[str, Any]]) -> Tuple[Any, float]:
+    """One forced-tool chat completion under a scheduler slot; returns it with its cost in USD"""
+    with llm_scheduler.slot(incident) as waited:
+        current_span().set_attribute("llm.queue_wait_ms", round(waited * 1000, 1))
+        started = time.perf_counter()
+        outcome = "error"
+        LLM_IN_FLIGHT.inc()
+        try:
+            completion = _upstream(model).call(lambda: client.chat.completions.create(
+                model=model,
+                messages=messages,
+                tools=tools,
+                tool_choice={"type": "function", "function": {"name": tools[0]["function"]["name"]}},
+            ))
+            outcome = "success"
+        finally:
+            LLM_IN_FLIGHT.dec()
+            LLM_REQUEST_DURATION.observe(time.perf_counter() - started, model=model, outcome=outcome)
+    _record_token_usage(model, completion)
+    return completion, llm_routing.cost(model, completion)
+
+
+def _tool_arguments(completion: Any, tool_name: str, cost_usd: float) -> Any:
+    """Decoded arguments of the completion's ``tool_name`` call; raises `_InvalidOutput`"""
+    if not completion.choices or not completion.choices[0].message.tool_calls:
+        raise _InvalidOutput("LLM did not return a tool call as required.", cost_usd)
+    if getattr(completion.choices[0], "finish_reason", None) == "length":
+        raise _InvalidOutput("LLM output was truncated.", cost_usd)
+
+    tool_call = completion.choices[0].message.tool_calls[0]
+    if tool_call.function.name != tool_name:
+        raise _InvalidOutput("LLM returned an unexpected tool call name.", cost_usd)
+    try:
+        return json.loads(tool_call.function.arguments)
+    except ValueError as e:
+        raise _InvalidOutput(str(e), cost_usd)
+
+
+def _call_model(client, model: str, notes_content: str, incident: Optional[Dict[str, Any]],
+                tools: list) -> Tuple[ExtractedNotes, float]:
+    """One extraction call to ``model``; returns the validated result and its cost in USD"""
+    completion, cost_usd = _complete(client, model, [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": f"Extract data from the following incident notes:\n\n{notes_content}"}
+    ], tools, incident)
+    arguments = _tool_arguments(completion, "extract_incident_details", cost_usd)
+    try:
+        return ExtractedNotes.model_validate(arguments), cost_usd
+    except ValidationError as e:
+        raise _InvalidOutput(str(e), cost_usd)
+
+
+def _extraction_tools() -> list:
+    return [{
         "type": "function",
         "function": {
             "name": "extract_incident_details",
@@ -65,68 +187,445 @@ def extract_notes_with_llm(notes_content: str) -> ExtractedNotes:
             "parameters": ExtractedNotes.model_json_schema(),
         },
     }]
+
+
+def _llm_error(e: Exception) -> Exception:
+    """The error an extraction failure is reported as: RuntimeError, or CircuitOpenError as is"""
+    from openai import APIError, APIConnectionError, APITimeoutError
+
+    if isinstance(e, CircuitOpenError):
+        # surfaced as ConnectionError -> 503 by the extraction route
+        return e
+    if isinstance(e, APIConnectionError):
+        return RuntimeError(f"OpenAI Connection Error: {str(e)}")
+    if isinstance(e, APITimeoutError):
+        return RuntimeError(f"OpenAI Timeout Error: {str(e)}")
+    if isinstance(e, APIError):
+        status_code = getattr(e, 'status_code', 'Unknown')
+        return RuntimeError(f"OpenAI API Error: {status_code} - {str(e)}")
+    return RuntimeError(f"Failed to process LLM output: {e}")
+
+
+def _cache_key(notes_content: str, routed: bool) -> str:
+    # routed results are whatever routing accepted, so they don't share entries with the deployment's
+    model = f"routed:{llm_routing.model_for('small')}:{llm_routing.model_for('large')}" if routed \
+        else settings.AZURE_OPENAI_DEPLOYMENT_NAME
+    return hashlib.sha256(f"{model}\n{notes_content}".encode("utf-8")).hexdigest()
+
+
+@traced("llm.extract_notes")
+def extract_notes_with_llm(notes_content: str, incident: Optional[Dict[str, Any]] = None,
+                           escalated_from: Optional[str] = None) -> ExtractedNotes:
+    """Extract structured data from notes using LLM
+
+    ``incident`` (priority, severity, slmStatus, assignedGroup) decides the
+    call's place in the LLM scheduler queue on a cache miss. Short or
+    form-structured notes go to the small model first and are escalated to
+    the deployment when its answer is unusable or the call fails (see
+    `services.llm_routing`). ``escalated_from`` (the reason a packed small
+    answer was rejected) sends the notes straight to the deployment.
+    """
+   
+    tools = _extraction_tools()
  
+    route, reason = llm_routing.choose_route(notes_content)
+    # cached under the routed key either way: this is the answer routing ends up with
+    cache_key = _cache_key(notes_content, routed=reason != "disabled")
+    if escalated_from:
+        route, reason = "large", "escalated"
+    model = llm_routing.model_for(route)
+    current_span().set_attribute("llm.model", model)
+    current_span().set_attribute("llm.route", route)
+    current_span().set_attribute("llm.notes_chars", len(notes_content))
+
+    # identical notes extracted by any worker are reused
+    if settings.LLM_CACHE_TTL_SECONDS > 0:
+        cached = cache.get_json("llm", cache_key)
+        if cached is not None:
+            current_span().set_attribute("cache", "hit")
+            return ExtractedNotes.model_validate(cached)
+    client = get_client()
+    if client is None:
+        raise ConnectionError("Azure OpenAI client not initialized. Check API key.")
     try:
-        completion = client.chat.completions.create(
-            model=settings.AZURE_OPENAI_DEPLOYMENT_NAME,
-            messages=[
-                {"role": "system", "content": "You are an expert parser. Extract all details from the user's notes using the provided tool."},
-                {"role": "user", "content": f"Extract data from the following incident notes:\n\n{notes_content}"}
-            ],
-            tools=tools,
-            tool_choice={"type": "function", "function": {"name": "extract_incident_details"}},
-        )
- 
-        if not completion.choices or not completion.choices[0].message.tool_calls:
-            raise RuntimeError("LLM did not return a tool call as required.")
- 
-        tool_call = completion.choices[0].message.tool_calls[0]
-        if tool_call.function.name != "extract_incident_details":
-            raise RuntimeError("LLM returned an unexpected tool call name.")
-             
-        extracted_data_json = tool_call.function.arguments
-        extracted_data_dict = json.loads(extracted_data_json)
- 
-        return ExtractedNotes.model_validate(extracted_data_dict)
+        started = time.perf_counter()
+        escalated = None
+        try:
+            extracted, cost_usd = _call_model(client, model, notes_content, incident, tools)
+            if route == "small":
+                escalated = llm_routing.escalation_reason(extracted, notes_content)
+        except _InvalidOutput as e:
+            if route != "small":
+                raise
+            escalated, cost_usd = "invalid_output", e.cost_usd
+        except Exception as e:
+            if route != "small" or not _escalates(e):
+                raise
+            logger.warning(f"Small model {model} failed: {e}")
+            escalated, cost_usd = "api_error", 0.0
+        if escalated:
+            model = llm_routing.model_for("large")
+            logger.info(f"Escalating extraction to {model}: {escalated}")
+            current_span().set_attribute("llm.model", model)
+            extracted, large_cost = _call_model(client, model, notes_content, incident, tools)
+            cost_usd += large_cost
+        current_span().set_attribute("llm.escalated", escalated or "")
+        llm_routing.STATS.record(route, reason, time.perf_counter() - started, cost_usd, escalated)
+
+        if settings.LLM_CACHE_TTL_SECONDS > 0:
+            cache.set_json("llm", cache_key, extracted.model_dump(by_alias=True), ex=settings.LLM_CACHE_TTL_SECONDS)
+        return extracted
  
-    except APIConnectionError as e:
-        raise RuntimeError(f"OpenAI Connection Error: {str(e)}")
-    except APITimeoutError as e:
-        raise RuntimeError(f"OpenAI Timeout Error: {str(e)}")
-    except APIError as e:
-        status_code = getattr(e, 'status_code', 'Unknown')
-        raise RuntimeError(f"OpenAI API Error: {status_code} - {str(e)}")
     except Exception as e:
-        raise RuntimeError(f"Failed to process LLM output: {e}")
+        raise _llm_error(e)
  
  
  
  
-def process_incident(incident_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Process incident data and extract structured information"""
-   
-    if not client:
+# tool-call argument keys (field aliases) -> ExtractedNotes field names
+_FIELD_NAMES = {field.alias or name: name for name, field in ExtractedNotes.model_fields.items()}
+
+
+def _stream_model(client, model: str, notes_content: str, incident: Optional[Dict[str, Any]],
+                  tools: list) -> Generator[Tuple[str, Any], None, Tuple[ExtractedNotes, float]]:
+    """One streamed extraction call to ``model``
+
+    Yields ``("field", {"name", "value"})`` as each member of the streamed
+    tool-call arguments completes, and returns the validated result and its
+    cost in USD (cost needs `LLM_STREAM_INCLUDE_USAGE`).
+    """
+    parser = ObjectMemberParser()
+    arguments: List[str] = []
+    tool_name = finish_reason = usage = None
+    with llm_scheduler.slot(incident):
+        started = time.perf_counter()
+        first_field = None
+        outcome = "error"
+        LLM_IN_FLIGHT.inc()
+        try:
+            stream = _upstream(model).call(lambda: client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": _SYSTEM_PROMPT},
+                    {"role": "user", "content": f"Extract data from the following incident notes:\n\n{notes_content}"}
+                ],
+                tools=tools,
+                tool_choice={"type": "function", "function": {"name": "extract_incident_details"}},
+                stream=True,
+                **({"stream_options": {"include_usage": True}} if settings.LLM_STREAM_INCLUDE_USAGE else {}),
+            ))
+            try:
+                for chunk in stream:
+                    usage = getattr(chunk, "usage", None) or usage
+                    if not chunk.choices:
+                        continue
+                    finish_reason = chunk.choices[0].finish_reason or finish_reason
+                    for call in chunk.choices[0].delta.tool_calls or ():
+                        if call.index != 0 or call.function is None:
+                            continue
+                        tool_name = tool_name or call.function.name
+                        if not call.function.arguments:
+                            continue
+                        arguments.append(call.function.arguments)
+                        if parser is None:
+                            continue
+                        try:
+                            members = list(parser.feed(call.function.arguments))
+                        except ValueError:
+                            # not an object: reported as invalid output once the stream is done
+                            parser = None
+                            members = []
+                        for key, value in members:
+                            if first_field is None:
+                                first_field = time.perf_counter() - started
+                                LLM_STREAM_FIRST_FIELD.observe(first_field, model=model)
+                            yield "field", {"name": _FIELD_NAMES.get(key, key), "value": value}
+            finally:
+                getattr(stream, "close", lambda: None)()
+            outcome = "success"
+        finally:
+            LLM_IN_FLIGHT.dec()
+            LLM_REQUEST_DURATION.observe(time.perf_counter() - started, model=model, outcome=outcome)
+    completion = SimpleNamespace(usage=usage)
+    _record_token_usage(model, completion)
+    cost_usd = llm_routing.cost(model, completion)
+
+    if tool_name is None:
+        raise _InvalidOutput("LLM did not return a tool call as required.", cost_usd)
+    if finish_reason == "length":
+        raise _InvalidOutput("LLM output was truncated.", cost_usd)
+    if tool_name != "extract_incident_details":
+        raise _InvalidOutput("LLM returned an unexpected tool call name.", cost_usd)
+    try:
+        return ExtractedNotes.model_validate(json.loads("".join(arguments))), cost_usd
+    except (ValueError, ValidationError) as e:
+        raise _InvalidOutput(str(e), cost_usd)
+
+
+def stream_notes_with_llm(notes_content: str, incident: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[str, Any]]:
+    """`extract_notes_with_llm` that yields each field as soon as the streamed answer completes it
+
+    Yields ``("field", {"name", "value"})`` per `ExtractedNotes` field,
+    ``("escalated", {"reason", "model"})`` when the small model's answer is
+    redone by the deployment (whose fields follow and supersede the earlier
+    ones), then ``("result", ExtractedNotes)``. Errors are raised as by
+    `extract_notes_with_llm`.
+    """
+    route, reason = llm_routing.choose_route(notes_content)
+    cache_key = _cache_key(notes_content, routed=reason != "disabled")
+    if settings.LLM_CACHE_TTL_SECONDS > 0:
+        cached = cache.get_json("llm", cache_key)
+        if cached is not None:
+            extracted = ExtractedNotes.model_validate(cached)
+            for name, value in extracted.model_dump(by_alias=False).items():
+                yield "field", {"name": name, "value": value}
+            yield "result", extracted
+            return
+
+    client = get_client()
+    if client is None:
         raise ConnectionError("Azure OpenAI client not initialized. Check API key.")
- 
-    # Get notes content
-    notes_content = incident_data.get("notes", "")
-    if not notes_content:
-        raise ValueError("Incident data is missing the 'notes' field.")
-       
-    incident_id = incident_data.get('id', incident_data.get('Id', 'Unknown'))
-    logger.info(f"Processing incident: {incident_id}")
-    logger.info(f"Notes content length: {len(notes_content)} characters")
-   
+    tools = _extraction_tools()
     try:
-        # Extract with LLM
-        extracted_notes = extract_notes_with_llm(notes_content)
-        logger.info("LLM extraction completed successfully")
+        started = time.perf_counter()
+        escalated = None
+        try:
+            extracted, cost_usd = yield from _stream_model(
+                client, llm_routing.model_for(route), notes_content, incident, tools)
+            if route == "small":
+                escalated = llm_routing.escalation_reason(extracted, notes_content)
+        except _InvalidOutput as e:
+            if route != "small":
+                raise
+            escalated, cost_usd = "invalid_output", e.cost_usd
+        except Exception as e:
+            if route != "small" or not _escalates(e):
+                raise
+            logger.warning(f"Small model {llm_routing.model_for(route)} failed: {e}")
+            escalated, cost_usd = "api_error", 0.0
+        if escalated:
+            model = llm_routing.model_for("large")
+            logger.info(f"Escalating streamed extraction to {model}: {escalated}")
+            yield "escalated", {"reason": escalated, "model": model}
+            extracted, large_cost = yield from _stream_model(client, model, notes_content, incident, tools)
+            cost_usd += large_cost
+        llm_routing.STATS.record(route, reason, time.perf_counter() - started, cost_usd, escalated)
+
+        if settings.LLM_CACHE_TTL_SECONDS > 0:
+            cache.set_json("llm", cache_key, extracted.model_dump(by_alias=True), ex=settings.LLM_CACHE_TTL_SECONDS)
     except Exception as e:
-        logger.error(f"LLM extraction failed: {str(e)}")
-        raise
-   
-    # Get top-level fields
-    top_level_data = {
+        raise _llm_error(e)
+    yield "result", extracted
+
+
+PACKED_TOOL_NAME = "extract_incidents_details"
+
+
+def _packed_tools() -> list:
+    """Tool returning one `ExtractedNotes` per incident, keyed by ``incident_id``"""
+    item = ExtractedNotes.model_json_schema()
+    item["properties"] = {
+        "incident_id": {"type": "string", "description": "ID from the incident's heading"},
+        **item["properties"],
+    }
+    item["required"] = ["incident_id"]
+    return [{
+        "type": "function",
+        "function": {
+            "name": PACKED_TOOL_NAME,
+            "description": "Extracts structured incident data for each incident from its unstructured notes text.",
+            "parameters": {
+                "type": "object",
+                "properties": {"incidents": {"type": "array", "items": item}},
+                "required": ["incidents"],
+            },
+        },
+    }]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for packing budgets"""
+    return len(text) // 4 + 1
+
+
+def plan_packs(notes: List[Tuple[str, str]], max_tokens: int, max_incidents: int) -> List[List[Tuple[str, str]]]:
+    """Group ``(key, notes)`` in order into packs within ``max_incidents`` and ``max_tokens`` of notes"""
+    packs: List[List[Tuple[str, str]]] = []
+    current: List[Tuple[str, str]] = []
+    tokens = 0
+    for key, text in notes:
+        size = estimate_tokens(text)
+        if current and (len(current) >= max_incidents or tokens + size > max_tokens):
+            packs.append(current)
+            current, tokens = [], 0
+        current.append((key, text))
+        tokens += size
+    if current:
+        packs.append(current)
+    return packs
+
+
+def _call_packed(client, model: str, pack: List[Tuple[str, str]], incidents: Dict[str, Dict[str, Any]],
+                 tools: list) -> Tuple[Dict[str, ExtractedNotes], float]:
+    """One packed call; returns the valid extractions by key (missing or invalid entries left out) and the cost"""
+    blocks = "\n\n".join(f"### Incident {key}\n{text}" for key, text in pack)
+    # the pack waits in the scheduler as its most urgent incident
+    urgent = min((incidents[key] for key, _ in pack),
+                 key=lambda incident: llm_scheduler.PRIORITY_CLASSES.index(llm_scheduler.priority_class(incident)))
+    completion, cost_usd = _complete(client, model, [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": f"Extract data from the notes of each of the following {len(pack)} incidents, "
+                                    f"one entry per incident with the ID from its heading:\n\n{blocks}"}
+    ], tools, urgent)
+    arguments = _tool_arguments(completion, PACKED_TOOL_NAME, cost_usd)
+    entries = arguments.get("incidents") if isinstance(arguments, dict) else None
+    if not isinstance(entries, list):
+        raise _InvalidOutput("LLM did not return an incidents list.", cost_usd)
+
+    wanted = {key for key, _ in pack}
+    extracted: Dict[str, ExtractedNotes] = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        key = str(entry.pop("incident_id", ""))
+        if key in wanted and key not in extracted:
+            try:
+                extracted[key] = ExtractedNotes.model_validate(entry)
+            except ValidationError:
+                continue
+    return extracted, cost_usd
+
+
+def _fall_back(route: str, pack: List[Tuple[str, str]], reasons: Dict[str, str], latency: float,
+               cost_usd: float, escalated: str) -> Dict[str, Optional[str]]:
+    """Hand a failed pack to the single path: small-route entries go straight to the deployment"""
+    LLM_PACKED.inc(len(pack), outcome="fallback")
+    for key, _ in pack:
+        llm_routing.STATS.record(route, reasons[key], latency / len(pack), cost_usd / len(pack), escalated)
+    return {key: escalated if route == "small" else None for key, _ in pack}
+
+
+def _run_pack(client, route: str, pack: List[Tuple[str, str]], incidents: Dict[str, Dict[str, Any]],
+              reasons: Dict[str, str], tools: list) -> Tuple[Dict[str, ExtractedNotes], Dict[str, Optional[str]]]:
+    """Extract a pack, halving it while the answer is unusable
+
+    On both routes an entry is accepted only if its identifiers occur in its
+    own notes and no labelled field came back empty; the rest are extracted
+    singly. Returns the accepted extractions and the keys to extract singly, each
+    with the reason it is escalated to the deployment (None: route as
+    usual). The pack's cost and latency are split evenly over all its
+    entries, rejected ones included, so per-route totals count each call once.
+    """
+    started = time.perf_counter()
+    try:
+        extracted, cost_usd = _call_packed(client, llm_routing.model_for(route), pack, incidents, tools)
+    except _InvalidOutput as e:
+        if len(pack) == 1:
+            return {}, _fall_back(route, pack, reasons, time.perf_counter() - started, e.cost_usd, "invalid_output")
+        logger.info(f"Splitting pack of {len(pack)} incidents: {e}")
+        LLM_PACKED.inc(len(pack), outcome="split")
+        llm_routing.STATS.spend(route, time.perf_counter() - started, e.cost_usd)
+        half = len(pack) // 2
+        first, first_fallback = _run_pack(client, route, pack[:half], incidents, reasons, tools)
+        second, second_fallback = _run_pack(client, route, pack[half:], incidents, reasons, tools)
+        return {**first, **second}, {**first_fallback, **second_fallback}
+    except Exception as e:
+        # transport/API errors: the single path reports them per incident
+        logger.warning(f"Packed extraction of {len(pack)} incidents failed: {e}")
+        return {}, _fall_back(route, pack, reasons, time.perf_counter() - started, 0.0, "api_error")
+
+    latency = (time.perf_counter() - started) / len(pack)
+    cost_share = cost_usd / len(pack)
+    accepted: Dict[str, ExtractedNotes] = {}
+    fallback: Dict[str, Optional[str]] = {}
+    for key, text in pack:
+        result = extracted.get(key)
+        if result is None:
+            escalated = "missing_from_pack"
+        elif llm_routing.foreign_identifiers(result, text):
+            escalated = "foreign_identifiers"
+        else:
+            escalated = llm_routing.escalation_reason(result, text)
+        if escalated:
+            fallback[key] = escalated if route == "small" else None
+        else:
+            accepted[key] = result
+        llm_routing.STATS.record(route, reasons[key], latency, cost_share, escalated)
+    LLM_PACKED.inc(len(accepted), outcome="packed")
+    LLM_PACKED.inc(len(fallback), outcome="fallback")
+    return accepted, fallback
+
+
+@traced("llm.extract_notes_batch")
+def extract_notes_batch(incidents: List[Dict[str, Any]]) -> List[Any]:
+    """Extract the notes of many incidents, packing short ones several to a request
+
+    Returns, in input order, each incident's `ExtractedNotes` or the exception
+    its extraction raised. Notes longer than `LLM_PACK_MAX_NOTES_CHARS`, and
+    incidents a packed answer missed or got wrong, go through
+    `extract_notes_with_llm` one at a time; those the small model's pack
+    missed or got wrong go straight to the deployment.
+    """
+    client = get_client()
+    if client is None:
+        raise ConnectionError("Azure OpenAI client not initialized. Check API key.")
+    current_span().set_attribute("llm.batch_size", len(incidents))
+
+    results: List[Any] = [None] * len(incidents)
+    index: Dict[str, int] = {}
+    by_key: Dict[str, Dict[str, Any]] = {}
+    reasons: Dict[str, str] = {}
+    cache_keys: Dict[str, str] = {}
+    packable: Dict[str, List[Tuple[str, str]]] = {route: [] for route in llm_routing.ROUTES}
+    singles: List[Tuple[int, Optional[str]]] = []
+    for i, incident in enumerate(incidents):
+        notes_content = incident.get("notes") or ""
+        if not notes_content:
+            results[i] = ValueError("Incident data is missing the 'notes' field.")
+            continue
+        route, reason = llm_routing.choose_route(notes_content)
+        cache_key = _cache_key(notes_content, routed=reason != "disabled")
+        if settings.LLM_CACHE_TTL_SECONDS > 0:
+            cached = cache.get_json("llm", cache_key)
+            if cached is not None:
+                results[i] = ExtractedNotes.model_validate(cached)
+                continue
+        if not settings.LLM_PACK_ENABLED or len(notes_content) > settings.LLM_PACK_MAX_NOTES_CHARS:
+            singles.append((i, None))
+            continue
+        key = str(incident.get("id") or "")
+        if not key or key in index:
+            key = f"#{i}"
+        index[key], by_key[key], reasons[key], cache_keys[key] = i, incident, reason, cache_key
+        packable[route].append((key, notes_content))
+
+    jobs = [(route, pack) for route, notes in packable.items()
+            for pack in plan_packs(notes, settings.LLM_PACK_MAX_TOKENS, settings.LLM_PACK_MAX_INCIDENTS)]
+    tools = _packed_tools()
+
+    def single(job: Tuple[int, Optional[str]]) -> Any:
+        i, escalated_from = job
+        try:
+            return extract_notes_with_llm(incidents[i]["notes"], incidents[i], escalated_from)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, settings.LLM_PACK_CONCURRENCY)) as pool:
+        for accepted, fallback in pool.map(lambda job: _run_pack(client, job[0], job[1], by_key, reasons, tools), jobs):
+            for key, extracted in accepted.items():
+                results[index[key]] = extracted
+                if settings.LLM_CACHE_TTL_SECONDS > 0:
+                    cache.set_json("llm", cache_keys[key], extracted.model_dump(by_alias=True),
+                                   ex=settings.LLM_CACHE_TTL_SECONDS)
+            singles.extend((index[key], escalated) for key, escalated in fallback.items())
+        for (i, _), result in zip(singles, pool.map(single, singles)):
+            results[i] = result
+    return results
+ 
+ 
+def top_level_fields(incident_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Incident fields copied as-is into the flattened extraction result"""
+    return {
         "id": incident_data.get("id", "N/A"),
         "channel": incident_data.get("channel", "N/A"),
         "summary": incident_data.get("summary", "N/A"),
@@ -135,6 +634,12 @@ def process_incident(incident_data: Dict[str, Any]) -> Dict[str, Any]:
         "customer": incident_data.get("customer", "N/A"),
         "assigned_group": incident_data.get("assignedGroup", "N/A"),
     }
+
+
+def flatten_extraction(incident_data: Dict[str, Any], extracted_notes: ExtractedNotes) -> Dict[str, Any]:
+    """Merge the incident's top-level fields with its extracted notes and validate the result"""
+    # Get top-level fields
+    top_level_data = top_level_fields(incident_data)
    
     # Get LLM-extracted fields
     llm_data = extracted_notes.model_dump(by_alias=False)
@@ -158,7 +663,53 @@ def process_incident(incident_data: Dict[str, Any]) -> Dict[str, Any]:
         logger.error(f"Validation Error: {e}")
         raise
        
-    logger.info(f"Successfully extracted data for incident: {top_level_data['id']}")
     return final_data
+
+
+def process_incident(incident_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Process incident data and extract structured information"""
+   
+    if not get_client():
+        raise ConnectionError("Azure OpenAI client not initialized. Check API key.")
  
- 
\ No newline at end of file
+    # Get notes content
+    notes_content = incident_data.get("notes", "")
+    if not notes_content:
+        raise ValueError("Incident data is missing the 'notes' field.")
+       
+    incident_id = incident_data.get('id', incident_data.get('Id', 'Unknown'))
+    logger.info(f"Processing incident: {incident_id}")
+    logger.info(f"Notes content length: {len(notes_content)} characters")
+   
+    try:
+        # Extract with LLM
+        extracted_notes = extract_notes_with_llm(notes_content, incident_data)
+        logger.info("LLM extraction completed successfully")
+    except Exception as e:
+        logger.error(f"LLM extraction failed: {str(e)}")
+        raise
+   
+    final_data = flatten_extraction(incident_data, extracted_notes)
+    logger.info(f"Successfully extracted data for incident: {final_data['id']}")
+    return final_data
+
+
+def process_incidents(incidents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """`process_incident` for many incidents with packed LLM calls
+
+    Returns one ``{"id", "success", "data"}`` or ``{"id", "success", "error"}``
+    per incident, in input order.
+    """
+    results = []
+    for incident_data, extracted_notes in zip(incidents, extract_notes_batch(incidents)):
+        incident_id = incident_data.get('id', incident_data.get('Id', 'Unknown'))
+        if isinstance(extracted_notes, Exception):
+            logger.error(f"LLM extraction failed for {incident_id}: {extracted_notes}")
+            results.append({"id": incident_id, "success": False, "error": str(extracted_notes)})
+            continue
+        try:
+            results.append({"id": incident_id, "success": True,
+                            "data": flatten_extraction(incident_data, extracted_notes)})
+        except ValidationError as e:
+            results.append({"id": incident_id, "success": False, "error": str(e)})
+    return results
@@ -1,19 +1,87 @@
-"""Normalization helpers for extractor modules."""
-from typing import Any, Dict
+"""Normalization helpers for extractor modules.
 
+The set of incoming keys is small and highly repetitive, so key
+normalization is memoized in a bounded LRU and results are interned.
+``normalize_dict(..., view=True)`` additionally avoids copying the input:
+it returns a read-only mapping backed by the original dict, with the
+normalized -> original key map cached per key layout.
+"""
+import sys
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Tuple, Union
 
+
+# upper bound on distinct keys remembered by the normalization cache
+KEY_CACHE_SIZE = 4096
+# upper bound on distinct dict key layouts remembered for views
+SHAPE_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
 def _normalize_key(k: str) -> str:
-    return " ".join(k.strip().lower().split())
+    return sys.intern(" ".join(k.strip().lower().split()))
+
+
+@lru_cache(maxsize=SHAPE_CACHE_SIZE)
+def _keymap_for_shape(keys: Tuple[Any, ...]) -> Dict[str, Any]:
+    """Return normalized-key -> original-key for a tuple of dict keys."""
+    keymap: Dict[str, Any] = {}
+    for k in keys:
+        if not isinstance(k, str):
+            continue
+        keymap[_normalize_key(k)] = k
+    return keymap
+
+
+class NormalizedView(Mapping):
+    """Read-only normalized-key view over a raw dict (no values are copied)."""
+
+    __slots__ = ("_data", "_keymap")
 
+    def __init__(self, data: Dict[str, Any], keymap: Dict[str, Any]) -> None:
+        self._data = data
+        self._keymap = keymap
 
-def normalize_dict(data: Dict[str, Any]) -> Dict[str, Any]:
+    def __getitem__(self, key: str) -> Any:
+        return self._data[self._keymap[key]]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keymap
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keymap)
+
+    def __len__(self) -> int:
+        return len(self._keymap)
+
+    def __repr__(self) -> str:
+        return f"NormalizedView({dict(self.items())!r})"
+
+
+def normalize_dict(data: Dict[str, Any], view: bool = False) -> Union[Dict[str, Any], NormalizedView]:
     """Return a dict of normalized-key -> value.
 
-    Non-string keys are ignored.
+    Non-string keys are ignored. With ``view=True`` a read-only
+    ``NormalizedView`` over ``data`` is returned instead of a copy; it must
+    not outlive changes to ``data``'s keys.
     """
+    if view:
+        return NormalizedView(data, _keymap_for_shape(tuple(data)))
     out: Dict[str, Any] = {}
     for k, v in data.items():
         if not isinstance(k, str):
             continue
         out[_normalize_key(k)] = v
     return out
+
+
+def key_cache_info():
+    """Return hit/miss statistics for the key and shape caches."""
+    return {"keys": _normalize_key.cache_info(), "shapes": _keymap_for_shape.cache_info()}
+
+
+def clear_key_cache() -> None:
+    """Drop all memoized key normalizations and key layouts."""
+    _normalize_key.cache_clear()
+    _keymap_for_shape.cache_clear()
@@ -0,0 +1,221 @@
+"""
+Typed OData query builder for Canvas requests.
+
+Filters are built from small expression objects instead of f-strings, so
+values are always emitted as properly escaped literals (``O'Brien`` becomes
+``'O''Brien'``) and field names are validated as identifiers. Rendering is
+canonical: nested ``and``/``or`` groups are flattened, duplicate terms
+dropped and operands sorted, so semantically equal queries produce the same
+string. That keeps Canvas response cache keys (and request coalescing)
+stable regardless of how a filter was assembled.
+
+Usage:
+    flt = and_(eq("assignedGroup", group), eq("isActive", True))
+    params = build_query(filter=flt, select=["id", "summary"], orderby="created desc")
+"""
+import re
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(/[A-Za-z_][A-Za-z0-9_]*)*$")
+
+COMPARISON_OPERATORS = ("eq", "ne", "gt", "ge", "lt", "le")
+
+Literal = Union[str, bool, int, float, None, datetime, date]
+
+
+def field_name(name: str) -> str:
+    """Validate a property path such as ``assignedGroup`` or ``customer/name``."""
+    if not isinstance(name, str) or not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid OData field name: {name!r}")
+    return name
+
+
+def literal(value: Literal) -> str:
+    """Render a Python value as an OData literal."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if value != value or value in (float("inf"), float("-inf")):
+            raise ValueError(f"Cannot express {value!r} as an OData literal")
+        return repr(value)
+    if isinstance(value, datetime):
+        return value.isoformat().replace("+00:00", "Z")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    raise TypeError(f"Unsupported OData literal type: {type(value).__name__}")
+
+
+class Expr:
+    """Base class of filter expressions."""
+
+    precedence = 3
+
+    def render(self) -> str:
+        raise NotImplementedError
+
+    def __str__(self) -> str:
+        return self.render()
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Expr) and self.render() == other.render()
+
+    def __hash__(self) -> int:
+        return hash(self.render())
+
+    def __and__(self, other: "Expr") -> "Expr":
+        return and_(self, other)
+
+    def __or__(self, other: "Expr") -> "Expr":
+        return or_(self, other)
+
+    def __invert__(self) -> "Expr":
+        return Not(self)
+
+
+class Compare(Expr):
+    """``field op literal``."""
+
+    def __init__(self, field: str, op: str, value: Literal) -> None:
+        if op not in COMPARISON_OPERATORS:
+            raise ValueError(f"Unsupported OData operator: {op!r}")
+        self.field = field_name(field)
+        self.op = op
+        self.value = value
+        self._rendered = f"{self.field} {op} {literal(value)}"
+
+    def render(self) -> str:
+        return self._rendered
+
+
+class Not(Expr):
+    precedence = 2
+
+    def __init__(self, operand: Expr) -> None:
+        self.operand = operand
+
+    def render(self) -> str:
+        return f"not ({self.operand.render()})"
+
+
+class _Junction(Expr):
+    op = ""
+
+    def __init__(self, operands: Iterable[Expr]) -> None:
+        flat: Dict[str, Expr] = {}
+        for operand in operands:
+            # (a and b) and c == a and b and c; duplicates collapse
+            children = operand.operands if type(operand) is type(self) else (operand,)
+            for child in children:
+                flat.setdefault(child.render(), child)
+        self.operands: Tuple[Expr, ...] = tuple(flat[k] for k in sorted(flat))
+
+    def render(self) -> str:
+        parts = []
+        for operand in self.operands:
+            text = operand.render()
+            parts.append(f"({text})" if operand.precedence < self.precedence else text)
+        return f" {self.op} ".join(parts)
+
+
+class And(_Junction):
+    op = "and"
+    precedence = 1
+
+
+class Or(_Junction):
+    op = "or"
+    precedence = 0
+
+
+def eq(field: str, value: Literal) -> Expr:
+    return Compare(field, "eq", value)
+
+
+def ne(field: str, value: Literal) -> Expr:
+    return Compare(field, "ne", value)
+
+
+def _junction(cls, exprs: Sequence[Optional[Expr]]) -> Optional[Expr]:
+    present = [e for e in exprs if e is not None]
+    if not present:
+        return None
+    node = cls(present)
+    return node.operands[0] if len(node.operands) == 1 else node
+
+
+def and_(*exprs: Optional[Expr]) -> Optional[Expr]:
+    """Conjunction of the given expressions (``None`` entries are skipped)."""
+    return _junction(And, exprs)
+
+
+def or_(*exprs: Optional[Expr]) -> Optional[Expr]:
+    """Disjunction of the given expressions (``None`` entries are skipped)."""
+    return _junction(Or, exprs)
+
+
+def in_(field: str, values: Iterable[Literal]) -> Optional[Expr]:
+    """``field eq v1 or field eq v2 ...`` (Canvas does not support ``in``)."""
+    return or_(*(eq(field, v) for v in values))
+
+
+def orderby(spec: Union[str, Sequence[str]]) -> str:
+    """Validate and canonicalize ``$orderby`` (``"created desc, priority"`` -> ``"created desc,priority asc"``)."""
+    items = spec.split(",") if isinstance(spec, str) else list(spec)
+    out: List[str] = []
+    seen = set()
+    for item in items:
+        tokens = item.split()
+        if not tokens:
+            continue
+        if len(tokens) > 2 or (len(tokens) == 2 and tokens[1].lower() not in ("asc", "desc")):
+            raise ValueError(f"Invalid OData $orderby item: {item.strip()!r}")
+        name = field_name(tokens[0])
+        # sort order is significant, so keep item order and only drop repeats of a field
+        if name in seen:
+            continue
+        seen.add(name)
+        out.append(f"{name} {tokens[1].lower() if len(tokens) == 2 else 'asc'}")
+    return ",".join(out)
+
+
+def select(fields: Union[str, Iterable[str]]) -> str:
+    """Validate and canonicalize ``$select`` (deduplicated and sorted)."""
+    items = fields.split(",") if isinstance(fields, str) else fields
+    return ",".join(sorted({field_name(f.strip()) for f in items if f.strip()}))
+
+
+def build_query(
+    filter: Optional[Expr] = None,
+    select: Optional[Union[str, Iterable[str]]] = None,
+    orderby: Optional[Union[str, Sequence[str]]] = None,
+    top: Optional[int] = None,
+    skip: Optional[int] = None,
+    count: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """Assemble canonical OData query parameters; raises ValueError on invalid input."""
+    params: Dict[str, Any] = {}
+    if filter is not None:
+        params["$filter"] = filter.render()
+    if select:
+        params["$select"] = _select(select)
+    if orderby:
+        params["$orderby"] = _orderby(orderby)
+    if top is not None:
+        params["$top"] = int(top)
+    if skip is not None:
+        params["$skip"] = int(skip)
+    if count:
+        params["$count"] = "true"
+    return params
+
+
+# build_query's keyword names shadow the helpers
+_select = select
+_orderby = orderby
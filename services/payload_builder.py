@@ -1,21 +1,42 @@
 """Build payloads for Pydantic models from normalized input."""
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
+from .alias_index import resolve_key_scored
 from .config import ALIAS_CANDIDATES
 from .normalizer import normalize_dict
 
 
-def build_payload_from_raw(raw: Dict[str, Any]) -> Dict[str, Any]:
+# every exact candidate key; these never go through fuzzy resolution
+_EXACT_CANDIDATES = frozenset(c for cands in ALIAS_CANDIDATES.values() for c in cands)
+
+
+def build_payload_from_raw(raw: Dict[str, Any], fuzzy: bool = True) -> Dict[str, Any]:
     """Normalize raw dict and return alias-keyed payload suitable for models.
 
     The function checks ALIAS_CANDIDATES and picks the first candidate
-    present in the normalized dict for each alias.
+    present in the normalized dict for each alias. When ``fuzzy`` is set,
+    aliases still unresolved are filled from the remaining keys via the
+    trigram alias index: the key that matches an alias best (an exact
+    squashed match such as "Casino-ID" over a fuzzy one) wins, and input
+    order only breaks ties.
     """
-    norm = normalize_dict(raw)
+    norm = normalize_dict(raw, view=True)
     payload: Dict[str, Any] = {}
     for alias, candidates in ALIAS_CANDIDATES.items():
         for cand in candidates:
             if cand in norm:
                 payload[alias] = norm[cand]
                 break
+
+    if fuzzy and len(payload) < len(ALIAS_CANDIDATES):
+        best: Dict[str, Tuple[float, Any]] = {}
+        for key, value in norm.items():
+            if key in _EXACT_CANDIDATES:
+                continue
+            aliases, score = resolve_key_scored(key)
+            for alias in aliases:
+                if alias not in payload and score > best.get(alias, (0.0, None))[0]:
+                    best[alias] = (score, value)
+        for alias, (_, value) in best.items():
+            payload[alias] = value
     return payload
@@ -0,0 +1,399 @@
+"""
+Durable store of extraction results for downstream reporting.
+
+Every extraction (rule-based ticket type and missing fields, LLM fields,
+LLM error) is appended to a local store so reports can query results
+instead of re-running extraction. `RESULTS_SINK` selects the store:
+
+- ``sqlite`` (default): one `extractions` table at `RESULTS_SINK_PATH`.
+- ``parquet``: Parquet files under `RESULTS_SINK_PATH`, hive-partitioned by
+  ``date=YYYY-MM-DD/support_group=<name>`` with the group percent-encoded
+  (needs the optional ``pyarrow``).
+- ``none``: results are not stored.
+
+`record()` only appends to an in-memory buffer; a background thread writes
+the buffer in one transaction / one file per partition when it reaches
+`RESULTS_SINK_BATCH_SIZE` rows or every `RESULTS_SINK_FLUSH_SECONDS`, so
+extraction latency never includes a disk write. Rows of a failed write go
+back into the buffer and are retried on the next flush; beyond
+`RESULTS_SINK_MAX_BUFFER` rows the oldest are dropped.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("recorded_at", "date", "incident_id", "support_group", "source", "ticket_type", "rules_success",
+           "missing_fields", "errors", "llm_fields", "llm_error")
+
+# columns holding JSON-encoded lists/objects
+_JSON_COLUMNS = ("missing_fields", "errors", "llm_fields")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS extractions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recorded_at REAL NOT NULL,
+    date TEXT NOT NULL,
+    incident_id TEXT,
+    support_group TEXT,
+    source TEXT,
+    ticket_type TEXT,
+    rules_success INTEGER,
+    missing_fields TEXT,
+    errors TEXT,
+    llm_fields TEXT,
+    llm_error TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_extractions_group_date ON extractions (support_group, date);
+CREATE INDEX IF NOT EXISTS ix_extractions_incident ON extractions (incident_id);
+CREATE INDEX IF NOT EXISTS ix_extractions_ticket_type ON extractions (ticket_type);
+"""
+
+
+def make_row(
+    incident_id: Optional[str],
+    support_group: Optional[str],
+    source: str,
+    rules: Optional[Dict[str, Any]] = None,
+    llm_fields: Optional[Dict[str, Any]] = None,
+    llm_error: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Build one result row from a rule-based result and/or LLM fields."""
+    now = time.time()
+    rules = rules or {}
+    return {
+        "recorded_at": now,
+        "date": datetime.fromtimestamp(now, timezone.utc).strftime("%Y-%m-%d"),
+        "incident_id": None if incident_id is None else str(incident_id),
+        "support_group": support_group or "N/A",
+        "source": source,
+        "ticket_type": rules.get("ticket_type"),
+        "rules_success": None if not rules else bool(rules.get("success")),
+        "missing_fields": rules.get("missing_fields"),
+        "errors": rules.get("errors"),
+        "llm_fields": llm_fields,
+        "llm_error": llm_error,
+    }
+
+
+def _encode(row: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(row)
+    for col in _JSON_COLUMNS:
+        if out[col] is not None:
+            out[col] = json.dumps(out[col], default=str)
+    return out
+
+
+def _decode(row: Dict[str, Any]) -> Dict[str, Any]:
+    for col in _JSON_COLUMNS:
+        if row.get(col):
+            row[col] = json.loads(row[col])
+    if row.get("rules_success") is not None:
+        row["rules_success"] = bool(row["rules_success"])
+    return row
+
+
+class SQLiteResultsStore:
+    """`extractions` table in a SQLite file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        encoded = [tuple(_encode(r)[c] for c in COLUMNS) for r in rows]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    f"INSERT INTO extractions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                    encoded)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def query(self, filters: Dict[str, Any], since: Optional[str], until: Optional[str],
+              limit: int, offset: int) -> List[Dict[str, Any]]:
+        clauses, args = [], []
+        for col, value in filters.items():
+            clauses.append(f"{col} = ?")
+            args.append(value)
+        if since:
+            clauses.append("date >= ?")
+            args.append(since)
+        if until:
+            clauses.append("date <= ?")
+            args.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM extractions {where} ORDER BY id DESC LIMIT ? OFFSET ?",
+                (*args, limit, offset)).fetchall()
+        return [_decode(dict(r)) for r in rows]
+
+    def summary(self, since: Optional[str], until: Optional[str]) -> List[Dict[str, Any]]:
+        clauses, args = [], []
+        if since:
+            clauses.append("date >= ?")
+            args.append(since)
+        if until:
+            clauses.append("date <= ?")
+            args.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT support_group, ticket_type, COUNT(*) AS results, SUM(rules_success) AS rules_success, "
+                "SUM(CASE WHEN llm_fields IS NOT NULL THEN 1 ELSE 0 END) AS llm_extracted, "
+                "SUM(CASE WHEN llm_error IS NOT NULL THEN 1 ELSE 0 END) AS llm_errors "
+                f"FROM extractions {where} GROUP BY support_group, ticket_type ORDER BY results DESC", args).fetchall()
+        return [dict(r) for r in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ParquetResultsStore:
+    """Hive-partitioned Parquet dataset (date / support_group)."""
+
+    def __init__(self, root: str) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.dataset  # noqa: F401
+            import pyarrow.parquet  # noqa: F401
+        except ImportError as e:
+            raise RuntimeError("RESULTS_SINK=parquet requires the 'pyarrow' package") from e
+        self._pa = pa
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        # partition columns live in the directory names, not in the files
+        self.schema = pa.schema([
+            ("recorded_at", pa.float64()), ("incident_id", pa.string()), ("source", pa.string()),
+            ("ticket_type", pa.string()), ("rules_success", pa.bool_()), ("missing_fields", pa.string()),
+            ("errors", pa.string()), ("llm_fields", pa.string()), ("llm_error", pa.string()),
+        ])
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        import pyarrow.parquet as pq
+
+        partitions: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+        for row in rows:
+            partitions[(row["date"], row["support_group"])].append(_encode(row))
+        for (date, group), part in partitions.items():
+            # hive partition values are URI-decoded on read, so "Ops/EU" round-trips
+            directory = os.path.join(self.root, f"date={date}", f"support_group={quote(group, safe='')}")
+            os.makedirs(directory, exist_ok=True)
+            table = self._pa.Table.from_pylist(part, schema=self.schema)
+            pq.write_table(table, os.path.join(directory, f"part-{uuid.uuid4().hex}.parquet"), compression="zstd")
+
+    def _dataset(self):
+        import pyarrow.dataset as ds
+
+        return ds.dataset(self.root, format="parquet", partitioning="hive")
+
+    @staticmethod
+    def _filter(filters: Dict[str, Any], since: Optional[str], until: Optional[str]):
+        import pyarrow.dataset as ds
+
+        expr = None
+        for col, value in filters.items():
+            term = ds.field(col) == value
+            expr = term if expr is None else expr & term
+        for term in ((ds.field("date") >= since) if since else None, (ds.field("date") <= until) if until else None):
+            if term is not None:
+                expr = term if expr is None else expr & term
+        return expr
+
+    def query(self, filters: Dict[str, Any], since: Optional[str], until: Optional[str],
+              limit: int, offset: int) -> List[Dict[str, Any]]:
+        import pyarrow.compute as pc
+
+        if not os.listdir(self.root):
+            return []
+        # top-k while scanning: only offset + limit rows are kept, never the whole filtered set
+        keep = offset + limit
+        if keep <= 0:
+            return []
+        order = [("recorded_at", "descending")]
+        top = None
+        for batch in self._dataset().to_batches(filter=self._filter(filters, since, until)):
+            if not batch.num_rows:
+                continue
+            table = self._pa.Table.from_batches([batch])
+            if top is not None:
+                table = self._pa.concat_tables([top, table.cast(top.schema)])
+            top = table.take(pc.select_k_unstable(table, k=min(keep, table.num_rows), sort_keys=order))
+        if top is None:
+            return []
+        rows = top.sort_by(order).slice(offset, limit).to_pylist()
+        return [_decode({c: r.get(c) for c in COLUMNS}) for r in rows]
+
+    def summary(self, since: Optional[str], until: Optional[str]) -> List[Dict[str, Any]]:
+        if not os.listdir(self.root):
+            return []
+        import pyarrow.dataset as ds
+
+        # scan only the grouping keys and the validity of the JSON columns, folding per batch
+        columns = {
+            "support_group": ds.field("support_group"), "ticket_type": ds.field("ticket_type"),
+            "rules_success": ds.field("rules_success"),
+            "llm_extracted": ds.field("llm_fields").is_valid(), "llm_errors": ds.field("llm_error").is_valid(),
+        }
+        sums = ("rules_success", "llm_extracted", "llm_errors")
+        counts: Dict[tuple, Dict[str, Any]] = {}
+        for batch in self._dataset().to_batches(columns=columns, filter=self._filter({}, since, until)):
+            if not batch.num_rows:
+                continue
+            grouped = self._pa.Table.from_batches([batch]).group_by(["support_group", "ticket_type"]).aggregate(
+                [([], "count_all")] + [(c, "sum") for c in sums])
+            for g in grouped.to_pylist():
+                key = (g["support_group"], g["ticket_type"])
+                entry = counts.setdefault(key, {"support_group": key[0], "ticket_type": key[1], "results": 0,
+                                                "rules_success": 0, "llm_extracted": 0, "llm_errors": 0})
+                entry["results"] += g["count_all"]
+                for c in sums:
+                    entry[c] += g[f"{c}_sum"] or 0
+        return sorted(counts.values(), key=lambda e: -e["results"])
+
+    def close(self) -> None:
+        pass
+
+
+class ResultsSink:
+    """Buffers result rows and writes them to a store in batches from a background thread."""
+
+    def __init__(self, store, batch_size: int = 200, flush_seconds: float = 5.0, max_buffer: int = 50000) -> None:
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_buffer = max_buffer
+        self.written = 0
+        self.write_errors = 0
+        self.dropped = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="results-sink", daemon=True)
+        self._thread.start()
+
+    def record(self, row: Dict[str, Any]) -> None:
+        with self._lock:
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Write buffered rows now; returns the number written.
+
+        On failure the rows are put back ahead of newer ones for the next flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+            try:
+                self.store.write(rows)
+            except Exception as e:
+                self.write_errors += 1
+                logger.error(f"Writing {len(rows)} extraction results failed, will retry: {e}")
+                with self._lock:
+                    self._buffer[:0] = rows
+                    overflow = len(self._buffer) - self.max_buffer
+                    if overflow > 0:
+                        del self._buffer[:overflow]
+                        self.dropped += overflow
+                        logger.error(f"Results buffer full, dropped {overflow} oldest extraction results")
+                return 0
+            self.written += len(rows)
+            return len(rows)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            errors = self.write_errors
+            self.flush()
+            if self.write_errors != errors:
+                # back off instead of retrying on every record() while the store is failing
+                self._stopped.wait(self.flush_seconds)
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join(timeout=10)
+        self.flush()
+        if self.pending():
+            logger.error(f"Closing results sink with {self.pending()} unwritten extraction results")
+        self.store.close()
+
+
+_SINK: Optional[ResultsSink] = None
+_SINK_LOCK = threading.Lock()
+
+
+def get_sink() -> Optional[ResultsSink]:
+    """Return the configured sink (created on first use), or None when `RESULTS_SINK=none`."""
+    global _SINK
+    backend = (settings.RESULTS_SINK or "none").lower()
+    if backend == "none":
+        return None
+    if _SINK is None:
+        with _SINK_LOCK:
+            if _SINK is None:
+                if backend == "parquet":
+                    store = ParquetResultsStore(settings.RESULTS_SINK_PATH)
+                else:
+                    store = SQLiteResultsStore(settings.RESULTS_SINK_PATH)
+                _SINK = ResultsSink(store, settings.RESULTS_SINK_BATCH_SIZE, settings.RESULTS_SINK_FLUSH_SECONDS,
+                                    settings.RESULTS_SINK_MAX_BUFFER)
+    return _SINK
+
+
+def record(row: Dict[str, Any]) -> None:
+    """Append a result row; never raises so extraction is unaffected by the sink."""
+    try:
+        sink = get_sink()
+        if sink is not None:
+            sink.record(row)
+    except Exception as e:
+        logger.error(f"Recording extraction result failed: {e}")
+
+
+def record_enrichment(result: Dict[str, Any], source: str) -> None:
+    """Record a merged rule + LLM result from `triage_pipeline.enrich_incident`."""
+    # a skipped LLM (disabled, unconfigured, no notes) is not an LLM error
+    llm_error = result.get("llm_error") if result.get("llm_attempted") else None
+    record(make_row(result.get("incident_id"), result.get("assigned_group"), source,
+                    rules=result.get("rules"), llm_fields=result.get("llm"), llm_error=llm_error))
+
+
+def close_sink() -> None:
+    global _SINK
+    if _SINK is not None:
+        _SINK.close()
+        _SINK = None
@@ -0,0 +1,397 @@
+"""
+Local full-text search over incident text, backed by SQLite FTS5.
+
+Searching incident text used to mean pulling a whole group from Canvas and
+grepping it. Incidents are instead indexed locally as they are seen: the
+background worker indexes every poll, pipeline runs index each incident
+together with its extracted fields, and `sync()` (``POST /api/search/sync``
+or the CLI) backfills a group. Re-indexing an unchanged incident
+(same ``lastModified``) is a no-op.
+
+One `incident_fts` FTS5 table holds ``summary``, ``notes``,
+``resolutionNotes``, the extracted field values and one token per filter
+value (support group, status, priority, ...) so filters are part of the
+MATCH; a plain `incidents` table next to it, joined on rowid, holds the
+columns returned and sorted on. Results are ranked by BM25 with the
+summary and extracted fields weighted above the notes, over every match by
+default or, with a ranking window (`SEARCH_RANK_WINDOW` or ``window``), over
+only the most recently indexed matches (a changed incident is re-inserted,
+so rowid order is indexing order).
+
+CLI:
+    python -m services.search_index sync --support-group "Gaming Services"
+    python -m services.search_index search "stuck round 98765"
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from config.settings import settings
+from services.canvas_client import iter_incidents
+from services.job_queue import incident_version
+from services.odata import and_, build_query, eq
+from services.odata import orderby as canonical_orderby
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS incidents (
+    rowid INTEGER PRIMARY KEY,
+    incident_id TEXT NOT NULL UNIQUE,
+    version TEXT,
+    support_group TEXT,
+    is_active INTEGER,
+    status TEXT,
+    priority TEXT,
+    severity TEXT,
+    summary TEXT,
+    created TEXT,
+    created_s INTEGER,
+    last_modified_s INTEGER,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_incidents_group ON incidents (support_group, is_active);
+CREATE INDEX IF NOT EXISTS ix_incidents_created ON incidents (created_s);
+CREATE VIRTUAL TABLE IF NOT EXISTS incident_fts USING fts5(
+    summary, notes, resolution_notes, extracted, facets,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# bm25() weights per FTS column: summary, notes, resolution_notes, extracted, facets
+_WEIGHTS = (3.0, 1.0, 1.0, 2.0, 0.0)
+
+# filter -> prefix of its token in the facets column
+_FACETS = {"support_group": "sg", "is_active": "ac", "priority": "pr", "severity": "sv", "status": "st"}
+
+# orderby fields accepted by search() and the columns they sort
+ORDER_FIELDS = {
+    "created": "created_s",
+    "lastModified": "last_modified_s",
+    "priority": "priority",
+    "severity": "severity",
+    "status": "status",
+}
+
+_RESULT_COLUMNS = ("incident_id", "support_group", "is_active", "status", "priority", "severity", "summary", "created")
+
+
+def extracted_text(*sources: Optional[Dict[str, Any]]) -> str:
+    """Searchable text of extracted field values (placeholders such as N/A dropped)."""
+    values = []
+    for source in sources:
+        for value in (source or {}).values():
+            if value is None or isinstance(value, (dict, list)):
+                continue
+            text = str(value).strip()
+            if text and text.upper() != "N/A":
+                values.append(text)
+    return "\n".join(dict.fromkeys(values))
+
+
+def match_expression(query: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, ``word*`` is a prefix."""
+    terms = []
+    for token in query.split():
+        prefix = token.endswith("*")
+        token = token.rstrip("*")
+        # only keep tokens that contain something the tokenizer indexes
+        if not re.search(r"\w", token):
+            continue
+        quoted = '"' + token.replace('"', '""') + '"'
+        terms.append(quoted + ("*" if prefix else ""))
+    if not terms:
+        raise ValueError("Search query has no searchable terms")
+    return " ".join(terms)
+
+
+def facet_token(name: str, value: Any) -> str:
+    """Single FTS token standing for ``name == value`` (exact, case-sensitive match)."""
+    digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).hexdigest()
+    return _FACETS[name] + digest
+
+
+def _facets(incident: Dict[str, Any]) -> str:
+    values = {
+        "support_group": incident.get("assignedGroup"),
+        "is_active": None if incident.get("isActive") is None else int(bool(incident.get("isActive"))),
+        "priority": incident.get("priority"),
+        "severity": incident.get("severity"),
+        "status": incident.get("status"),
+    }
+    return " ".join(facet_token(name, value) for name, value in values.items() if value is not None)
+
+
+def _int(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+class SearchIndex:
+    """FTS5 index of incidents in a SQLite file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def upsert(self, incidents: Iterable[Dict[str, Any]], extracted: Optional[Dict[str, str]] = None) -> int:
+        """Index incidents (one transaction); ``extracted`` maps incident ID -> extracted text.
+
+        Incidents already indexed at the same version are skipped unless new
+        extracted text is given. Returns the number of incidents written.
+        """
+        extracted = extracted or {}
+        written = 0
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for incident in incidents:
+                    incident_id = incident.get("id")
+                    if not incident_id:
+                        continue
+                    incident_id = str(incident_id)
+                    version = incident_version(incident)
+                    row = self._conn.execute(
+                        "SELECT rowid, version FROM incidents WHERE incident_id = ?", (incident_id,)).fetchone()
+                    new_extracted = extracted.get(incident_id)
+                    if row is not None and row["version"] == version and new_extracted is None:
+                        continue
+                    values = (
+                        incident_id, version, incident.get("assignedGroup"),
+                        None if incident.get("isActive") is None else int(bool(incident.get("isActive"))),
+                        incident.get("status"), incident.get("priority"), incident.get("severity"),
+                        incident.get("summary"), incident.get("created"),
+                        _int(incident.get("createdInSeconds")), _int(incident.get("lastModifiedInSeconds")), now,
+                    )
+                    old_extracted = None
+                    if row is not None:
+                        # re-inserted rather than updated: rowids then follow indexing order,
+                        # which is what the ranking window in search() walks
+                        old = self._conn.execute(
+                            "SELECT extracted FROM incident_fts WHERE rowid = ?", (row["rowid"],)).fetchone()
+                        old_extracted = old["extracted"] if old is not None else None
+                        self._conn.execute("DELETE FROM incident_fts WHERE rowid = ?", (row["rowid"],))
+                        self._conn.execute("DELETE FROM incidents WHERE rowid = ?", (row["rowid"],))
+                    rowid = self._conn.execute(
+                        "INSERT INTO incidents (incident_id, version, support_group, is_active, status, priority, "
+                        "severity, summary, created, created_s, last_modified_s, indexed_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", values).lastrowid
+                    self._conn.execute(
+                        "INSERT INTO incident_fts (rowid, summary, notes, resolution_notes, extracted, facets) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (rowid, incident.get("summary"), incident.get("notes"), incident.get("resolutionNotes"),
+                         new_extracted if new_extracted is not None else old_extracted, _facets(incident)))
+                    written += 1
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return written
+
+    def search(
+        self,
+        query: str,
+        support_group: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        priority: Optional[str] = None,
+        severity: Optional[str] = None,
+        status: Optional[str] = None,
+        top: int = 50,
+        skip: int = 0,
+        orderby: Optional[str] = None,
+        count: bool = False,
+        raw: bool = False,
+        window: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Ranked matches for ``query`` (raw FTS5 syntax when ``raw``); raises ValueError on bad input.
+
+        Every match is scored and sorted unless a ranking ``window`` (default
+        `SEARCH_RANK_WINDOW`, 0 for none) is set: then only that many most
+        recently indexed matches are, since FTS5 walks matches newest rowid
+        first and stops there, so a term found in most incidents costs the same
+        at 100k incidents as at 1M but older better matches are missed. The
+        result's ``ranked_window`` is the window applied, or None. Snippets are
+        built for the returned page only. ``count`` is exact and does scale
+        with the matches.
+        """
+        expression = query if raw else match_expression(query)
+        window = settings.SEARCH_RANK_WINDOW if window is None else window
+        window = max(window, top + skip) if window > 0 else None
+        # filters are facet tokens ANDed into the MATCH: FTS5 then skips through the
+        # (smaller) facet doclists instead of scanning every match of a common word
+        facets = [facet_token(name, value) for name, value in (
+            ("support_group", support_group), ("is_active", None if is_active is None else int(is_active)),
+            ("priority", priority), ("severity", severity), ("status", status)) if value is not None]
+        filtered = f"({expression}) AND facets : ({' '.join(facets)})" if facets else expression
+        order = self._order_clause(orderby)
+        weights = ", ".join(str(w) for w in _WEIGHTS)
+        columns = ", ".join(f"i.{c}" for c in _RESULT_COLUMNS + ("created_s", "last_modified_s"))
+        matches = (f"SELECT incident_fts.rowid AS rowid, {columns}, bm25(incident_fts, {weights}) AS score "
+                   "FROM incident_fts JOIN incidents i ON i.rowid = incident_fts.rowid WHERE incident_fts MATCH ?")
+        if window is not None:
+            sql = f"SELECT * FROM ({matches} ORDER BY incident_fts.rowid DESC LIMIT ?) ORDER BY {order} LIMIT ? OFFSET ?"
+            args = (filtered, window, top, skip)
+        else:
+            sql = f"SELECT * FROM ({matches}) ORDER BY {order} LIMIT ? OFFSET ?"
+            args = (filtered, top, skip)
+        started = time.perf_counter()
+        try:
+            with self._lock:
+                rows = self._conn.execute(sql, args).fetchall()
+                rowids = [row["rowid"] for row in rows]
+                marks = ", ".join("?" * len(rowids))
+                if "*" in expression and rowids:
+                    # FTS5 re-runs the query per "rowid IN" value, which for a prefix means
+                    # re-expanding it each time; one pass over the page's rowid range instead
+                    # ("+rowid" keeps the IN list out of FTS5)
+                    snippet_sql = f"rowid BETWEEN ? AND ? AND +rowid IN ({marks})"
+                    snippet_args = (min(rowids), max(rowids), *rowids)
+                else:
+                    snippet_sql, snippet_args = f"rowid IN ({marks})", tuple(rowids)
+                snippets = dict(self._conn.execute(
+                    "SELECT rowid, snippet(incident_fts, -1, '[', ']', '...', 12) FROM incident_fts "
+                    f"WHERE incident_fts MATCH ? AND {snippet_sql}",
+                    (expression, *snippet_args)).fetchall()) if rowids else {}
+                if count:
+                    total = self._conn.execute(
+                        "SELECT COUNT(*) FROM incident_fts WHERE incident_fts MATCH ?", (filtered,)).fetchone()[0]
+        except sqlite3.OperationalError as e:
+            # malformed raw FTS5 syntax
+            raise ValueError(f"Invalid search query: {e}") from e
+        value = []
+        for row in rows:
+            item = {c: row[c] for c in _RESULT_COLUMNS}
+            item["is_active"] = None if item["is_active"] is None else bool(item["is_active"])
+            # bm25() is lower-is-better; expose a higher-is-better score
+            item["score"] = round(-row["score"], 4)
+            item["snippet"] = snippets.get(row["rowid"])
+            value.append(item)
+        result: Dict[str, Any] = {"query": expression, "value": value, "ranked_window": window,
+                                  "duration_ms": round((time.perf_counter() - started) * 1000, 3)}
+        if count:
+            result["count"] = total
+        return result
+
+    @staticmethod
+    def _order_clause(orderby: Optional[str]) -> str:
+        if not orderby or orderby.strip() == "rank":
+            return "score"
+        parts = []
+        for item in canonical_orderby(orderby).split(","):
+            name, direction = item.split()
+            if name not in ORDER_FIELDS:
+                raise ValueError(f"Cannot order search results by {name!r} (use rank, {', '.join(ORDER_FIELDS)})")
+            parts.append(f"{ORDER_FIELDS[name]} {direction.upper()}")
+        return ", ".join(parts + ["score"])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            indexed = self._conn.execute("SELECT COUNT(*), MAX(indexed_at) FROM incidents").fetchone()
+        return {"path": self.path, "incidents": indexed[0], "last_indexed_at": indexed[1]}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_INDEX: Optional[SearchIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_index() -> Optional[SearchIndex]:
+    """Return the search index (created on first use), or None when `SEARCH_INDEX_ENABLED` is off."""
+    global _INDEX
+    if not settings.SEARCH_INDEX_ENABLED:
+        return None
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                _INDEX = SearchIndex(settings.SEARCH_INDEX_PATH)
+    return _INDEX
+
+
+def index_incidents(incidents: List[Dict[str, Any]], extracted: Optional[Dict[str, str]] = None) -> int:
+    """Index incidents; never raises so polling and extraction are unaffected by the index."""
+    try:
+        index = get_index()
+        return index.upsert(incidents, extracted) if index is not None and incidents else 0
+    except Exception as e:
+        logger.error(f"Indexing {len(incidents)} incidents for search failed: {e}")
+        return 0
+
+
+def close_index() -> None:
+    global _INDEX
+    if _INDEX is not None:
+        _INDEX.close()
+        _INDEX = None
+
+
+async def sync(support_group: Optional[str] = None, active_only: bool = False,
+               limit: Optional[int] = None) -> Dict[str, Any]:
+    """Stream matching incidents from Canvas into the index; returns counts and timing."""
+    index = get_index()
+    if index is None:
+        raise RuntimeError("Search index disabled. Set SEARCH_INDEX_ENABLED in .env")
+    params = build_query(filter=and_(
+        eq("assignedGroup", support_group) if support_group else None,
+        eq("isActive", True) if active_only else None,
+    ))
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    seen = written = 0
+    batch: List[Dict[str, Any]] = []
+    async for incident in iter_incidents(params, page_size=settings.SEARCH_SYNC_PAGE_SIZE, limit=limit):
+        seen += 1
+        batch.append(incident)
+        if len(batch) >= settings.SEARCH_SYNC_PAGE_SIZE:
+            written += await loop.run_in_executor(None, index.upsert, batch)
+            batch = []
+    if batch:
+        written += await loop.run_in_executor(None, index.upsert, batch)
+    return {"support_group": support_group, "seen": seen, "indexed": written,
+            "duration_s": round(time.perf_counter() - started, 3)}
+
+
+def main() -> None:
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Local incident full-text search")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sync_p = sub.add_parser("sync", help="index incidents from Canvas")
+    sync_p.add_argument("--support-group")
+    sync_p.add_argument("--active-only", action="store_true")
+    sync_p.add_argument("--limit", type=int, default=None)
+    search_p = sub.add_parser("search", help="query the index")
+    search_p.add_argument("query")
+    search_p.add_argument("--support-group")
+    search_p.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "sync":
+        print(json.dumps(asyncio.run(sync(args.support_group, args.active_only, args.limit))))
+    else:
+        index = get_index()
+        if index is None:
+            parser.error("search index disabled (SEARCH_INDEX_ENABLED)")
+        print(json.dumps(index.search(args.query, support_group=args.support_group, top=args.top), indent=2))
+
+
+if __name__ == "__main__":
+    main()
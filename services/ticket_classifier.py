@@ -0,0 +1,349 @@
+"""
+Learned ticket-type classifier used when the detector's rules give up.
+
+`detect_ticket_type` maps the ``channel`` field, explicit type fields and a
+few field-name heuristics to a ticket type; anything else used to fail with
+"could not detect ticket type". This module trains a multinomial naive Bayes
+model on historical tickets labelled through their ``channel`` and is asked
+as a last resort; its answer is only used above
+`TICKET_CLASSIFIER_MIN_CONFIDENCE`.
+
+Features are hashed (``zlib.crc32`` into `NUM_BUCKETS`) so the model has no
+vocabulary to store: the names of non-empty fields, short field values as
+``field=value`` and the words of free-text values. Label fields (channel,
+ticket type) are left out, since the model only runs when they are absent or
+unknown. The model file is a small binary (JSON header plus packed arrays of
+the buckets seen in training), loaded with two ``array.frombytes`` calls.
+
+CLI:
+    python -m services.ticket_classifier train --input tickets.jsonl
+    python -m services.ticket_classifier train --support-group "Gaming Services" --limit 20000
+    python -m services.ticket_classifier evaluate --input holdout.jsonl
+"""
+import json
+import logging
+import math
+import os
+import random
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config.settings import settings
+from services.config import CHANNEL_MAP
+from services.normalizer import normalize_dict
+from utils.metrics import TICKET_CLASSIFIER
+
+logger = logging.getLogger(__name__)
+
+NUM_BUCKETS = 1 << 18
+MAX_TOKENS = 2000
+_MAGIC = b"TCNB1\n"
+
+# fields that carry the label itself; never used as features
+LABEL_FIELDS = {"channel", "ticket_type", "ticket type", "issue_type", "issue type", "type"}
+# values up to this length are also kept whole as field=value (categories, tiers)
+_SHORT_VALUE = 40
+_WORD = re.compile(r"[^\W\d_][\w]*", re.UNICODE)
+
+Example = Tuple[Dict[str, Any], str]
+
+
+def label_for(data: Dict[str, Any]) -> Optional[str]:
+    """Canonical ticket type from a ticket's ``channel`` (None when unmapped)."""
+    channel = data.get("channel")
+    return CHANNEL_MAP.get(channel.strip().lower()) if isinstance(channel, str) else None
+
+
+def features(data: Dict[str, Any]) -> List[int]:
+    """Distinct hashed feature buckets of a ticket or incident dict."""
+    out = set()
+    for key, value in normalize_dict(data, view=True).items():
+        if key in LABEL_FIELDS or value is None or isinstance(value, (dict, list)):
+            continue
+        text = str(value).strip()
+        if not text:
+            continue
+        out.add(zlib.crc32(f"k:{key}".encode("utf-8")))
+        if not isinstance(value, str):
+            continue
+        lowered = text.lower()
+        if len(lowered) <= _SHORT_VALUE:
+            out.add(zlib.crc32(f"v:{key}={lowered}".encode("utf-8")))
+        for word in _WORD.findall(lowered)[:MAX_TOKENS]:
+            if len(word) > 1:
+                out.add(zlib.crc32(word.encode("utf-8")))
+    return [h & (NUM_BUCKETS - 1) for h in out]
+
+
+class TicketClassifier:
+    """Multinomial naive Bayes over hashed, per-ticket binary features."""
+
+    def __init__(self, classes: Sequence[str], log_priors: Sequence[float],
+                 buckets: array, weights: array, meta: Optional[Dict[str, Any]] = None) -> None:
+        self.classes = list(classes)
+        self.log_priors = list(log_priors)
+        self.meta = meta or {}
+        n = len(self.classes)
+        # bucket -> offset of its row of per-class log probabilities in ``weights``
+        self._rows = dict(zip(buckets, range(0, len(buckets) * n, n)))
+        self._buckets = buckets
+        self._weights = weights
+
+    @classmethod
+    def fit(cls, examples: Iterable[Example], alpha: float = 0.1, min_count: int = 2) -> "TicketClassifier":
+        """Train on (ticket, ticket type) pairs.
+
+        Buckets seen in fewer than ``min_count`` tickets (IDs, one-off
+        values) are dropped; they only make the model bigger.
+        """
+        docs: Counter = Counter()
+        counts: Dict[str, Counter] = {}
+        for data, label in examples:
+            docs[label] += 1
+            counts.setdefault(label, Counter()).update(features(data))
+        if len(docs) < 2:
+            raise ValueError(f"Need examples of at least two ticket types, got {sorted(docs)}")
+        classes = sorted(docs)
+        total = sum(docs.values())
+        log_priors = [math.log(docs[c] / total) for c in classes]
+        denominators = [sum(counts[c].values()) + alpha * NUM_BUCKETS for c in classes]
+        seen: Counter = Counter()
+        for per_class in counts.values():
+            seen.update(per_class)
+        buckets = array("I", sorted(b for b, n in seen.items() if n >= min_count))
+        weights = array("f")
+        for b in buckets:
+            weights.extend(math.log((counts[c][b] + alpha) / d) for c, d in zip(classes, denominators))
+        meta = {"examples": total, "per_class": {c: docs[c] for c in classes}, "alpha": alpha,
+                "min_count": min_count, "trained_at": time.time()}
+        return cls(classes, log_priors, buckets, weights, meta)
+
+    def scores(self, data: Dict[str, Any]) -> List[float]:
+        """Per-class posterior probabilities, in ``classes`` order."""
+        n = len(self.classes)
+        totals = list(self.log_priors)
+        weights = self._weights
+        rows = self._rows
+        # buckets never seen in training carry no evidence and are skipped
+        for b in features(data):
+            row = rows.get(b)
+            if row is not None:
+                for i in range(n):
+                    totals[i] += weights[row + i]
+        top = max(totals)
+        exp = [math.exp(t - top) for t in totals]
+        norm = sum(exp)
+        return [e / norm for e in exp]
+
+    def classify(self, data: Dict[str, Any]) -> Tuple[str, float]:
+        """(most likely ticket type, its probability)."""
+        probs = self.scores(data)
+        best = max(range(len(probs)), key=probs.__getitem__)
+        return self.classes[best], probs[best]
+
+    def save(self, path: str) -> None:
+        header = json.dumps({"classes": self.classes, "log_priors": self.log_priors,
+                             "buckets": len(self._buckets), "meta": self.meta}).encode("utf-8")
+        buckets, weights = array("I", self._buckets), array("f", self._weights)
+        if sys.byteorder != "little":
+            buckets.byteswap()
+            weights.byteswap()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            f.write(buckets.tobytes())
+            f.write(weights.tobytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "TicketClassifier":
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a ticket classifier model")
+            (size,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(size))
+            buckets, weights = array("I"), array("f")
+            buckets.frombytes(f.read(header["buckets"] * buckets.itemsize))
+            weights.frombytes(f.read(header["buckets"] * len(header["classes"]) * weights.itemsize))
+        if sys.byteorder != "little":
+            buckets.byteswap()
+            weights.byteswap()
+        return cls(header["classes"], header["log_priors"], buckets, weights, header.get("meta"))
+
+
+def evaluate(model: TicketClassifier, examples: Sequence[Example],
+             min_confidence: Optional[float] = None) -> Dict[str, Any]:
+    """Accuracy overall and above the confidence threshold, plus per-ticket latency."""
+    if min_confidence is None:
+        min_confidence = settings.TICKET_CLASSIFIER_MIN_CONFIDENCE
+    correct = confident = confident_correct = 0
+    timings: List[float] = []
+    per_class: Dict[str, Counter] = {}
+    for data, label in examples:
+        start = time.perf_counter()
+        predicted, probability = model.classify(data)
+        timings.append(time.perf_counter() - start)
+        stats = per_class.setdefault(label, Counter())
+        stats["examples"] += 1
+        if predicted == label:
+            correct += 1
+            stats["correct"] += 1
+        if probability >= min_confidence:
+            confident += 1
+            confident_correct += predicted == label
+    total = len(examples)
+    timings.sort()
+
+    def pct(q: float) -> float:
+        return round(timings[min(len(timings) - 1, int(len(timings) * q))] * 1e6, 1) if timings else 0.0
+
+    return {
+        "examples": total,
+        "accuracy": round(correct / total, 4) if total else None,
+        "min_confidence": min_confidence,
+        "coverage": round(confident / total, 4) if total else None,
+        "accuracy_above_threshold": round(confident_correct / confident, 4) if confident else None,
+        "per_class_accuracy": {c: round(s["correct"] / s["examples"], 4) for c, s in sorted(per_class.items())},
+        "latency_us": {"p50": pct(0.5), "p95": pct(0.95), "max": pct(1.0)},
+    }
+
+
+_MODEL: Optional[TicketClassifier] = None
+_LOADED = False
+_MODEL_LOCK = threading.Lock()
+
+
+def get_classifier() -> Optional[TicketClassifier]:
+    """The trained model from `TICKET_CLASSIFIER_PATH` (None when disabled or not trained)."""
+    global _MODEL, _LOADED
+    if not _LOADED:
+        with _MODEL_LOCK:
+            if not _LOADED:
+                path = settings.TICKET_CLASSIFIER_PATH
+                if settings.TICKET_CLASSIFIER_ENABLED and os.path.exists(path):
+                    try:
+                        _MODEL = TicketClassifier.load(path)
+                    except Exception as e:
+                        logger.error(f"Could not load ticket classifier from {path}: {e}")
+                _LOADED = True
+    return _MODEL
+
+
+def warm_up() -> bool:
+    """Load the model now; returns whether one is available."""
+    return get_classifier() is not None
+
+
+def classify_fallback(data: Dict[str, Any]) -> Optional[str]:
+    """Ticket type predicted with at least `TICKET_CLASSIFIER_MIN_CONFIDENCE`, else None; never raises."""
+    model = get_classifier()
+    if model is None:
+        return None
+    try:
+        predicted, probability = model.classify(data)
+    except Exception as e:
+        logger.error(f"Ticket classifier failed: {e}")
+        TICKET_CLASSIFIER.inc(outcome="error")
+        return None
+    if probability < settings.TICKET_CLASSIFIER_MIN_CONFIDENCE:
+        TICKET_CLASSIFIER.inc(outcome="low_confidence")
+        return None
+    TICKET_CLASSIFIER.inc(outcome="accepted")
+    return predicted
+
+
+def read_examples(path: str) -> List[Example]:
+    """Labelled examples from a JSON array or JSON-lines file of tickets/incidents."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        items = json.loads(stripped)
+    else:
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    examples = []
+    for item in items:
+        label = label_for(item) if isinstance(item, dict) else None
+        if label:
+            examples.append((item, label))
+    return examples
+
+
+async def fetch_examples(support_group: Optional[str], limit: Optional[int]) -> List[Example]:
+    """Labelled examples from Canvas incidents of ``support_group``."""
+    from services.canvas_client import iter_incidents
+    from services.odata import build_query, eq
+
+    params = build_query(filter=eq("assignedGroup", support_group) if support_group else None)
+    examples: List[Example] = []
+    async for incident in iter_incidents(params, page_size=500, limit=limit):
+        label = label_for(incident)
+        if label:
+            examples.append((incident, label))
+    return examples
+
+
+def main() -> None:
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Train or evaluate the ticket-type fallback classifier")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("train", "evaluate"):
+        p = sub.add_parser(name)
+        p.add_argument("--input", help="JSON / JSON-lines file of tickets or incidents with a channel")
+        p.add_argument("--support-group", help="fetch incidents of this group from Canvas instead")
+        p.add_argument("--limit", type=int, default=None)
+        p.add_argument("--model", default=settings.TICKET_CLASSIFIER_PATH)
+        p.add_argument("--min-confidence", type=float, default=None)
+    train_p = sub.choices["train"]
+    train_p.add_argument("--test-fraction", type=float, default=0.2, help="held out for the report")
+    train_p.add_argument("--alpha", type=float, default=0.1, help="additive smoothing")
+    train_p.add_argument("--min-count", type=int, default=2, help="drop features seen in fewer tickets")
+    args = parser.parse_args()
+
+    if args.input:
+        examples = read_examples(args.input)[:args.limit]
+    elif args.support_group:
+        examples = asyncio.run(fetch_examples(args.support_group, args.limit))
+    else:
+        parser.error("give --input or --support-group")
+    print(f"{len(examples)} labelled examples", file=sys.stderr)
+
+    if args.command == "evaluate":
+        start = time.perf_counter()
+        model = TicketClassifier.load(args.model)
+        load_ms = round((time.perf_counter() - start) * 1000, 2)
+        print(json.dumps({"model": args.model, "load_ms": load_ms,
+                          **evaluate(model, examples, args.min_confidence)}, indent=2))
+        return
+
+    random.Random(0).shuffle(examples)
+    held_out = int(len(examples) * args.test_fraction)
+    test, train = examples[:held_out], examples[held_out:]
+    start = time.perf_counter()
+    model = TicketClassifier.fit(train, alpha=args.alpha, min_count=args.min_count)
+    train_s = round(time.perf_counter() - start, 3)
+    report = evaluate(model, test, args.min_confidence) if test else {}
+    model.meta["holdout"] = report
+    model.save(args.model)
+    start = time.perf_counter()
+    TicketClassifier.load(args.model)
+    load_ms = round((time.perf_counter() - start) * 1000, 2)
+    print(json.dumps({"model": args.model, "train_examples": len(train), "train_s": train_s,
+                      "model_bytes": os.path.getsize(args.model), "load_ms": load_ms, "holdout": report},
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
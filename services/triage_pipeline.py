@@ -0,0 +1,328 @@
+"""
+End-to-end incident triage pipeline: fetch -> detect/extract -> LLM extract.
+
+Incidents for a support group are paged from Canvas and pushed through
+bounded asyncio queues to a pool of workers. Each worker runs the
+rule-based `ExtractionService` and `llm_service.process_incident`
+concurrently for one incident and emits a single enriched result. Because
+every queue is bounded, a slow stage (usually the LLM) throttles Canvas
+paging instead of buffering the whole group in memory.
+
+Pipelines can be consumed directly as an async iterator (streaming route)
+or run as background jobs whose results and metrics are polled later.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from config.settings import settings
+from services import correlation, dedup, search_index
+from services.canvas_client import iter_incidents
+from services.extraction_service import ExtractionService
+from services.odata import and_, eq
+from services.results_sink import record_enrichment
+from utils.tracing import detach_span
+
+logger = logging.getLogger(__name__)
+
+# sentinel marking the end of a queue
+_DONE = object()
+
+# number of finished jobs kept for polling before the oldest are dropped
+MAX_FINISHED_JOBS = 50
+
+
+class StageMetrics:
+    """Counters for one pipeline stage."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.processed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+
+    def record(self, seconds: float, ok: bool = True) -> None:
+        self.processed += 1
+        self.busy_seconds += seconds
+        if not ok:
+            self.errors += 1
+
+    def snapshot(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            "processed": self.processed,
+            "errors": self.errors,
+            "throughput_per_s": round(self.processed / elapsed, 3) if elapsed > 0 else 0.0,
+            "avg_latency_ms": round(self.busy_seconds / self.processed * 1000, 2) if self.processed else 0.0,
+        }
+
+
+def _run_rules(service: ExtractionService, incident: Dict[str, Any], stages: Optional[Dict[str, StageMetrics]]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        result = service.extract(incident)
+    except Exception as e:
+        result = {"success": False, "ticket_type": None, "missing_fields": None, "errors": [str(e)], "model": None}
+    if stages is not None:
+        stages["rules"].record(time.perf_counter() - start, ok=bool(result.get("success")))
+    return result
+
+
+async def _run_llm(incident: Dict[str, Any], stages: Optional[Dict[str, StageMetrics]], use_llm: bool) -> Dict[str, Any]:
+    from services.llm_service import is_llm_available, process_incident, top_level_fields
+
+    if not use_llm:
+        return {"data": None, "error": "LLM extraction disabled", "attempted": False}
+    if not incident.get("notes"):
+        return {"data": None, "error": "Incident data is missing the 'notes' field.", "attempted": False}
+    reuse = settings.DEDUP_ENABLED and settings.DEDUP_REUSE_RESULTS
+    fingerprint = dedup.identifier_fingerprint(dedup.incident_text(incident)) if reuse else None
+    reusable = dedup.get_index().reusable_result(str(incident.get("id")), fingerprint) if reuse else None
+    if reusable is not None:
+        # a near-duplicate with the same identifiers was already extracted: reuse its note fields,
+        # keep this incident's own fields
+        canonical_id, data = reusable
+        return {"data": {**data, **top_level_fields(incident)}, "error": None, "attempted": False,
+                "duplicate_of": canonical_id}
+    if not is_llm_available():
+        return {"data": None, "error": "LLM service not available", "attempted": False}
+
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        data = await loop.run_in_executor(None, process_incident, incident)
+    except Exception as e:
+        if stages is not None:
+            stages["llm"].record(time.perf_counter() - start, ok=False)
+        logger.error(f"LLM extraction failed for {incident.get('id', 'Unknown')}: {e}")
+        return {"data": None, "error": str(e), "attempted": True}
+    if stages is not None:
+        stages["llm"].record(time.perf_counter() - start)
+    if reuse:
+        dedup.get_index().store_result(str(incident.get("id")), data, fingerprint)
+    return {"data": data, "error": None, "attempted": True}
+
+
+async def enrich_incident(
+    incident: Dict[str, Any],
+    service: ExtractionService,
+    stages: Optional[Dict[str, StageMetrics]] = None,
+    use_llm: bool = True,
+    default_group: str = "N/A",
+    source: str = "pipeline",
+) -> Dict[str, Any]:
+    """Run rule-based and LLM extraction for one incident and merge the results.
+
+    ``llm_attempted`` is False when the LLM was skipped (disabled,
+    unconfigured or no notes) rather than called and failed. With
+    `DEDUP_REUSE_RESULTS`, a near-duplicate with the same identifiers as one
+    already extracted reuses that extraction and ``duplicate_of`` names the
+    canonical incident. The result is
+    also appended to the results sink, tagged with ``source``.
+    """
+    dedup.observe(incident)
+    # start the (slow) LLM call first so the rule-based pass overlaps with it
+    llm_task = asyncio.ensure_future(_run_llm(incident, stages, use_llm))
+    await asyncio.sleep(0)
+    rules = _run_rules(service, incident, stages)
+    llm = await llm_task
+    result = {
+        "incident_id": incident.get("id", "N/A"),
+        "assigned_group": incident.get("assignedGroup", default_group),
+        "ticket_type": rules.get("ticket_type"),
+        "rules": rules,
+        "llm": llm["data"],
+        "llm_error": llm["error"],
+        "llm_attempted": llm["attempted"],
+        "duplicate_of": llm.get("duplicate_of"),
+    }
+    record_enrichment(result, source)
+    correlation.observe(result["incident_id"], result["assigned_group"], rules, llm["data"])
+    if incident.get("id"):
+        text = search_index.extracted_text(rules.get("model"), llm["data"])
+        await asyncio.get_running_loop().run_in_executor(
+            None, search_index.index_incidents, [incident], {str(incident["id"]): text})
+    return result
+
+
+class TriagePipeline:
+    """Fetch, extract and enrich incidents for one support group.
+
+    Usage:
+        pipeline = TriagePipeline("Gaming Services")
+        async for result in pipeline.run():
+            ...
+    """
+
+    def __init__(
+        self,
+        support_group: str,
+        active_only: bool = True,
+        limit: Optional[int] = None,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        page_size: Optional[int] = None,
+        use_llm: bool = True,
+    ) -> None:
+        self.support_group = support_group
+        self.active_only = active_only
+        self.limit = limit
+        self.workers = workers or settings.PIPELINE_WORKERS
+        self.queue_size = queue_size or settings.PIPELINE_QUEUE_SIZE
+        self.page_size = page_size or settings.PIPELINE_PAGE_SIZE
+        self.use_llm = use_llm
+
+        self.stages = {name: StageMetrics(name) for name in ("fetch", "rules", "llm", "emit")}
+        self.max_queue_depth = {"incidents": 0, "results": 0}
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._service = ExtractionService()
+
+    def _filter(self) -> str:
+        return and_(
+            eq("assignedGroup", self.support_group),
+            eq("isActive", True) if self.active_only else None,
+        ).render()
+
+    def _track_depth(self, name: str) -> None:
+        depth = self._queues[name].qsize()
+        if depth > self.max_queue_depth[name]:
+            self.max_queue_depth[name] = depth
+
+    async def _fetch(self, incidents: asyncio.Queue) -> None:
+        try:
+            last = time.perf_counter()
+            async for incident in iter_incidents({"$filter": self._filter()}, page_size=self.page_size, limit=self.limit):
+                now = time.perf_counter()
+                self.stages["fetch"].record(now - last)
+                await incidents.put(incident)
+                self._track_depth("incidents")
+                last = time.perf_counter()
+        finally:
+            for _ in range(self.workers):
+                await incidents.put(_DONE)
+
+    async def _enrich(self, incident: Dict[str, Any]) -> Dict[str, Any]:
+        return await enrich_incident(incident, self._service, stages=self.stages, use_llm=self.use_llm,
+                                     default_group=self.support_group)
+
+    async def _work(self, incidents: asyncio.Queue, results: asyncio.Queue) -> None:
+        while True:
+            incident = await incidents.get()
+            if incident is _DONE:
+                return
+            enriched = await self._enrich(incident)
+            await results.put(enriched)
+            self._track_depth("results")
+
+    async def _close_results(self, workers: List[asyncio.Task], results: asyncio.Queue) -> None:
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            await results.put(_DONE)
+
+    async def run(self) -> AsyncIterator[Dict[str, Any]]:
+        """Run the pipeline and yield enriched results as they complete."""
+        incidents: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._queues = {"incidents": incidents, "results": results}
+        self._started_at = time.perf_counter()
+
+        producer = asyncio.ensure_future(self._fetch(incidents))
+        workers = [asyncio.ensure_future(self._work(incidents, results)) for _ in range(self.workers)]
+        closer = asyncio.ensure_future(self._close_results(workers, results))
+        tasks = [producer, *workers, closer]
+        try:
+            while True:
+                item = await results.get()
+                if item is _DONE:
+                    break
+                start = time.perf_counter()
+                yield item
+                self.stages["emit"].record(time.perf_counter() - start)
+            # surface Canvas errors from the producer
+            await producer
+        finally:
+            self._finished_at = time.perf_counter()
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return per-stage throughput and queue-depth metrics."""
+        if self._started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._finished_at or time.perf_counter()) - self._started_at
+        return {
+            "support_group": self.support_group,
+            "elapsed_s": round(elapsed, 3),
+            "workers": self.workers,
+            "stages": {name: stage.snapshot(elapsed) for name, stage in self.stages.items()},
+            "queue_depth": {name: q.qsize() for name, q in self._queues.items()},
+            "max_queue_depth": dict(self.max_queue_depth),
+            "queue_capacity": self.queue_size,
+        }
+
+
+class TriageJob:
+    """A pipeline run in the background with its collected results."""
+
+    def __init__(self, pipeline: TriagePipeline) -> None:
+        self.id = uuid.uuid4().hex
+        self.pipeline = pipeline
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.results: List[Dict[str, Any]] = []
+        self.task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        # the job outlives the request that started it; don't grow that request's span tree
+        detach_span()
+        self.status = "running"
+        try:
+            async for result in self.pipeline.run():
+                self.results.append(result)
+            self.status = "completed"
+        except asyncio.CancelledError:
+            self.status = "cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Triage job {self.id} failed: {e}")
+            self.status = "failed"
+            self.error = getattr(e, "detail", None) or str(e)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "result_count": len(self.results),
+            "metrics": self.pipeline.metrics(),
+        }
+
+
+_JOBS: "OrderedDict[str, TriageJob]" = OrderedDict()
+
+
+def start_job(pipeline: TriagePipeline) -> TriageJob:
+    """Schedule a pipeline on the running event loop and register it."""
+    job = TriageJob(pipeline)
+    job.task = asyncio.ensure_future(job._run())
+    _JOBS[job.id] = job
+
+    finished = [jid for jid, j in _JOBS.items() if j.status in ("completed", "failed", "cancelled")]
+    for jid in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        del _JOBS[jid]
+    return job
+
+
+def get_job(job_id: str) -> Optional[TriageJob]:
+    return _JOBS.get(job_id)
+
+
+def list_jobs() -> List[TriageJob]:
+    return list(_JOBS.values())
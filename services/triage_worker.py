@@ -0,0 +1,260 @@
+"""
+Background triage worker: poll Canvas, queue durably, process continuously.
+
+Started from the FastAPI lifespan when `WORKER_ENABLED` is set. A poller
+task walks the active incidents of each configured support group every
+`WORKER_POLL_INTERVAL_SECONDS` and enqueues new or changed versions into
+the SQLite job queue. A pool of `WORKER_CONCURRENCY` tasks claims jobs and
+runs the same enrichment as the triage pipeline. LLM failures are retried
+with backoff and dead-lettered after `WORKER_MAX_ATTEMPTS`.
+
+With several server processes (`--prod --workers N`) every process runs
+the worker pool against the shared queue, but only the process holding
+the poller lock file polls Canvas. A stopping process hands back only the
+jobs it claimed; jobs of crashed processes are reclaimed at startup and by
+the poller (dead owner pid, or older than `WORKER_LEASE_SECONDS`).
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from config.settings import settings
+from services.canvas_client import iter_incidents
+from services.extraction_service import ExtractionService
+from services import search_index
+from services.job_queue import SQLiteJobQueue
+from services.odata import and_, build_query, eq
+from services.triage_pipeline import StageMetrics, enrich_incident
+
+logger = logging.getLogger(__name__)
+
+# how long an idle worker sleeps before checking the queue again
+IDLE_SLEEP_SECONDS = 1.0
+
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+
+class PollerLock:
+    """Non-blocking exclusive lock file electing one polling process per host."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fh = None
+
+    def acquire(self) -> bool:
+        if fcntl is None:
+            # no cross-process locking; single-process deployments always poll
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fh = open(self.path, "a+")
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            return False
+        self._fh = fh
+        return True
+
+    def release(self) -> None:
+        if self._fh is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            self._fh.close()
+            self._fh = None
+
+
+def configured_support_groups() -> List[str]:
+    return [g.strip() for g in settings.WORKER_SUPPORT_GROUPS.split(",") if g.strip()]
+
+
+class TriageWorker:
+    """Owns the poller and worker-pool tasks for continuous triage."""
+
+    def __init__(
+        self,
+        queue: SQLiteJobQueue,
+        support_groups: List[str],
+        concurrency: int = 4,
+        poll_interval: float = 60.0,
+        use_llm: bool = True,
+        poll: bool = True,
+    ) -> None:
+        self.queue = queue
+        self.support_groups = support_groups
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.use_llm = use_llm
+        self.poll = poll
+        self.stages = {name: StageMetrics(name) for name in ("rules", "llm")}
+        self.last_poll: Dict[str, Dict[str, Any]] = {}
+        self._service = ExtractionService()
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._started_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    async def _db(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, fn, *args)
+
+    async def poll_once(self) -> int:
+        """Enqueue new or changed active incidents for every group; return count enqueued."""
+        total = 0
+        for group in self.support_groups:
+            start = time.time()
+            seen = enqueued = 0
+            try:
+                params = build_query(filter=and_(eq("assignedGroup", group), eq("isActive", True)))
+                batch = []
+                async for incident in iter_incidents(params, page_size=settings.PIPELINE_PAGE_SIZE):
+                    seen += 1
+                    batch.append(incident)
+                    if await self._db(self.queue.enqueue, incident, group, start):
+                        enqueued += 1
+                    if len(batch) >= settings.PIPELINE_PAGE_SIZE:
+                        await self._db(search_index.index_incidents, batch)
+                        batch = []
+                await self._db(search_index.index_incidents, batch)
+                error = None
+            except Exception as e:
+                error = getattr(e, "detail", None) or str(e)
+                logger.error(f"Polling support group {group!r} failed: {error}")
+            self.last_poll[group] = {
+                "at": start,
+                "duration_s": round(time.time() - start, 3),
+                "seen": seen,
+                "enqueued": enqueued,
+                "error": error,
+            }
+            total += enqueued
+        if total:
+            self._wakeup.set()
+        return total
+
+    async def _poll_loop(self) -> None:
+        while True:
+            # only the poller reclaims jobs left by processes that crashed since startup
+            requeued = await self._db(self.queue.requeue_orphaned)
+            requeued += await self._db(self.queue.requeue_stale, settings.WORKER_LEASE_SECONDS)
+            if requeued:
+                logger.info(f"Requeued {requeued} abandoned triage jobs")
+                self._wakeup.set()
+            await self.poll_once()
+            await asyncio.sleep(self.poll_interval)
+
+    async def _process(self, job: Dict[str, Any]) -> None:
+        incident = job["payload"]
+        try:
+            result = await enrich_incident(incident, self._service, stages=self.stages, use_llm=self.use_llm,
+                                           default_group=job.get("support_group") or "N/A", source="worker")
+        except Exception as e:
+            status = await self._db(self.queue.fail, job["id"], str(e))
+            logger.error(f"Job {job['id']} ({job['incident_id']}) failed, now {status}: {e}")
+            return
+
+        # only a real LLM failure is worth retrying; skipped LLM or rule misses are final
+        if result["llm_attempted"] and result["llm_error"]:
+            status = await self._db(self.queue.fail, job["id"], result["llm_error"], result)
+            logger.warning(f"Job {job['id']} ({job['incident_id']}) LLM error, now {status}")
+        else:
+            await self._db(self.queue.complete, job["id"], result)
+
+    async def _work_loop(self) -> None:
+        while True:
+            job = await self._db(self.queue.claim)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=IDLE_SLEEP_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._process(job)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._started_at = time.time()
+        # jobs of crashed processes are retried; those of live siblings are left alone
+        requeued = self.queue.requeue_orphaned() + self.queue.requeue_stale(settings.WORKER_LEASE_SECONDS)
+        if requeued:
+            logger.info(f"Requeued {requeued} abandoned triage jobs")
+        self._tasks = [asyncio.ensure_future(self._poll_loop())] if self.poll else []
+        self._tasks += [asyncio.ensure_future(self._work_loop()) for _ in range(self.concurrency)]
+        logger.info(f"Triage worker started for {self.support_groups} with {self.concurrency} workers"
+                    f" (pid {os.getpid()}, {'polling' if self.poll else 'not polling'})")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # this process's jobs interrupted mid-flight go back to pending
+        self.queue.release_claims()
+
+    def status(self) -> Dict[str, Any]:
+        elapsed = time.time() - self._started_at if self._started_at else 0.0
+        return {
+            "running": self.running,
+            "support_groups": self.support_groups,
+            "concurrency": self.concurrency,
+            "pid": os.getpid(),
+            "polling": self.poll,
+            "poll_interval_s": self.poll_interval,
+            "uptime_s": round(elapsed, 3),
+            "queue": self.queue.stats(),
+            "stages": {name: stage.snapshot(elapsed) for name, stage in self.stages.items()},
+            "last_poll": self.last_poll,
+        }
+
+
+_WORKER: Optional[TriageWorker] = None
+_POLLER_LOCK: Optional[PollerLock] = None
+
+
+def get_worker() -> Optional[TriageWorker]:
+    return _WORKER
+
+
+def start_worker() -> Optional[TriageWorker]:
+    """Create and start the worker from settings (called from the app lifespan)."""
+    global _WORKER, _POLLER_LOCK
+    groups = configured_support_groups()
+    if not groups:
+        logger.warning("WORKER_ENABLED is set but WORKER_SUPPORT_GROUPS is empty; triage worker not started")
+        return None
+    queue = SQLiteJobQueue(
+        settings.WORKER_QUEUE_PATH,
+        max_attempts=settings.WORKER_MAX_ATTEMPTS,
+        backoff_seconds=settings.WORKER_RETRY_BACKOFF_SECONDS,
+    )
+    _POLLER_LOCK = PollerLock(settings.WORKER_QUEUE_PATH + ".poller.lock")
+    _WORKER = TriageWorker(
+        queue,
+        groups,
+        concurrency=settings.WORKER_CONCURRENCY,
+        poll_interval=settings.WORKER_POLL_INTERVAL_SECONDS,
+        poll=_POLLER_LOCK.acquire(),
+    )
+    _WORKER.start()
+    return _WORKER
+
+
+async def stop_worker() -> None:
+    global _WORKER, _POLLER_LOCK
+    if _WORKER is None:
+        return
+    await _WORKER.stop()
+    _WORKER.queue.close()
+    _WORKER = None
+    if _POLLER_LOCK is not None:
+        _POLLER_LOCK.release()
+        _POLLER_LOCK = None
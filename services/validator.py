@@ -2,27 +2,98 @@
 
 This module uses Pydantic models and the payload builder to validate and
 return uniform results including missing field lists and validation errors.
+
+The ticket models are flat and every field is ``Optional[str]``, so for the
+common case (all payload values are plain strings) we skip model
+construction entirely and build the output dict directly from a per-model
+alias -> field-name table. Anything unusual falls back to Pydantic, which
+keeps the output and error shape identical.
 """
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Tuple
 
 from pydantic import ValidationError
 
 from .config import TICKET_TYPE_MAP, ALIAS_CANDIDATES, REQUIRED_ALIASES
 from .payload_builder import build_payload_from_raw
 from .normalizer import normalize_dict
+from utils.tracing import traced
+
+
+# model class -> canonical ticket type (computed once instead of per call)
+_CANON_BY_MODEL: Dict[type, str] = {v: k for k, v in TICKET_TYPE_MAP.items()}
+
+# model class -> compiled fast-path builder (None when the model is not eligible)
+_COMPILED: Dict[type, Optional[Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]]] = {}
+
+
+def _is_flat_optional_str(model_cls: type) -> bool:
+    """Return True when every field is ``Optional[str] = None`` with no validators."""
+    fields = getattr(model_cls, "model_fields", None)
+    if not fields:
+        return False
+    decorators = getattr(model_cls, "__pydantic_decorators__", None)
+    if decorators is not None:
+        if (decorators.validators or decorators.field_validators or decorators.root_validators
+                or decorators.model_validators or decorators.field_serializers
+                or decorators.model_serializers or decorators.computed_fields):
+            return False
+    for field in fields.values():
+        if field.annotation != Optional[str] or field.default is not None:
+            return False
+    return True
+
 
+def compile_model_validator(model_cls: type) -> Optional[Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+    """Return a cached fast-path builder for ``model_cls`` or None if not eligible.
 
-def extract_via_model(model_cls: type, raw: Dict[str, Any]) -> Dict[str, Any]:
+    The builder takes an alias-keyed payload and returns the same dict that
+    ``model_validate(payload).model_dump(include=fields, exclude_none=True)``
+    would, or None when a value is not a plain ``str`` and the caller must
+    fall back to full validation.
+    """
+    if model_cls in _COMPILED:
+        return _COMPILED[model_cls]
+
+    builder = None
+    if _is_flat_optional_str(model_cls):
+        # (alias, field name) pairs in model field order so dict ordering matches model_dump
+        pairs: Tuple[Tuple[str, str], ...] = tuple(
+            (field.alias or name, name) for name, field in model_cls.model_fields.items()
+        )
+        by_name = bool(model_cls.model_config.get("populate_by_name"))
+
+        def builder(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            out: Dict[str, Any] = {}
+            for alias, name in pairs:
+                if alias in payload:
+                    val = payload[alias]
+                elif by_name and name in payload:
+                    val = payload[name]
+                else:
+                    continue
+                if val is None:
+                    continue
+                if type(val) is not str:
+                    return None
+                out[name] = val
+            return out
+
+    _COMPILED[model_cls] = builder
+    return builder
+
+
+@traced("extraction.extract_via_model")
+def extract_via_model(model_cls: type, raw: Dict[str, Any], compiled: bool = True) -> Dict[str, Any]:
     """Parse raw dict into model and return a structured dict.
 
     The return dict has keys: success, missing_fields, errors, model.
+    Set ``compiled=False`` to force full Pydantic model construction.
     """
-    norm = normalize_dict(raw)
+    norm = normalize_dict(raw, view=True)
     payload = build_payload_from_raw(raw)
 
     # Determine canonical name for model
-    rev_map = {v: k for k, v in TICKET_TYPE_MAP.items()}
-    canon = rev_map.get(model_cls)
+    canon = _CANON_BY_MODEL.get(model_cls)
 
     missing = []
     if canon and canon in REQUIRED_ALIASES:
@@ -41,6 +112,13 @@ def extract_via_model(model_cls: type, raw: Dict[str, Any]) -> Dict[str, Any]:
     if missing:
         return {"success": False, "missing_fields": missing, "errors": None, "model": None}
 
+    if compiled:
+        builder = compile_model_validator(model_cls)
+        if builder is not None:
+            model_data = builder(payload)
+            if model_data is not None:
+                return {"success": True, "missing_fields": None, "errors": None, "model": model_data}
+
     try:
         obj = model_cls.model_validate(payload)
     except ValidationError as e:
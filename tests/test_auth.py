@@ -0,0 +1,67 @@
+import asyncio
+
+import httpx
+import pytest
+
+from utils import auth, resilience
+
+_AsyncClient = httpx.AsyncClient
+
+
+@pytest.fixture
+def okta(monkeypatch):
+    monkeypatch.setattr(auth.settings, "OKTA_TOKEN_URL", "https://okta.example.com/token")
+    monkeypatch.setattr(auth.settings, "OKTA_BASIC_AUTH", "Y2xpZW50OnNlY3JldA==")
+    monkeypatch.setattr(auth, "_cached_token", None)
+    monkeypatch.setattr(auth, "_token_expires_at", 0.0)
+    monkeypatch.setattr(auth, "OKTA", resilience.Upstream(
+        "okta", rate=1000, burst=1000, max_concurrency=1, latency_target=10,
+        max_retries=0, failure_threshold=1, recovery_timeout=60))
+    shared = {}
+    monkeypatch.setattr(auth.cache, "get_json", lambda ns, key: shared.get((ns, key)))
+    monkeypatch.setattr(auth.cache, "set_json", lambda ns, key, value, ex=None: shared.__setitem__((ns, key), value))
+
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"access_token": "tok-1", "expires_in": 3600})
+
+    monkeypatch.setattr(auth.httpx, "AsyncClient",
+                        lambda **kw: _AsyncClient(transport=httpx.MockTransport(handler), **kw))
+    return calls
+
+
+def test_async_token_fetch_leaves_event_loop_free(okta):
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        headers = await asyncio.gather(*(auth.get_auth_headers_async() for _ in range(5)))
+        task.cancel()
+        return headers, ticks
+
+    headers, ticks = asyncio.run(scenario())
+    assert all(h["Authorization"] == "Bearer tok-1" for h in headers)
+    assert len(okta) == 1  # concurrent callers share one fetch
+    assert ticks > 0
+    # later callers are served from the cache
+    assert asyncio.run(auth.get_auth_token_async()) == "tok-1"
+    assert len(okta) == 1
+
+
+def test_async_token_fetch_raises_runtime_error_on_okta_failure(okta, monkeypatch):
+    async def reject(request):
+        return httpx.Response(401, text="bad credentials")
+
+    monkeypatch.setattr(auth.httpx, "AsyncClient",
+                        lambda **kw: _AsyncClient(transport=httpx.MockTransport(reject), **kw))
+    with pytest.raises(RuntimeError, match="401"):
+        asyncio.run(auth.get_auth_token_async())
@@ -0,0 +1,72 @@
+import os
+import stat
+
+import pytest
+
+from utils.cache import MemoryCache, SQLiteCache
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_sqlite_cache_files_are_owner_only(tmp_path):
+    path = str(tmp_path / "cache.db")
+    old_umask = os.umask(0o022)
+    try:
+        cache = SQLiteCache(path)
+        cache.set("okta:token", "secret", ex=60)
+    finally:
+        os.umask(old_umask)
+    assert cache.get("okta:token") == b"secret"
+    for name in (path, path + "-wal", path + "-shm"):
+        if os.path.exists(name):
+            assert _mode(name) == 0o600, name
+
+
+def test_sqlite_cache_tightens_existing_file(tmp_path):
+    path = tmp_path / "cache.db"
+    path.touch(mode=0o644)
+    os.chmod(path, 0o644)
+    SQLiteCache(str(path))
+    assert _mode(path) == 0o600
+
+
+def test_sqlite_cache_refuses_symlink(tmp_path):
+    target = tmp_path / "elsewhere.db"
+    target.touch()
+    link = tmp_path / "cache.db"
+    link.symlink_to(target)
+    with pytest.raises(OSError):
+        SQLiteCache(str(link))
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=3, max_bytes=1024)
+    for key in "abc":
+        cache.set(key, key)
+    assert cache.get("a") == b"a"  # refreshes "a"
+    cache.set("d", "d")
+    assert len(cache) == 3
+    assert cache.get("b") is None
+    assert cache.get("a") == b"a"
+
+
+def test_memory_cache_bounds_total_bytes():
+    cache = MemoryCache(max_entries=100, max_bytes=10)
+    cache.set("a", b"x" * 6)
+    cache.set("b", b"y" * 6)
+    assert cache.get("a") is None and cache.get("b") == b"y" * 6
+    assert cache.set("big", b"z" * 11) is False
+    assert cache.get("big") is None
+
+
+def test_memory_cache_purges_expired_entries_without_reads(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("utils.cache.time.time", lambda: now[0])
+    cache = MemoryCache()
+    for i in range(50):
+        cache.set(f"page:{i}", "data", ex=15)
+    now[0] += MemoryCache.PURGE_INTERVAL
+    cache.set("fresh", "data", ex=15)
+    assert len(cache) == 1
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+from services import correlation
+from services.correlation import CorrelationIndex
+
+
+def test_older_update_does_not_overwrite_newer():
+    index = CorrelationIndex()
+    index.update("INC1", {"round_id": {"NEW"}}, updated_at=200)
+    index.update("INC1", {"round_id": {"OLD"}}, updated_at=100)
+    assert index.lookup("round_id", "NEW")[0] == 1
+    assert index.lookup("round_id", "OLD")[0] == 0
+
+
+def test_replayed_older_results_are_evicted_first():
+    index = CorrelationIndex(max_incidents=2)
+    index.update("LIVE", {"round_id": {"1"}}, updated_at=300)
+    index.update("WARM", {"round_id": {"2"}}, updated_at=100)
+    index.update("NEXT", {"round_id": {"3"}}, updated_at=400)
+    assert index.lookup("round_id", "2")[0] == 0
+    assert index.lookup("round_id", "1")[0] == 1
+
+
+class PagedStore:
+    def __init__(self, rows):
+        self.rows = rows  # newest first, like ResultsStore.query
+        self.pages = []
+
+    def query(self, filters, since, until, limit, offset):
+        self.pages.append((limit, offset))
+        return self.rows[offset:offset + limit]
+
+
+def test_warm_from_results_pages_and_keeps_newest(monkeypatch):
+    rows = [{"incident_id": f"INC{i % 7}", "support_group": "A", "ticket_type": "Game",
+             "llm_fields": {"round_id": f"R{i}"}, "recorded_at": float(1000 - i)} for i in range(25)]
+    store = PagedStore(rows)
+    index = CorrelationIndex()
+    monkeypatch.setattr(correlation, "_INDEX", index)
+    monkeypatch.setattr(correlation, "WARM_PAGE_SIZE", 10)
+    monkeypatch.setattr("services.results_sink.get_sink", lambda: SimpleNamespace(store=store))
+
+    assert correlation.warm_from_results(limit=100) == 25
+    assert store.pages == [(10, 0), (10, 10), (10, 20)]
+    for i in range(7):
+        assert index.lookup("round_id", f"R{i}")[0] == 1
+    assert index.lookup("round_id", "R7")[0] == 0
@@ -0,0 +1,67 @@
+import random
+
+from services.dedup import DuplicateIndex, identifier_fingerprint, shingles, signature, similarity
+
+NOTES = """Casino ID: 21010
+Round ID: 884512
+Player Login: alice_01
+Game Name: Break da Bank
+Event Date & Time: 2024-05-01 10:15
+Description: The player reports that the round stayed open after the bonus feature
+ended and the balance was not updated, screenshots attached by the operator."""
+
+
+def _words(rng, n):
+    return " ".join(rng.choice(["spin", "bonus", "round", "stuck", "balance", "player", "open", "game",
+                                "feature", "error", "launch", "casino", "ticket", "screen"]) for _ in range(n))
+
+
+def test_similarity_estimates_jaccard():
+    rng = random.Random(3)
+    a = shingles(_words(rng, 300))
+    assert similarity(signature(a), signature(a)) == 1.0
+    b = shingles(_words(rng, 300))
+    jaccard = len(a & b) / len(a | b)
+    assert abs(similarity(signature(a), signature(b)) - jaccard) < 0.15
+
+
+def test_near_duplicates_share_a_group():
+    index = DuplicateIndex(threshold=0.8)
+    assert index.add("INC1", NOTES) is None
+    assert index.add("INC2", NOTES.replace("screenshots", "a screenshot")) == "INC1"
+    assert index.add("INC3", "Game does not launch for any player on the lobby, blank screen") is None
+    assert index.group("INC2") == ["INC1", "INC2"]
+    assert index.stats()["duplicates_found"] == 1
+
+
+def test_result_reused_only_with_same_identifiers():
+    index = DuplicateIndex(threshold=0.8)
+    other_round = NOTES.replace("884512", "884513")
+    other_player = NOTES.replace("alice_01", "bob_77")
+    reworded = NOTES.replace("screenshots", "a screenshot")
+    for incident_id, text in (("INC1", NOTES), ("INC2", other_round), ("INC3", other_player), ("INC4", reworded)):
+        index.add(incident_id, text)
+    assert index.canonical("INC2") == index.canonical("INC3") == index.canonical("INC4") == "INC1"
+
+    index.store_result("INC1", {"round_id": "884512"}, identifier_fingerprint(NOTES))
+    assert index.reusable_result("INC2", identifier_fingerprint(other_round)) is None
+    assert index.reusable_result("INC3", identifier_fingerprint(other_player)) is None
+    assert index.reusable_result("INC4", identifier_fingerprint(reworded)) == ("INC1", {"round_id": "884512"})
+    assert index.reusable_result("INC1", identifier_fingerprint(NOTES)) is None
+    assert index.stats()["results_reused"] == 1
+
+
+def test_identifier_fingerprint():
+    assert identifier_fingerprint(NOTES) == identifier_fingerprint(NOTES.replace("stayed open", "remained open"))
+    assert identifier_fingerprint(NOTES) != identifier_fingerprint(NOTES.replace("Break da Bank", "Mega Moolah"))
+    assert identifier_fingerprint(NOTES) != identifier_fingerprint(NOTES.replace("10:15", "10:16"))
+    assert ("Casino ID", "21010") in identifier_fingerprint("casino-id = 21010")[0]
+
+
+def test_eviction_bounds_the_index():
+    index = DuplicateIndex(threshold=0.8, max_incidents=3)
+    rng = random.Random(5)
+    for i in range(10):
+        index.add(f"INC{i}", _words(rng, 40))
+    assert index.stats()["incidents"] == 3
+    assert index.canonical("INC0") is None
@@ -0,0 +1,102 @@
+import sqlite3
+import subprocess
+import sys
+import time
+
+import pytest
+
+from services.job_queue import DEAD, DONE, PENDING, PROCESSING, SQLiteJobQueue
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "queue.sqlite3")
+
+
+def _status(queue, job_id):
+    return queue._conn.execute("SELECT status, attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+
+def test_enqueue_deduplicates_versions(path):
+    queue = SQLiteJobQueue(path)
+    assert queue.enqueue({"id": "INC1", "lastModified": "1"})
+    assert not queue.enqueue({"id": "INC1", "lastModified": "1"})
+    assert queue.enqueue({"id": "INC1", "lastModified": "2"})
+    assert queue.stats()["depth"][PENDING] == 2
+
+
+def test_claim_complete_and_retry_until_dead(path):
+    queue = SQLiteJobQueue(path, max_attempts=2, backoff_seconds=0)
+    queue.enqueue({"id": "INC1"}, "Ops")
+    job = queue.claim()
+    assert job["payload"] == {"id": "INC1"} and job["attempts"] == 1 and job["claimed_by"] == queue.owner
+    assert queue.claim() is None
+    assert queue.fail(job["id"], "boom") == PENDING
+    job = queue.claim()
+    assert queue.fail(job["id"], "boom") == DEAD
+    queue.enqueue({"id": "INC2"})
+    job = queue.claim()
+    queue.complete(job["id"], {"ok": True})
+    assert _status(queue, job["id"])["status"] == DONE
+
+
+def test_release_claims_only_touches_own_jobs(path):
+    mine, theirs = SQLiteJobQueue(path, owner="host:1:a"), SQLiteJobQueue(path, owner="host:2:b")
+    mine.enqueue({"id": "INC1"})
+    mine.enqueue({"id": "INC2"})
+    own, other = mine.claim(), theirs.claim()
+    assert mine.release_claims() == 1
+    assert tuple(_status(mine, own["id"])) == (PENDING, 0)
+    assert _status(mine, other["id"])["status"] == PROCESSING
+
+
+def test_requeue_stale_respects_lease(path):
+    queue = SQLiteJobQueue(path)
+    queue.enqueue({"id": "INC1"})
+    job = queue.claim()
+    assert queue.requeue_stale(60) == 0
+    queue._conn.execute("UPDATE jobs SET started_at = ? WHERE id = ?", (time.time() - 120, job["id"]))
+    assert queue.requeue_stale(60) == 1
+    assert _status(queue, job["id"])["status"] == PENDING
+
+
+def test_requeue_orphaned_only_reclaims_dead_local_processes(path):
+    import socket
+
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    host = socket.gethostname()
+    dead = SQLiteJobQueue(path, owner=f"{host}:{exited.pid}:x")
+    alive = SQLiteJobQueue(path)  # this process
+    remote = SQLiteJobQueue(path, owner=f"other-host:{exited.pid}:y")
+    for i in range(3):
+        dead.enqueue({"id": f"INC{i}"})
+    jobs = [dead.claim(), alive.claim(), remote.claim()]
+    assert alive.requeue_orphaned() == 1
+    assert [_status(alive, j["id"])["status"] for j in jobs] == [PENDING, PROCESSING, PROCESSING]
+
+
+def test_migrates_queue_without_claim_owner(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, incident_id TEXT NOT NULL, "
+                 "version TEXT NOT NULL, support_group TEXT, payload TEXT NOT NULL, status TEXT NOT NULL DEFAULT "
+                 "'pending', attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT, result TEXT, enqueued_at REAL "
+                 "NOT NULL, available_at REAL NOT NULL, started_at REAL, finished_at REAL, UNIQUE (incident_id, version))")
+    conn.commit()
+    conn.close()
+    queue = SQLiteJobQueue(path)
+    queue.enqueue({"id": "INC1"})
+    assert queue.claim()["claimed_by"] == queue.owner
+
+
+def test_latest_payloads_limited_to_last_poll(path):
+    queue = SQLiteJobQueue(path)
+    for incident in ({"id": "INC1", "lastModified": "1"}, {"id": "INC2", "lastModified": "1"}):
+        queue.enqueue(incident, "Ops", 100.0)
+    # second poll: INC1 unchanged, INC2 closed, INC3 new
+    queue.enqueue({"id": "INC1", "lastModified": "1"}, "Ops", 200.0)
+    queue.enqueue({"id": "INC3", "lastModified": "1"}, "Ops", 200.0)
+
+    assert sorted(p["id"] for p in queue.iter_latest_payloads("Ops")) == ["INC1", "INC2", "INC3"]
+    assert sorted(p["id"] for p in queue.iter_latest_payloads("Ops", seen_since=200.0)) == ["INC1", "INC3"]
+    assert [p["id"] for p in queue.iter_latest_payloads("Ops", seen_since=200.0, batch_size=1)] == ["INC1", "INC3"]
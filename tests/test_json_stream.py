@@ -0,0 +1,93 @@
+import asyncio
+import json
+import random
+
+import pytest
+
+from services.json_stream import ArrayItemParser, ObjectMemberParser, iter_array_items
+
+DOCUMENTS = [
+    '{"value": [0, 2500.0, -1.5e-3, 12, true, false, null]}',
+    '{"@odata.context": "x[{\\"value\\"", "meta": {"value": [9]}, "value": [{"id": "INC1", "n": 1.25},'
+    ' "s\\"]", [1, [2]], {"nested": {"value": []}}, 3e10], "tail": 1}',
+    '{ "value" : [ ] }',
+    '{"value": ["é€😀", {"k": "ünï"}, 7]}',
+]
+
+OBJECTS = [
+    '{"round_id": "R1", "amount": -1500.25, "count": 3, "ok": true, "none": null, "exp": 1e-5}',
+    '{ "a" : { "b" : [1, 2.5] } , "s": "x,}\\"y", "n": 0 }',
+    '{}',
+]
+
+
+def _array_items(chunks, key="value"):
+    parser = ArrayItemParser(key)
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    items.extend(parser.close())
+    return items
+
+
+def _members(chunks):
+    parser = ObjectMemberParser()
+    members = []
+    for chunk in chunks:
+        members.extend(parser.feed(chunk))
+    members.extend(parser.close())
+    return members
+
+
+def _two_way_splits(data):
+    for i in range(len(data) + 1):
+        yield [data[:i], data[i:]]
+
+
+@pytest.mark.parametrize("doc", DOCUMENTS)
+def test_array_items_every_split(doc):
+    data = doc.encode()
+    expected = json.loads(doc)["value"]
+    for chunks in _two_way_splits(data):
+        assert _array_items(chunks) == expected, chunks
+    assert _array_items([data[i:i + 1] for i in range(len(data))]) == expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_array_items_random_chunking(seed):
+    rng = random.Random(seed)
+    doc = rng.choice(DOCUMENTS).encode()
+    cuts = sorted(rng.sample(range(len(doc) + 1), rng.randrange(1, 6)))
+    chunks = [doc[a:b] for a, b in zip([0] + cuts, cuts + [len(doc)])]
+    assert _array_items(chunks) == json.loads(doc)["value"]
+
+
+def test_number_split_after_dot_is_not_decoded_early():
+    parser = ArrayItemParser("value")
+    assert list(parser.feed(b'{"value": [0, 2500.')) == [0]
+    assert list(parser.feed(b'0]}')) == [2500.0]
+    assert list(parser.close()) == []
+
+
+def test_truncated_array_raises():
+    with pytest.raises(ValueError):
+        _array_items([b'{"value": [1, 2'])
+
+
+@pytest.mark.parametrize("doc", OBJECTS)
+def test_object_members_every_split(doc):
+    expected = list(json.loads(doc).items())
+    for chunks in _two_way_splits(doc):
+        assert _members(chunks) == expected, chunks
+    assert _members(list(doc)) == expected
+
+
+def test_iter_array_items_fallback():
+    async def chunks():
+        for piece in (b'{"value": [1, ', b'{"a": 2}', b"]}"):
+            yield piece
+
+    async def collect():
+        return [item async for item in iter_array_items(chunks(), use_ijson=False)]
+
+    assert asyncio.run(collect()) == [1, {"a": 2}]
@@ -0,0 +1,160 @@
+import json
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from config.settings import Settings
+from services import llm_routing, llm_service
+from utils import resilience
+
+NOTES = "Round ID: 884512\nCasino ID: 21010\nPlayer Login: alice_01\nDescription: round stuck"
+_REQUEST = httpx.Request("POST", "https://example.openai.azure.com/chat/completions")
+
+
+class FakeClient:
+    def __init__(self, small_error=None):
+        self.small_error = small_error
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, tools, tool_choice, stream=False, **_):
+        self.calls.append(model)
+        if model == llm_routing.model_for("small") and self.small_error is not None:
+            raise self.small_error
+        arguments = json.dumps({label: "value" for label in llm_routing.FORM_LABELS.values()})
+        if stream:
+            call = SimpleNamespace(index=0, function=SimpleNamespace(name="extract_incident_details", arguments=arguments))
+            delta = SimpleNamespace(tool_calls=[call])
+            return [SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=delta, finish_reason="tool_calls")])]
+        call = SimpleNamespace(function=SimpleNamespace(name="extract_incident_details", arguments=arguments))
+        message = SimpleNamespace(tool_calls=[call])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="tool_calls")], usage=None)
+
+
+def _upstream(name):
+    return resilience.Upstream(name, rate=1000, burst=1000, max_concurrency=4, latency_target=10,
+                               max_retries=0, failure_threshold=1, recovery_timeout=60)
+
+
+@pytest.fixture
+def routed(monkeypatch):
+    monkeypatch.setattr(llm_service.settings, "LLM_ROUTING_ENABLED", True)
+    monkeypatch.setattr(llm_service.settings, "LLM_CACHE_TTL_SECONDS", 0)
+    monkeypatch.setattr(llm_service.settings, "LLM_SCHEDULER_ENABLED", False)
+    monkeypatch.setattr(llm_service, "AZURE_OPENAI", _upstream("azure_openai"))
+    monkeypatch.setattr(llm_service, "AZURE_OPENAI_SMALL", _upstream("azure_openai_small"))
+    monkeypatch.setattr(llm_routing, "STATS", llm_routing.RoutingStats())
+
+    def install(client):
+        monkeypatch.setattr(llm_service, "get_client", lambda: client)
+        return client
+    return install
+
+
+def test_routing_is_off_by_default():
+    assert Settings.model_fields["LLM_ROUTING_ENABLED"].default is False
+
+
+def test_missing_small_deployment_escalates(routed):
+    missing = openai.NotFoundError("DeploymentNotFound", response=httpx.Response(404, request=_REQUEST), body=None)
+    client = routed(FakeClient(small_error=missing))
+    assert llm_routing.choose_route(NOTES)[0] == "small"
+    extracted = llm_service.extract_notes_with_llm(NOTES)
+    assert extracted.round_id == "value"
+    assert client.calls == [llm_routing.model_for("small"), llm_routing.model_for("large")]
+    assert llm_routing.STATS.snapshot()["routes"]["small"]["escalation_reasons"] == {"api_error": 1}
+
+
+def test_small_circuit_does_not_block_large_route(routed):
+    client = routed(FakeClient(small_error=openai.APIConnectionError(request=_REQUEST)))
+    llm_service.extract_notes_with_llm(NOTES)
+    assert llm_service.AZURE_OPENAI_SMALL.breaker.state == resilience.OPEN
+    assert llm_service.AZURE_OPENAI.breaker.state == resilience.CLOSED
+    # the open small circuit escalates straight away
+    client.calls.clear()
+    llm_service.extract_notes_with_llm(NOTES)
+    assert client.calls == [llm_routing.model_for("large")]
+
+
+def test_streamed_extraction_escalates_on_api_error(routed):
+    missing = openai.NotFoundError("DeploymentNotFound", response=httpx.Response(404, request=_REQUEST), body=None)
+    routed(FakeClient(small_error=missing))
+    events = [kind for kind, _ in llm_service.stream_notes_with_llm(NOTES)]
+    assert "escalated" in events and events[-1] == "result"
+
+
+# identifiers of NOTES, as a correct packed answer returns them
+OWN_IDS = {"Round ID": "884512", "Casino ID": "21010", "Player Login": "alice_01"}
+
+
+class PackedClient:
+    """Answers packed calls with every incident, leaving Round ID empty for ``miss_ids``
+    and giving ``foreign_ids`` another incident's Casino ID."""
+
+    def __init__(self, miss_ids=(), foreign_ids=()):
+        self.miss_ids = set(miss_ids)
+        self.foreign_ids = set(foreign_ids)
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, tools, tool_choice, **_):
+        name = tool_choice["function"]["name"]
+        self.calls.append((model, name))
+        fields = {label: "value" for label in llm_routing.FORM_LABELS.values()}
+        if name == llm_service.PACKED_TOOL_NAME:
+            ids = [line.split()[-1] for line in messages[-1]["content"].splitlines() if line.startswith("### Incident")]
+            entries = [{"incident_id": i, **fields, **OWN_IDS,
+                        **({"Round ID": "N/A"} if i in self.miss_ids else {}),
+                        **({"Casino ID": "30777"} if i in self.foreign_ids else {})} for i in ids]
+            arguments = json.dumps({"incidents": entries})
+        else:
+            arguments = json.dumps(fields)
+        call = SimpleNamespace(function=SimpleNamespace(name=name, arguments=arguments))
+        usage = SimpleNamespace(prompt_tokens=1_000_000, completion_tokens=0, total_tokens=1_000_000)
+        message = SimpleNamespace(tool_calls=[call])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="tool_calls")], usage=usage)
+
+
+def test_rejected_pack_entries_go_straight_to_the_deployment(routed, monkeypatch):
+    monkeypatch.setattr(llm_service.settings, "LLM_PACK_ENABLED", True)
+    monkeypatch.setattr(llm_service.settings, "LLM_PRICES", "gpt-4o=10/0,gpt-4o-mini=1/0")
+    monkeypatch.setattr(llm_routing, "_PRICES", None)
+    client = routed(PackedClient(miss_ids={"INC2"}))
+    incidents = [{"id": f"INC{i}", "notes": NOTES} for i in range(4)]
+
+    results = llm_service.extract_notes_batch(incidents)
+
+    assert [r.round_id for r in results] == ["884512", "884512", "value", "884512"]
+    small, large = llm_routing.model_for("small"), llm_routing.model_for("large")
+    assert client.calls == [(small, llm_service.PACKED_TOOL_NAME), (large, "extract_incident_details")]
+    routes = llm_routing.STATS.snapshot()["routes"]
+    # one small pack ($1) shared by all four entries, the rejected one included
+    assert routes["small"]["calls"] == 4 and routes["small"]["escalated"] == 1
+    assert routes["small"]["cost_usd"] == pytest.approx(1.0)
+    assert routes["large"]["calls"] == 1 and routes["large"]["cost_usd"] == pytest.approx(10.0)
+
+
+def test_pack_entries_with_foreign_identifiers_are_extracted_singly(routed, monkeypatch):
+    monkeypatch.setattr(llm_service.settings, "LLM_ROUTING_ENABLED", False)
+    monkeypatch.setattr(llm_service.settings, "LLM_PACK_ENABLED", True)
+    client = routed(PackedClient(foreign_ids={"INC1"}))
+    incidents = [{"id": f"INC{i}", "notes": NOTES} for i in range(3)]
+
+    results = llm_service.extract_notes_batch(incidents)
+
+    # the large route checks packed entries too; INC1's swapped Casino ID is never accepted
+    assert [r.casino_id for r in results] == ["21010", "value", "21010"]
+    large = llm_routing.model_for("large")
+    assert client.calls == [(large, llm_service.PACKED_TOOL_NAME), (large, "extract_incident_details")]
+    assert llm_routing.STATS.snapshot()["routes"]["large"]["escalation_reasons"] == {"foreign_identifiers": 1}
+
+
+def test_foreign_identifiers_ignores_case_spacing_and_placeholders():
+    from schemas.extraction import ExtractedNotes
+
+    notes = "Round ID: 88 45 12\nPlayer Login: Alice_01"
+    same = ExtractedNotes.model_validate({"Round ID": "884512", "Player Login": "alice_01", "Casino ID": "N/A"})
+    assert not llm_routing.foreign_identifiers(same, notes)
+    assert llm_routing.foreign_identifiers(ExtractedNotes.model_validate({"Round ID": "884513"}), notes)
@@ -0,0 +1,113 @@
+import random
+from datetime import date, datetime, timezone
+
+import pytest
+
+from services.odata import (
+    COMPARISON_OPERATORS,
+    Compare,
+    and_,
+    build_query,
+    eq,
+    field_name,
+    in_,
+    literal,
+    or_,
+    orderby,
+    select,
+)
+
+ALPHABET = "ab' \"\\()&=%/_-é\n"
+FIELDS = ["assignedGroup", "priority", "severity", "status", "isActive", "customer/name"]
+
+
+def _parse_string_literal(text):
+    """Inverse of `literal` for strings."""
+    assert len(text) >= 2 and text[0] == "'" and text[-1] == "'", text
+    body = text[1:-1]
+    assert "'" not in body.replace("''", ""), f"unescaped quote in {text!r}"
+    return body.replace("''", "'")
+
+
+def _rand_value(rng):
+    kind = rng.randrange(4)
+    if kind == 0:
+        return "".join(rng.choice(ALPHABET) for _ in range(rng.randrange(12)))
+    if kind == 1:
+        return rng.choice([True, False])
+    if kind == 2:
+        return rng.randrange(-1000, 1000)
+    return None
+
+
+def _rand_expr(rng, depth=0):
+    if depth > 2 or rng.random() < 0.5:
+        return Compare(rng.choice(FIELDS), rng.choice(COMPARISON_OPERATORS), _rand_value(rng))
+    operands = [_rand_expr(rng, depth + 1) for _ in range(rng.randrange(1, 4))]
+    return (and_ if rng.random() < 0.5 else or_)(*operands)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_string_literal_round_trips(seed):
+    rng = random.Random(seed)
+    for _ in range(400):
+        s = "".join(rng.choice(ALPHABET) for _ in range(rng.randrange(20)))
+        assert _parse_string_literal(literal(s)) == s
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_rendering_ignores_order_grouping_and_duplicates(seed):
+    rng = random.Random(seed)
+    for _ in range(400):
+        exprs = [_rand_expr(rng) for _ in range(rng.randrange(1, 5))]
+        shuffled = list(exprs)
+        rng.shuffle(shuffled)
+        for combine in (and_, or_):
+            base = combine(*exprs).render()
+            assert combine(*shuffled).render() == base
+            assert combine(*(exprs + exprs[:1])).render() == base
+            if len(exprs) > 1:
+                assert combine(combine(*exprs[:1]), combine(*exprs[1:])).render() == base
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_select_and_orderby_are_idempotent(seed):
+    rng = random.Random(seed)
+    for _ in range(400):
+        picked = [rng.choice(FIELDS) for _ in range(rng.randrange(1, 5))]
+        assert select(select(picked)) == select(list(reversed(picked)))
+        spec = ",".join(f"{f} {rng.choice(['asc', 'desc', ''])}" for f in picked)
+        assert orderby(orderby(spec)) == orderby(spec)
+
+
+@pytest.mark.parametrize("bad", ["", "1abc", "a b", "a;drop", "name eq 'x'", "a//b"])
+def test_invalid_field_names_are_rejected(bad):
+    with pytest.raises(ValueError):
+        field_name(bad)
+
+
+def test_literals():
+    assert literal("O'Brien") == "'O''Brien'"
+    assert literal(None) == "null"
+    assert literal(True) == "true"
+    assert literal(3) == "3"
+    assert literal(date(2024, 1, 2)) == "2024-01-02"
+    assert literal(datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)) == "2024-01-02T03:04:05Z"
+    with pytest.raises(ValueError):
+        literal(float("nan"))
+    with pytest.raises(TypeError):
+        literal(object())
+
+
+def test_build_query():
+    flt = and_(eq("isActive", True), in_("assignedGroup", ["B", "A"]))
+    params = build_query(filter=flt, select="summary, id,id", orderby="created desc, priority", top=10, count=True)
+    assert params == {
+        "$filter": "(assignedGroup eq 'A' or assignedGroup eq 'B') and isActive eq true",
+        "$select": "id,summary",
+        "$orderby": "created desc,priority asc",
+        "$top": 10,
+        "$count": "true",
+    }
+    with pytest.raises(ValueError):
+        build_query(orderby="created sideways")
@@ -0,0 +1,40 @@
+import pytest
+
+from services.alias_index import resolve_key
+from services.payload_builder import build_payload_from_raw
+
+
+@pytest.mark.parametrize("key, aliases", [
+    ("Casino-ID", ("Casino ID",)),
+    ("CasinoID:", ("Casino ID",)),
+    ("Casino Id #", ("Casino ID",)),
+    ("Player Nm", ("Player Name",)),
+    ("casino idd", ("Casino ID",)),
+    ("Game Nme", ("Game Name",)),
+])
+def test_resolves_spelling_variants(key, aliases):
+    assert resolve_key(key) == aliases
+
+
+@pytest.mark.parametrize("key", ["casino", "module", "test login", "Event Date Time Zone", "Casino ID Number"])
+def test_prefixes_and_extensions_do_not_resolve(key):
+    assert resolve_key(key) == ()
+
+
+def test_exact_squashed_match_beats_earlier_fuzzy_key():
+    payload = build_payload_from_raw({"Casino": "Example Casino Ltd", "Casino-ID": "CAS-1"})
+    assert payload["Casino ID"] == "CAS-1"
+
+
+def test_best_score_wins_regardless_of_order():
+    assert build_payload_from_raw({"Casino Idd": "typo", "Casino-ID": "exact"})["Casino ID"] == "exact"
+    assert build_payload_from_raw({"Casino-ID": "exact", "Casino Idd": "typo"})["Casino ID"] == "exact"
+
+
+def test_exact_candidate_keys_take_precedence():
+    payload = build_payload_from_raw({"casino_id": "C1", "Casino-ID": "C2"})
+    assert payload["Casino ID"] == "C1"
+
+
+def test_unrelated_field_does_not_fill_alias():
+    assert "Event Date & Time" not in build_payload_from_raw({"Event Date Time Zone": "UTC"})
@@ -0,0 +1,46 @@
+import asyncio
+
+import httpx
+import pytest
+
+from config.settings import settings
+from utils import profiling
+
+
+async def _slow_app(scope, receive, send):
+    await asyncio.sleep(0.05)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+@pytest.fixture
+def profiled(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(settings, "PROFILING_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILING_MODE", "cprofile")
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", "secret")
+    return profiling.ProfilingMiddleware(_slow_app)
+
+
+async def _get(app, headers, n=1):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.get("/api/x", headers=headers) for _ in range(n)))
+
+
+def test_token_is_required(profiled, monkeypatch):
+    (response,) = asyncio.run(_get(profiled, {"X-Profile": "wrong"}))
+    assert "x-profile-id" not in response.headers
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", "")
+    (response,) = asyncio.run(_get(profiled, {"X-Profile": ""}))
+    assert "x-profile-id" not in response.headers
+    assert not profiling.token_matches(None) and not profiling.token_matches("")
+
+
+def test_one_profile_at_a_time(profiled):
+    responses = asyncio.run(_get(profiled, {"X-Profile": "secret"}, n=4))
+    assert all(r.status_code == 200 for r in responses)
+    assert sum("x-profile-id" in r.headers for r in responses) == 1
+    (meta,) = profiling.list_profiles()
+    assert meta["mode"] == "cprofile" and meta["requests_in_flight"] >= 1
@@ -0,0 +1,123 @@
+import pytest
+
+from services.results_sink import ResultsSink, SQLiteResultsStore, make_row
+
+
+class FlakyStore:
+    def __init__(self, fail_times):
+        self.fail_times = fail_times
+        self.rows = []
+
+    def write(self, rows):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise OSError("disk full")
+        self.rows.extend(rows)
+
+    def close(self):
+        pass
+
+
+def _sink(store, **kwargs):
+    # a long interval keeps the background thread out of the way
+    return ResultsSink(store, batch_size=1000, flush_seconds=3600, **kwargs)
+
+
+def test_failed_flush_keeps_rows_for_retry():
+    store = FlakyStore(fail_times=1)
+    sink = _sink(store)
+    sink.record(make_row("INC1", "Ops", "test"))
+    assert sink.flush() == 0
+    assert sink.pending() == 1 and sink.write_errors == 1
+    sink.record(make_row("INC2", "Ops", "test"))
+    assert sink.flush() == 2
+    assert [r["incident_id"] for r in store.rows] == ["INC1", "INC2"]
+    sink.close()
+
+
+def test_failed_flush_drops_oldest_beyond_max_buffer():
+    store = FlakyStore(fail_times=1)
+    sink = _sink(store, max_buffer=2)
+    for i in range(3):
+        sink.record(make_row(f"INC{i}", "Ops", "test"))
+    sink.flush()
+    assert sink.dropped == 1
+    assert sink.flush() == 2
+    assert [r["incident_id"] for r in store.rows] == ["INC1", "INC2"]
+    sink.close()
+
+
+def test_sqlite_store_rolls_back_failed_write(tmp_path):
+    store = SQLiteResultsStore(str(tmp_path / "results.sqlite3"))
+    with pytest.raises(Exception):
+        store.write([{"recorded_at": 1.0}])  # missing columns
+    store.write([make_row("INC1", "Ops", "test")])
+    assert [r["incident_id"] for r in store.query({}, None, None, 10, 0)] == ["INC1"]
+    store.close()
+
+
+def test_parquet_partition_values_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    from services.results_sink import ParquetResultsStore
+
+    store = ParquetResultsStore(str(tmp_path / "results"))
+    rows = [make_row(f"INC{i}", group, "test") for i, group in enumerate(["Ops/EU", "Ops_EU", "Ops/EU", "a%b c"])]
+    for i, row in enumerate(rows):
+        row["recorded_at"] = float(i)
+    store.write(rows)
+
+    assert [r["incident_id"] for r in store.query({"support_group": "Ops/EU"}, None, None, 10, 0)] == ["INC2", "INC0"]
+    assert [r["incident_id"] for r in store.query({"support_group": "Ops_EU"}, None, None, 10, 0)] == ["INC1"]
+    assert [r["support_group"] for r in store.query({"support_group": "a%b c"}, None, None, 10, 0)] == ["a%b c"]
+    assert {e["support_group"] for e in store.summary(None, None)} == {"Ops/EU", "Ops_EU", "a%b c"}
+
+
+def test_parquet_query_orders_and_pages_across_files(tmp_path):
+    pytest.importorskip("pyarrow")
+    import random
+
+    from services.results_sink import ParquetResultsStore
+
+    rng = random.Random(7)
+    store = ParquetResultsStore(str(tmp_path / "results"))
+    stamps = list(range(50))
+    rng.shuffle(stamps)
+    for chunk in range(5):
+        rows = []
+        for t in stamps[chunk * 10:(chunk + 1) * 10]:
+            row = make_row(f"INC{t}", rng.choice(["A", "B"]), "test")
+            row["recorded_at"] = float(t)
+            rows.append(row)
+        store.write(rows)
+
+    got = [r["recorded_at"] for r in store.query({}, None, None, 7, 5)]
+    assert got == [float(t) for t in range(44, 37, -1)]
+    assert store.query({}, None, None, 10, 100) == []
+
+
+def test_parquet_summary_matches_sqlite(tmp_path):
+    pytest.importorskip("pyarrow")
+    import random
+
+    from services.results_sink import ParquetResultsStore
+
+    rng = random.Random(11)
+    parquet = ParquetResultsStore(str(tmp_path / "results"))
+    sqlite = SQLiteResultsStore(str(tmp_path / "results.sqlite3"))
+    for chunk in range(4):
+        rows = []
+        for i in range(25):
+            rules = rng.choice([None, {"ticket_type": rng.choice(["Game", "Payment"]), "success": rng.random() < 0.5}])
+            rows.append(make_row(f"INC{chunk}-{i}", rng.choice(["A", "B", None]), "test", rules=rules,
+                                 llm_fields=rng.choice([None, {"round_id": "1"}]),
+                                 llm_error=rng.choice([None, "timeout"])))
+        parquet.write(rows)
+        sqlite.write(rows)
+
+    def by_key(summary):
+        # SQLite sums an all-NULL rules_success column to NULL
+        return {(e["support_group"], e["ticket_type"]): {k: v or 0 for k, v in e.items()} for e in summary}
+
+    assert by_key(parquet.summary(None, None)) == by_key(sqlite.summary(None, None))
+    assert sum(e["results"] for e in parquet.summary(None, None)) == 100
+    assert parquet.summary("2999-01-01", None) == []
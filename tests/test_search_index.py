@@ -0,0 +1,38 @@
+import pytest
+
+from services.search_index import SearchIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    # the best match for "stuck round" is indexed first, behind many weaker ones
+    incidents = [{"id": "INC0", "summary": "Stuck round", "notes": "stuck round stuck round",
+                  "lastModifiedInSeconds": 1}]
+    incidents += [{"id": f"INC{i}", "summary": f"Report {i}",
+                   "notes": "a round seems stuck " + "filler text " * 40, "lastModifiedInSeconds": 1}
+                  for i in range(1, 30)]
+    index.upsert(incidents)
+    yield index
+    index.close()
+
+
+def test_ranks_every_match_by_default(index, monkeypatch):
+    monkeypatch.setattr("services.search_index.settings.SEARCH_RANK_WINDOW", 0)
+    result = index.search("stuck round", top=3)
+    assert result["value"][0]["incident_id"] == "INC0"
+    assert result["ranked_window"] is None
+
+
+def test_window_ranks_only_newest_matches(index, monkeypatch):
+    monkeypatch.setattr("services.search_index.settings.SEARCH_RANK_WINDOW", 0)
+    result = index.search("stuck round", top=3, window=10)
+    assert "INC0" not in [item["incident_id"] for item in result["value"]]
+    assert result["ranked_window"] == 10
+    # the window never cuts into the requested page
+    assert index.search("stuck round", top=5, skip=20, window=10)["ranked_window"] == 25
+
+
+def test_count_is_exact_with_a_window(index):
+    assert index.search("stuck round", count=True, top=1, window=5)["count"] == 30
+    assert index.search("filler", count=True, top=1)["count"] == 29
@@ -2,85 +2,163 @@
 Authentication utilities for Canvas API
 """
 from config.settings import settings
+import asyncio
 import time
 import logging
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
 import httpx
+from utils.metrics import AUTH_TOKEN_CACHE, OKTA_TOKEN_FETCH_DURATION
+from utils.resilience import OKTA
+from utils import cache
+from utils.tracing import current_span, traced
 
 logger = logging.getLogger(__name__)
 
 
-def get_auth_token() -> str:
-    """
-    Get the Bearer token for Canvas API authentication.
-    
-    Currently retrieves the token from environment variables.
-    In the future, this function can be extended to fetch tokens
-    from other sources (e.g., token refresh logic, external auth services).
-    
-    Returns:
-        str: The Bearer token
-    """
-    # Prefer an explicitly configured static token
-    # if settings.CANVAS_BEARER_TOKEN:
-    #     return settings.CANVAS_BEARER_TOKEN
+_cached_token = None
+_token_expires_at = 0.0
+# one Okta fetch at a time per event loop; waiters then find the token cached
+_ASYNC_LOCKS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
 
-    # If no static token, attempt to obtain one from Okta using settings
-    # Cache token until expiry to avoid frequent requests
-    global _cached_token, _token_expires_at
 
-    try:
-        _cached_token
-    except NameError:
-        _cached_token = None
-        _token_expires_at = 0
+def _cached_auth_token() -> Optional[str]:
+    """Return a still-valid token from this process or the shared cache, else None."""
+    global _cached_token, _token_expires_at
 
     if _cached_token and time.time() < _token_expires_at:
+        AUTH_TOKEN_CACHE.inc(result="hit")
+        current_span().set_attribute("cache", "hit")
+        return _cached_token
+    # another worker process may already hold a valid token
+    shared = cache.get_json("okta", "token")
+    if shared and time.time() < shared.get("expires_at", 0):
+        _cached_token = shared["access_token"]
+        _token_expires_at = shared["expires_at"]
+        AUTH_TOKEN_CACHE.inc(result="hit")
+        current_span().set_attribute("cache", "shared")
         return _cached_token
+    return None
+
+
+def _token_request() -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Headers and form data of the Okta token request; raises when Okta is not configured."""
+    AUTH_TOKEN_CACHE.inc(result="miss")
+    current_span().set_attribute("cache", "miss")
 
     # Validate required settings
     if not settings.OKTA_TOKEN_URL or not settings.OKTA_BASIC_AUTH:
         logger.error("OKTA_TOKEN_URL or OKTA_BASIC_AUTH not configured; cannot fetch token")
         raise RuntimeError("No Canvas bearer token configured and Okta token configuration is missing")
 
-    # Build request
     headers = {
         "Accept": "application/json",
         "Authorization": f"Basic {settings.OKTA_BASIC_AUTH}",
         "Content-Type": "application/x-www-form-urlencoded",
     }
-
     data = {
         "grant_type": "password",
         "username": settings.OKTA_USERNAME,
         "password": settings.OKTA_PASSWORD,
         "scope": settings.OKTA_SCOPE or "openid roles",
     }
+    return headers, data
 
-    try:
-        with httpx.Client(verify=False, timeout=15.0) as client:
-            resp = client.post(settings.OKTA_TOKEN_URL, headers=headers, data=data)
-            resp.raise_for_status()
-            body = resp.json()
 
-            print("Okta token response:", body)
+def _store_token(body: Dict[str, Any]) -> str:
+    """Cache the token from an Okta response body and return it."""
+    global _cached_token, _token_expires_at
+
+    access_token = body.get("access_token")
+    expires_in = int(body.get("expires_in", 0))
+    if not access_token:
+        logger.error("Okta token endpoint did not return access_token (keys: %s)", sorted(body))
+        raise RuntimeError("Failed to obtain access token from Okta")
 
-            access_token = body.get("access_token")
-            expires_in = int(body.get("expires_in", 0))
+    # Cache token for slightly less than expiry
+    _cached_token = access_token
+    _token_expires_at = time.time() + max(0, expires_in - 60)
+    if _token_expires_at > time.time():
+        cache.set_json("okta", "token", {"access_token": _cached_token, "expires_at": _token_expires_at},
+                       ex=_token_expires_at - time.time())
+    return _cached_token
 
-            if not access_token:
-                logger.error("Okta token endpoint did not return access_token: %s", body)
-                raise RuntimeError("Failed to obtain access token from Okta")
 
-            # Cache token for slightly less than expiry
-            _cached_token = access_token
-            _token_expires_at = time.time() + max(0, expires_in - 60)
-            return _cached_token
-    except httpx.HTTPStatusError as e:
+def _okta_error(e: Exception) -> RuntimeError:
+    if isinstance(e, httpx.HTTPStatusError):
         logger.error("Okta token request failed: %s", e.response.text)
-        raise RuntimeError(f"Failed to obtain token from Okta: {e.response.status_code} - {e.response.text}")
+        return RuntimeError(f"Failed to obtain token from Okta: {e.response.status_code} - {e.response.text}")
+    logger.error("Okta token request error: %s", str(e))
+    return RuntimeError(f"Failed to obtain token from Okta: {e}")
+
+
+@traced("auth.get_token")
+def get_auth_token() -> str:
+    """
+    Get the Bearer token for Canvas API authentication.
+
+    Returns the cached token while it is valid, otherwise fetches one from
+    Okta (retried and rate limited by the ``okta`` resilience policy). This
+    blocks while it waits; async code should use `get_auth_token_async`.
+
+    Returns:
+        str: The Bearer token
+    """
+    token = _cached_auth_token()
+    if token:
+        return token
+    headers, data = _token_request()
+
+    fetch_started = time.perf_counter()
+    outcome = "error"
+    try:
+        with httpx.Client(verify=False, timeout=15.0) as client:
+            def _post():
+                resp = client.post(settings.OKTA_TOKEN_URL, headers=headers, data=data)
+                resp.raise_for_status()
+                return resp
+
+            token = _store_token(OKTA.call(_post).json())
+            outcome = "success"
+            return token
     except Exception as e:
-        logger.error("Okta token request error: %s", str(e))
-        raise RuntimeError(f"Failed to obtain token from Okta: {e}")
+        raise _okta_error(e)
+    finally:
+        OKTA_TOKEN_FETCH_DURATION.observe(time.perf_counter() - fetch_started, outcome=outcome)
+
+
+@traced("auth.get_token")
+async def get_auth_token_async() -> str:
+    """`get_auth_token` for async callers: Okta waits, retries and backoff never block the event loop."""
+    token = _cached_auth_token()
+    if token:
+        return token
+    loop = asyncio.get_running_loop()
+    lock = _ASYNC_LOCKS.setdefault(loop, asyncio.Lock())
+    async with lock:
+        # fetched by another task while this one waited
+        token = _cached_auth_token()
+        if token:
+            return token
+        headers, data = _token_request()
+
+        fetch_started = time.perf_counter()
+        outcome = "error"
+        try:
+            async with httpx.AsyncClient(verify=False, timeout=15.0) as client:
+                async def _post():
+                    resp = await client.post(settings.OKTA_TOKEN_URL, headers=headers, data=data)
+                    resp.raise_for_status()
+                    return resp
+
+                token = _store_token((await OKTA.call_async(_post)).json())
+                outcome = "success"
+                return token
+        except Exception as e:
+            raise _okta_error(e)
+        finally:
+            OKTA_TOKEN_FETCH_DURATION.observe(time.perf_counter() - fetch_started, outcome=outcome)
 
 
 def get_auth_headers() -> dict:
@@ -96,3 +174,13 @@ def get_auth_headers() -> dict:
         "Accept": "application/json",
         "Content-Type": "application/json"
     }
+
+
+async def get_auth_headers_async() -> dict:
+    """`get_auth_headers` for async callers (see `get_auth_token_async`)."""
+    token = await get_auth_token_async()
+    return {
+        "Authorization": f"Bearer {token}",
+        "Accept": "application/json",
+        "Content-Type": "application/json"
+    }
@@ -0,0 +1,238 @@
+"""
+Pluggable shared cache for data that should survive across worker processes.
+
+All backends implement the same Redis-compatible subset (`get`, `set` with
+`ex`, `delete`, `exists`), so code written against the interface works with
+a real Redis in production and with a local stand-in everywhere else.
+`CACHE_BACKEND` selects the backend:
+
+- ``memory``: per-process LRU dict bounded by `CACHE_MEMORY_MAX_ENTRIES` and
+  `CACHE_MEMORY_MAX_BYTES` (not shared; the single-process default).
+- ``sqlite``: SQLite file at `CACHE_SQLITE_PATH`, shared by every worker
+  on the host.
+- ``shm``: the SQLite backend placed on ``/dev/shm`` (tmpfs), i.e. shared
+  memory without disk I/O; falls back to ``sqlite`` where unavailable.
+- ``redis``: any Redis-protocol server at `CACHE_REDIS_URL` (requires the
+  optional ``redis`` package).
+
+Cached values include credentials (the Okta access token), so cache files
+are created readable by the owning user only (0600), and a file that is a
+symlink or owned by another user is refused.
+"""
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Union
+
+from config.settings import settings
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SHARED_CACHE = REGISTRY.counter(
+    "shared_cache_total", "Shared cache lookups by cache namespace", ["cache", "result"])
+
+Value = Union[bytes, str]
+
+
+def _to_bytes(value: Value) -> bytes:
+    return value.encode("utf-8") if isinstance(value, str) else value
+
+
+class MemoryCache:
+    """Process-local LRU cache with TTLs, bounded by entry count and total value bytes."""
+
+    # seconds between sweeps of expired entries (run from `set`)
+    PURGE_INTERVAL = 60.0
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self._data: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._bytes = 0
+        self._next_purge = time.time() + self.PURGE_INTERVAL
+
+    def _drop(self, key: str) -> None:
+        value, _ = self._data.pop(key)
+        self._bytes -= len(value)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                self._drop(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Value, ex: Optional[float] = None) -> bool:
+        now = time.time()
+        value = _to_bytes(value)
+        if len(value) > self.max_bytes:
+            self.delete(key)
+            return False
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (value, now + ex if ex else None)
+            self._bytes += len(value)
+            if now >= self._next_purge:
+                self._next_purge = now + self.PURGE_INTERVAL
+                for k in [k for k, (_, exp) in self._data.items() if exp is not None and exp <= now]:
+                    self._drop(k)
+            # evict least recently used entries
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+        return True
+
+    def delete(self, key: str) -> int:
+        with self._lock:
+            if key not in self._data:
+                return 0
+            self._drop(key)
+            return 1
+
+    def exists(self, key: str) -> int:
+        return 1 if self.get(key) is not None else 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def _create_private(path: str) -> None:
+    """Create ``path`` (and tighten an existing file and its WAL files) to owner-only access."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0), 0o600)
+    try:
+        if hasattr(os, "getuid") and os.fstat(fd).st_uid != os.getuid():
+            raise RuntimeError(f"Cache file {path} is owned by another user")
+        if hasattr(os, "fchmod"):
+            os.fchmod(fd, 0o600)
+    finally:
+        os.close(fd)
+    # SQLite gives the -wal/-shm files the database's mode when it creates them
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.chmod(path + suffix, 0o600)
+
+
+class SQLiteCache:
+    """Cache in a SQLite file; safe to share between processes on one host."""
+
+    # fraction of writes that also purge expired rows
+    PURGE_PROBABILITY = 0.01
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        _create_private(path)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread; SQLite handles cross-process locking
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._conn().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: Value, ex: Optional[float] = None) -> bool:
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, _to_bytes(value), now + ex if ex else None),
+        )
+        if random.random() < self.PURGE_PROBABILITY:
+            conn.execute("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        return True
+
+    def delete(self, key: str) -> int:
+        return self._conn().execute("DELETE FROM kv WHERE key = ?", (key,)).rowcount
+
+    def exists(self, key: str) -> int:
+        return 1 if self.get(key) is not None else 0
+
+
+def _redis_cache(url: str):
+    try:
+        import redis
+    except ImportError as e:
+        raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from e
+    return redis.Redis.from_url(url)
+
+
+def _build_cache():
+    backend = (settings.CACHE_BACKEND or "memory").lower()
+    if backend == "redis":
+        return _redis_cache(settings.CACHE_REDIS_URL)
+    if backend == "shm":
+        if os.path.isdir("/dev/shm"):
+            return SQLiteCache(os.path.join("/dev/shm", os.path.basename(settings.CACHE_SQLITE_PATH)))
+        logger.warning("/dev/shm not available; using SQLite cache at %s", settings.CACHE_SQLITE_PATH)
+        return SQLiteCache(settings.CACHE_SQLITE_PATH)
+    if backend == "sqlite":
+        return SQLiteCache(settings.CACHE_SQLITE_PATH)
+    return MemoryCache(settings.CACHE_MEMORY_MAX_ENTRIES, settings.CACHE_MEMORY_MAX_BYTES)
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide cache backend (created on first use)."""
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = _build_cache()
+    return _CACHE
+
+
+def is_shared() -> bool:
+    """True when the backend is shared between processes (anything but ``memory``)."""
+    return not isinstance(get_cache(), MemoryCache)
+
+
+def get_json(namespace: str, key: str) -> Optional[Any]:
+    """Read a JSON value; cache errors count as misses so callers never fail on the cache."""
+    try:
+        raw = get_cache().get(f"{namespace}:{key}")
+    except Exception as e:
+        logger.warning("Shared cache read failed (%s): %s", namespace, e)
+        raw = None
+    SHARED_CACHE.inc(cache=namespace, result="hit" if raw is not None else "miss")
+    return json.loads(raw) if raw is not None else None
+
+
+def set_json(namespace: str, key: str, value: Any, ex: Optional[float] = None) -> None:
+    try:
+        get_cache().set(f"{namespace}:{key}", json.dumps(value, default=str), ex=ex)
+    except Exception as e:
+        logger.warning("Shared cache write failed (%s): %s", namespace, e)
+
+
+def delete(namespace: str, key: str) -> None:
+    try:
+        get_cache().delete(f"{namespace}:{key}")
+    except Exception as e:
+        logger.warning("Shared cache delete failed (%s): %s", namespace, e)
@@ -0,0 +1,338 @@
+"""
+In-process metrics registry with Prometheus text exposition.
+
+Counters, gauges and histograms are plain dicts of label tuples guarded by
+one lock each; recording a sample is a dict lookup and an add, so it is
+cheap enough to leave on under load. Values that already exist elsewhere
+(e.g. `functools.lru_cache` statistics) are read through callback gauges
+at scrape time instead of being tracked on the hot path.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# default latency buckets in seconds (Canvas/Okta/LLM calls span ms to tens of seconds)
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    @contextmanager
+    def track_inprogress(self, **labels: str) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class CallbackGauge(_Metric):
+    """Gauge whose samples are produced by ``callback`` at scrape time.
+
+    The callback returns a mapping of label-value tuples to values.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Dict[LabelValues, float]]) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def _samples(self) -> List[str]:
+        try:
+            items = list(self.callback().items())
+        except Exception:
+            return []
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            row[idx] += 1
+            row[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[Dict[str, str]]:
+        """Observe the duration of the block; the yielded dict may override labels."""
+        start = time.perf_counter()
+        labels = dict(labels)
+        try:
+            yield labels
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> float:
+        row = self._values.get(self._key(labels))
+        return sum(row[:-1]) if row else 0.0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, row in items:
+            cumulative = 0.0
+            for bound, n in zip(self.buckets + (float("inf"),), row[:-1]):
+                cumulative += n
+                le = 'le="%s"' % _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(row[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(cumulative)}")
+        return lines
+
+
+class Registry:
+    """Named collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def callback_gauge(self, name: str, documentation: str, labelnames: Sequence[str],
+                       callback: Callable[[], Dict[LabelValues, float]]) -> CallbackGauge:
+        return self._register(CallbackGauge(name, documentation, labelnames, callback))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# --- shared application metrics ---------------------------------------------
+
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", ["method"])
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ["method", "route", "status"])
+
+CANVAS_REQUEST_DURATION = REGISTRY.histogram(
+    "canvas_request_duration_seconds", "Canvas API call latency by Canvas route", ["route", "status"])
+CANVAS_IN_FLIGHT = REGISTRY.gauge(
+    "canvas_requests_in_flight", "Canvas API calls currently in flight")
+
+OKTA_TOKEN_FETCH_DURATION = REGISTRY.histogram(
+    "okta_token_fetch_duration_seconds", "Okta token fetch latency", ["outcome"])
+AUTH_TOKEN_CACHE = REGISTRY.counter(
+    "auth_token_cache_total", "Okta bearer token cache lookups", ["result"])
+
+LLM_REQUEST_DURATION = REGISTRY.histogram(
+    "llm_request_duration_seconds", "LLM completion latency", ["model", "outcome"])
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "LLM token usage reported by completions", ["model", "kind"])
+LLM_IN_FLIGHT = REGISTRY.gauge(
+    "llm_requests_in_flight", "LLM completions currently in flight")
+LLM_COST = REGISTRY.counter(
+    "llm_cost_usd_total", "Estimated LLM spend from token usage and LLM_PRICES", ["model"])
+LLM_ROUTES = REGISTRY.counter(
+    "llm_routes_total", "Routed LLM extractions by initial route and outcome", ["route", "outcome"])
+LLM_PACKED = REGISTRY.counter(
+    "llm_packed_incidents_total", "Incidents in packed LLM extractions by outcome", ["outcome"])
+LLM_STREAM_FIRST_FIELD = REGISTRY.histogram(
+    "llm_stream_first_field_seconds", "Time from a streamed LLM request to its first complete field", ["model"])
+
+EXTRACTIONS = REGISTRY.counter(
+    "extractions_total", "Rule-based extraction outcomes", ["ticket_type", "outcome"])
+TICKET_CLASSIFIER = REGISTRY.counter(
+    "ticket_classifier_total", "Learned ticket-type fallback outcomes", ["outcome"])
+
+
+def _lru_cache_stats() -> Dict[LabelValues, float]:
+    # imported lazily so utils stays importable without the services package
+    from services.alias_index import _INDEX
+    from services.normalizer import key_cache_info
+
+    stats: Dict[LabelValues, float] = {}
+    caches = dict(key_cache_info())
+    caches["alias_resolve"] = _INDEX.resolve_scored.cache_info()
+    for name, info in caches.items():
+        stats[(name, "hits")] = info.hits
+        stats[(name, "misses")] = info.misses
+        stats[(name, "size")] = info.currsize
+    return stats
+
+
+def _cache_hit_ratios() -> Dict[LabelValues, float]:
+    ratios: Dict[LabelValues, float] = {}
+    stats = _lru_cache_stats()
+    for (name, kind), value in stats.items():
+        if kind != "hits":
+            continue
+        total = value + stats[(name, "misses")]
+        ratios[(name,)] = value / total if total else 0.0
+    hits = AUTH_TOKEN_CACHE.value(result="hit")
+    total = hits + AUTH_TOKEN_CACHE.value(result="miss")
+    ratios[("auth_token",)] = hits / total if total else 0.0
+    shared = REGISTRY.get("shared_cache_total")
+    if shared is not None:
+        namespaces = {key[0] for key in list(shared._values)}
+        for ns in namespaces:
+            hits = shared.value(cache=ns, result="hit")
+            total = hits + shared.value(cache=ns, result="miss")
+            ratios[(f"shared_{ns}",)] = hits / total if total else 0.0
+    return ratios
+
+
+REGISTRY.callback_gauge("cache_stats", "In-process cache statistics", ["cache", "kind"], _lru_cache_stats)
+REGISTRY.callback_gauge("cache_hit_ratio", "In-process cache hit ratio", ["cache"], _cache_hit_ratios)
+
+
+class MetricsMiddleware:
+    """ASGI middleware tracking in-flight requests and latency per route template."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "")
+        status = {"code": "500"}
+
+        async def _send(message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc(method=method)
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec(method=method)
+            route = scope.get("route")
+            # route templates keep label cardinality bounded; unmatched paths share one label
+            template = getattr(route, "path", None) or "<unmatched>"
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, method=method, route=template, status=status["code"])
@@ -0,0 +1,264 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled when `PROFILING_ENABLED` is set and either it
+carries the admin `X-Profile` header / `__profile` query flag matching
+`PROFILING_TOKEN` (on-demand profiling is refused while no token is
+configured) or it is picked by `PROFILING_SAMPLE_RATE`. One request is
+profiled at a time per process; requests arriving while a profile is being
+taken run unprofiled. Two modes are available:
+
+- ``cprofile``: deterministic cProfile of the event-loop thread. Best for
+  async routes (incident routes, Canvas calls). Other coroutines running on
+  the loop meanwhile are included; the sidecar records how many requests
+  were in flight when the profile started.
+- ``sample``: statistical stack sampling of every thread, written in folded
+  flamegraph format. Needed for sync routes (LLM extraction), which run in
+  Starlette's threadpool where cProfile can't see them. Concurrent requests
+  show up in the samples too.
+
+With ``auto`` (default) the mode follows the matched endpoint: sync
+endpoints are sampled, async endpoints use cProfile. Profiles are written
+to `PROFILING_DIR` with a JSON sidecar and the oldest are pruned past
+`PROFILING_MAX_FILES`.
+"""
+import asyncio
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from config.settings import settings
+from utils.tracing import get_correlation_id
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_FLAG = "__profile"
+
+# held while a profile is taken: cProfile hooks are per thread, and on the
+# event loop a second profiler would replace (3.11) or collide with (3.12+) the first
+_PROFILE_LOCK = threading.Lock()
+
+# leaf frames from these modules are idle waits, not work
+_IDLE_MODULES = ("threading.py", "selectors.py", "queue.py", "thread.py")
+
+
+class StackSampler:
+    """Background thread sampling the stacks of all other threads."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for tid, frame in sys._current_frames().items():
+                if tid == own:
+                    continue
+                if os.path.basename(frame.f_code.co_filename) in _IDLE_MODULES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _ensure_dir() -> str:
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    return settings.PROFILING_DIR
+
+
+def _prune() -> None:
+    metas = sorted(f for f in os.listdir(settings.PROFILING_DIR) if f.endswith(".json"))
+    for meta in metas[:max(0, len(metas) - settings.PROFILING_MAX_FILES)]:
+        profile_id = meta[:-5]
+        for name in os.listdir(settings.PROFILING_DIR):
+            if name.startswith(profile_id):
+                os.remove(os.path.join(settings.PROFILING_DIR, name))
+
+
+def _save(meta: Dict[str, Any], data: bytes, ext: str) -> None:
+    directory = _ensure_dir()
+    meta["file"] = f"{meta['id']}{ext}"
+    with open(os.path.join(directory, meta["file"]), "wb") as fh:
+        fh.write(data)
+    with open(os.path.join(directory, f"{meta['id']}.json"), "w", encoding="utf-8") as fh:
+        json.dump(meta, fh)
+    _prune()
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Return metadata of stored profiles, newest first."""
+    if not os.path.isdir(settings.PROFILING_DIR):
+        return []
+    out = []
+    for name in sorted(os.listdir(settings.PROFILING_DIR), reverse=True):
+        if name.endswith(".json"):
+            with open(os.path.join(settings.PROFILING_DIR, name), encoding="utf-8") as fh:
+                out.append(json.load(fh))
+    return out
+
+
+def get_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    """Return a profile's metadata with the absolute path of its data file."""
+    if not profile_id.replace("-", "").isalnum():
+        return None
+    path = os.path.join(settings.PROFILING_DIR, f"{profile_id}.json")
+    if not os.path.isfile(path):
+        return None
+    with open(path, encoding="utf-8") as fh:
+        meta = json.load(fh)
+    meta["path"] = os.path.abspath(os.path.join(settings.PROFILING_DIR, meta["file"]))
+    return meta
+
+
+def render_text(meta: Dict[str, Any], limit: int = 50) -> str:
+    """Human-readable summary: pstats by cumulative time, or the top folded stacks."""
+    if meta["mode"] == "cprofile":
+        buf = io.StringIO()
+        stats = pstats.Stats(meta["path"], stream=buf)
+        stats.sort_stats("cumulative").print_stats(limit)
+        return buf.getvalue()
+    with open(meta["path"], encoding="utf-8") as fh:
+        return "".join(fh.readlines()[:limit])
+
+
+def token_matches(value: Optional[str]) -> bool:
+    """True when ``value`` is the configured `PROFILING_TOKEN`; always False while none is set."""
+    if not settings.PROFILING_TOKEN or value is None:
+        return False
+    return hmac.compare_digest(value.encode("utf-8"), settings.PROFILING_TOKEN.encode("utf-8"))
+
+
+class ProfilingMiddleware:
+    """ASGI middleware capturing a profile for selected requests."""
+
+    def __init__(self, app, router=None) -> None:
+        self.app = app
+        self.router = router
+        self.prefixes = tuple(p.strip() for p in settings.PROFILING_PATH_PREFIXES.split(",") if p.strip())
+        self.in_flight = 0
+
+    def _requested_mode(self, scope) -> Optional[str]:
+        """Return the requested mode ("" for default) or None when not selected."""
+        headers = dict(scope.get("headers") or [])
+        raw = headers.get(PROFILE_HEADER)
+        if raw is not None and token_matches(raw.decode("latin-1")):
+            return headers.get(b"x-profile-mode", b"").decode("latin-1")
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        if PROFILE_QUERY_FLAG in query and token_matches(query[PROFILE_QUERY_FLAG][0]):
+            return query.get("__profile_mode", [""])[0]
+        if settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE:
+            return ""
+        return None
+
+    def _auto_mode(self, scope) -> str:
+        if self.router is not None:
+            from starlette.routing import Match
+
+            for route in self.router.routes:
+                match, _ = route.matches(scope)
+                if match == Match.FULL:
+                    endpoint = getattr(route, "endpoint", None)
+                    if endpoint is not None and not asyncio.iscoroutinefunction(endpoint):
+                        return "sample"
+                    break
+        return "cprofile"
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        if self.prefixes and not scope.get("path", "").startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        try:
+            mode = self._requested_mode(scope)
+            if mode is None or not _PROFILE_LOCK.acquire(blocking=False):
+                await self.app(scope, receive, send)
+                return
+            try:
+                await self._profile(scope, receive, send, mode)
+            finally:
+                _PROFILE_LOCK.release()
+        finally:
+            self.in_flight -= 1
+
+    async def _profile(self, scope, receive, send, mode: str) -> None:
+        mode = mode or settings.PROFILING_MODE
+        if mode not in ("cprofile", "sample"):
+            mode = self._auto_mode(scope)
+
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+        async def _send(message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        meta: Dict[str, Any] = {
+            "id": profile_id,
+            "mode": mode,
+            "method": scope.get("method"),
+            "path": scope.get("path"),
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "correlation_id": get_correlation_id(),
+            "started_at": time.time(),
+            "requests_in_flight": self.in_flight,
+        }
+        start = time.perf_counter()
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, _send)
+            finally:
+                profiler.disable()
+                meta["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+                fd, tmp = tempfile.mkstemp(suffix=".prof", dir=_ensure_dir())
+                os.close(fd)
+                try:
+                    profiler.dump_stats(tmp)
+                    with open(tmp, "rb") as fh:
+                        _save(meta, fh.read(), ".prof")
+                finally:
+                    os.remove(tmp)
+        else:
+            sampler = StackSampler(settings.PROFILING_SAMPLE_INTERVAL_MS / 1000.0)
+            sampler.start()
+            try:
+                await self.app(scope, receive, _send)
+            finally:
+                sampler.stop()
+                meta["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+                meta["samples"] = sampler.samples
+                _save(meta, sampler.folded().encode("utf-8"), ".folded")
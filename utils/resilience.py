@@ -0,0 +1,397 @@
+"""
+Per-upstream resilience: rate limiting, adaptive concurrency, circuit
+breaking and retries.
+
+Every outbound call to Canvas, Okta or Azure OpenAI goes through the
+`Upstream` for that service:
+
+1. the circuit breaker rejects calls immediately while the upstream is
+   known to be failing (``CircuitOpenError``), letting a limited number of
+   half-open probes through after `BREAKER_RECOVERY_SECONDS`;
+2. a token bucket caps the request rate;
+3. an AIMD limiter caps concurrent calls, growing the limit by ~1 per
+   window of successful fast calls and halving it on 429s, timeouts or
+   latency above the target;
+4. retryable failures (429, 502/503/504, timeouts, connection errors) are
+   retried with exponential backoff, honouring ``Retry-After``.
+
+Canvas calls are async while Okta and OpenAI calls are sync (the latter
+run in Starlette's threadpool), so each primitive is thread-safe and has
+both a blocking and an async entry point.
+"""
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from config.settings import settings
+from utils.metrics import REGISTRY
+
+UPSTREAM_RETRIES = REGISTRY.counter(
+    "upstream_retries_total", "Retried upstream calls", ["upstream"])
+UPSTREAM_REJECTIONS = REGISTRY.counter(
+    "upstream_rejections_total", "Upstream calls rejected by the circuit breaker", ["upstream"])
+
+# poll interval for async waiters on thread-safe primitives
+_ASYNC_POLL_SECONDS = 0.01
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised when a call is rejected because the upstream's circuit is open."""
+
+    def __init__(self, upstream: str, retry_after: float) -> None:
+        super().__init__(f"{upstream} circuit open; retry in {retry_after:.1f}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket where callers reserve a token and sleep until it is due."""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how long to wait before using it."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limiter driven by observed latency and overload signals."""
+
+    def __init__(self, initial: int, minimum: int, maximum: int, latency_target: float) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self) -> None:
+        while not self.try_acquire():
+            await asyncio.sleep(_ASYNC_POLL_SECONDS)
+
+    def release(self, latency: float, overloaded: bool = False) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if overloaded or latency > self.latency_target:
+                # at most one multiplicative decrease per latency window
+                if now - self._last_decrease > max(latency, 0.1):
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open probing."""
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float, half_open_probes: int = 1) -> None:
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> Optional[float]:
+        """Return None if the call may proceed, else seconds until the next probe."""
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self.recovery_timeout - (time.monotonic() - self._opened_at)
+                if remaining > 0:
+                    return remaining
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    return self.recovery_timeout
+                self._probes += 1
+            return None
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+    def release_probe(self) -> None:
+        """Return a half-open probe slot when the call ended without a verdict."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, parsed.timestamp() - time.time())
+
+
+def classify(exc: BaseException) -> Tuple[bool, bool, bool, Optional[float]]:
+    """Return (retryable, upstream_failure, overloaded, retry_after) for an exception.
+
+    Understands httpx errors and the OpenAI SDK's status/connection errors
+    by duck typing (`status_code`, `response.headers`).
+    """
+    if isinstance(exc, httpx.TimeoutException):
+        return True, True, True, None
+    if isinstance(exc, httpx.RequestError):
+        return True, True, False, None
+
+    name = type(exc).__name__
+    if name in ("APITimeoutError",):
+        return True, True, True, None
+    if name in ("APIConnectionError",):
+        return True, True, False, None
+
+    status = getattr(exc, "status_code", None)
+    response = getattr(exc, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    if status is None:
+        return False, False, False, None
+
+    retry_after = None
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        retry_after = parse_retry_after(headers.get("retry-after"))
+    if status == 429:
+        return True, True, True, retry_after
+    if status in (502, 503, 504):
+        return True, True, status == 503, retry_after
+    if status >= 500:
+        return False, True, False, None
+    # other 4xx are caller errors, not upstream health problems
+    return False, False, False, None
+
+
+class Upstream:
+    """Resilience policy for one upstream service."""
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: float,
+        max_concurrency: int,
+        latency_target: float,
+        max_retries: int,
+        failure_threshold: int,
+        recovery_timeout: float,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+    ) -> None:
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.limiter = AdaptiveLimiter(max(1, max_concurrency // 2), 1, max_concurrency, latency_target)
+        self.breaker = CircuitBreaker(failure_threshold, recovery_timeout)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def _delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        backoff = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return backoff * (0.5 + random.random() / 2)
+
+    def _check_breaker(self) -> None:
+        wait = self.breaker.before_call()
+        if wait is not None:
+            UPSTREAM_REJECTIONS.inc(upstream=self.name)
+            raise CircuitOpenError(self.name, wait)
+
+    def _after_error(self, exc: BaseException, latency: float, attempt: int) -> Optional[float]:
+        """Update state after a failed attempt; return a retry delay or None to re-raise."""
+        retryable, failure, overloaded, retry_after = classify(exc)
+        self.limiter.release(latency, overloaded=overloaded)
+        if failure:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        if not retryable or attempt > self.max_retries or self.breaker.state == OPEN:
+            return None
+        UPSTREAM_RETRIES.inc(upstream=self.name)
+        return self._delay(attempt, retry_after)
+
+    def _after_success(self, latency: float) -> None:
+        self.limiter.release(latency)
+        self.breaker.record_success()
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """Run a blocking call under the policy."""
+        attempt = 0
+        while True:
+            attempt += 1
+            self._check_breaker()
+            self.bucket.acquire()
+            self.limiter.acquire()
+            start = time.monotonic()
+            try:
+                result = fn()
+            except BaseException as e:
+                if not isinstance(e, Exception):
+                    self.limiter.release(time.monotonic() - start)
+                    self.breaker.release_probe()
+                    raise
+                delay = self._after_error(e, time.monotonic() - start, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self._after_success(time.monotonic() - start)
+            return result
+
+    async def call_async(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run an async call under the policy."""
+        attempt = 0
+        while True:
+            attempt += 1
+            self._check_breaker()
+            await self.bucket.acquire_async()
+            await self.limiter.acquire_async()
+            start = time.monotonic()
+            try:
+                result = await fn()
+            except BaseException as e:
+                if not isinstance(e, Exception):
+                    # cancellation: free the slot without judging the upstream
+                    self.limiter.release(time.monotonic() - start)
+                    self.breaker.release_probe()
+                    raise
+                delay = self._after_error(e, time.monotonic() - start, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self._after_success(time.monotonic() - start)
+            return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "in_flight": self.limiter.in_flight,
+        }
+
+
+class _PassThrough:
+    """Stand-in used when RESILIENCE_ENABLED is off."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        return fn()
+
+    async def call_async(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        return await fn()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"circuit": "disabled"}
+
+
+def _build(name: str, rate: float, max_concurrency: int, latency_target: float):
+    if not settings.RESILIENCE_ENABLED:
+        return _PassThrough(name)
+    return Upstream(
+        name,
+        rate=rate,
+        burst=max(1.0, rate),
+        max_concurrency=max_concurrency,
+        latency_target=latency_target,
+        max_retries=settings.RESILIENCE_MAX_RETRIES,
+        failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout=settings.BREAKER_RECOVERY_SECONDS,
+    )
+
+
+CANVAS = _build("canvas", settings.CANVAS_RATE_LIMIT, settings.CANVAS_MAX_CONCURRENCY, settings.CANVAS_LATENCY_TARGET_S)
+OKTA = _build("okta", settings.OKTA_RATE_LIMIT, settings.OKTA_MAX_CONCURRENCY, settings.OKTA_LATENCY_TARGET_S)
+AZURE_OPENAI = _build("azure_openai", settings.LLM_RATE_LIMIT, settings.LLM_MAX_CONCURRENCY, settings.LLM_LATENCY_TARGET_S)
+# the routed small deployment (OPENAI_MODEL): its own circuit, so its failures don't stop the deployment's calls
+AZURE_OPENAI_SMALL = _build("azure_openai_small", settings.LLM_RATE_LIMIT, settings.LLM_MAX_CONCURRENCY,
+                            settings.LLM_LATENCY_TARGET_S)
+
+UPSTREAMS = {u.name: u for u in (CANVAS, OKTA, AZURE_OPENAI, AZURE_OPENAI_SMALL)}
+
+_CIRCUIT_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def _upstream_gauges() -> Dict[Tuple[str, ...], float]:
+    values: Dict[Tuple[str, ...], float] = {}
+    for name, upstream in UPSTREAMS.items():
+        snap = upstream.snapshot()
+        if snap["circuit"] == "disabled":
+            continue
+        values[(name, "circuit_state")] = _CIRCUIT_VALUES[snap["circuit"]]
+        values[(name, "concurrency_limit")] = snap["concurrency_limit"]
+        values[(name, "in_flight")] = snap["in_flight"]
+    return values
+
+
+REGISTRY.callback_gauge(
+    "upstream_state", "Upstream circuit state (0 closed, 1 half-open, 2 open), concurrency limit and in-flight calls",
+    ["upstream", "kind"], _upstream_gauges)
@@ -0,0 +1,216 @@
+"""
+Lightweight request-scoped tracing.
+
+Spans are opened with `span(name)` or the `@traced(name)` decorator and
+nest through a context variable, so they follow a request across awaits
+and into Starlette's threadpool. The backend is chosen by `TRACING_BACKEND`:
+
+- ``none`` (default): spans are no-ops; only the correlation ID is kept.
+- ``local``: span trees are recorded per request, and requests slower than
+  `TRACING_SLOW_REQUEST_MS` are logged as a full tree and kept in a ring
+  buffer for `/debug/traces/slow`.
+- ``otel``: spans are forwarded to OpenTelemetry (`opentelemetry-api` must
+  be installed; falls back to ``none`` otherwise).
+"""
+import asyncio
+import functools
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+CORRELATION_HEADER = "x-correlation-id"
+
+try:
+    from opentelemetry import trace as _otel_trace
+except ImportError:  # optional dependency
+    _otel_trace = None
+
+
+def _resolve_backend() -> str:
+    backend = (settings.TRACING_BACKEND or "none").lower()
+    if backend == "otel" and _otel_trace is None:
+        logger.warning("TRACING_BACKEND=otel but opentelemetry is not installed; tracing disabled")
+        return "none"
+    return backend if backend in ("none", "local", "otel") else "none"
+
+
+BACKEND = _resolve_backend()
+
+_correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+# most recent slow request traces (local backend only)
+SLOW_TRACES: Deque[Dict[str, Any]] = deque(maxlen=settings.TRACING_SLOW_TRACE_BUFFER)
+
+
+class Span:
+    """A timed operation with attributes and child spans."""
+
+    __slots__ = ("name", "attributes", "start", "end", "error", "children")
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.error: Optional[str] = None
+        self.children: List["Span"] = []
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def to_dict(self, origin: Optional[float] = None) -> Dict[str, Any]:
+        origin = self.start if origin is None else origin
+        return {
+            "name": self.name,
+            "offset_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+            "children": [child.to_dict(origin) for child in self.children],
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def get_correlation_id() -> Optional[str]:
+    return _correlation_id.get()
+
+
+def current_span():
+    return _current_span.get() or _NOOP_SPAN
+
+
+def detach_span() -> None:
+    """Stop attaching spans to the request that spawned the current background task."""
+    _current_span.set(None)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """Open a child span of the current span (no-op unless tracing is enabled)."""
+    if BACKEND == "local":
+        parent = _current_span.get()
+        if parent is None:
+            # outside a traced request there is no tree to attach to
+            yield _NOOP_SPAN
+            return
+        s = Span(name, attributes)
+        parent.children.append(s)
+        token = _current_span.set(s)
+        try:
+            yield s
+        except BaseException as e:
+            s.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            s.end = time.perf_counter()
+            _current_span.reset(token)
+    elif BACKEND == "otel":
+        tracer = _otel_trace.get_tracer("canvas-queue-api")
+        with tracer.start_as_current_span(name, attributes=attributes) as s:
+            cid = _correlation_id.get()
+            if cid:
+                s.set_attribute("correlation_id", cid)
+            yield s
+    else:
+        yield _NOOP_SPAN
+
+
+def traced(name: str) -> Callable:
+    """Decorator wrapping a sync or async function in a span."""
+    def decorator(fn: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if BACKEND == "none":
+                    return await fn(*args, **kwargs)
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if BACKEND == "none":
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _record_slow(root: Span, correlation_id: str) -> None:
+    tree = {"correlation_id": correlation_id, **root.to_dict()}
+    SLOW_TRACES.append(tree)
+    logger.warning("Slow request %s (%.1f ms): %s", correlation_id, root.duration_ms, json.dumps(tree, default=str))
+
+
+class CorrelationIdMiddleware:
+    """ASGI middleware assigning a correlation ID and a root span to each request.
+
+    An incoming `X-Correlation-ID` (or `X-Request-ID`) header is reused;
+    otherwise a new ID is generated. The ID is echoed on the response.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        raw = headers.get(CORRELATION_HEADER.encode()) or headers.get(b"x-request-id")
+        cid = raw.decode("latin-1")[:128] if raw else uuid.uuid4().hex
+        cid_token = _correlation_id.set(cid)
+
+        async def _send(message) -> None:
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(CORRELATION_HEADER.encode(), cid.encode("latin-1"))]
+            await send(message)
+
+        try:
+            if BACKEND == "local":
+                root = Span(f"{scope.get('method', '')} {scope.get('path', '')}")
+                span_token = _current_span.set(root)
+                try:
+                    await self.app(scope, receive, _send)
+                finally:
+                    root.end = time.perf_counter()
+                    _current_span.reset(span_token)
+                    route = scope.get("route")
+                    if route is not None:
+                        root.set_attribute("route", getattr(route, "path", None))
+                    if root.duration_ms >= settings.TRACING_SLOW_REQUEST_MS:
+                        _record_slow(root, cid)
+            elif BACKEND == "otel":
+                with span(f"{scope.get('method', '')} {scope.get('path', '')}"):
+                    await self.app(scope, receive, _send)
+            else:
+                await self.app(scope, receive, _send)
+        finally:
+            _correlation_id.reset(cid_token)